@@ -1,8 +1,295 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from docx import Document
+from docx.document import Document as DocxDocument
+from docx.enum.style import WD_STYLE_TYPE
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from io import BytesIO
 from pathlib import Path
-from typing import Union, cast
-from auto_documentation.markdown_converter.html_validator import HtmlNode, SupportedTags
-from bs4 import BeautifulSoup
+from typing import Dict, Iterable, List, Tuple, Union
+import copy
+import os
+import time
+from auto_documentation.markdown_converter.events import CLOSE, OPEN, TEXT, Event
+from auto_documentation.markdown_converter.html_document import iter_node_events
+from auto_documentation.markdown_converter.html_validator import (
+    HtmlNode,
+    SupportedTags,
+    iter_html_events,
+)
+
+HEADING_LEVELS = {
+    SupportedTags.H1: 1,
+    SupportedTags.H2: 2,
+    SupportedTags.H3: 3,
+    SupportedTags.H4: 4,
+    SupportedTags.H5: 5,
+    SupportedTags.H6: 6,
+}
+# Paragraph blocks, text outside of any of them gets a paragraph of its own
+BLOCK_TAGS = {SupportedTags.P, SupportedTags.DIV, SupportedTags.LI, *HEADING_LEVELS}
+# The default template defines bullet styles for three levels of nesting
+LIST_STYLES = ["List Bullet", "List Bullet 2", "List Bullet 3"]
+TABLE_STYLE = "Table Grid"
+# A table cell while its table is still open: (text, bold, italic) runs
+CellRuns = List[Tuple[str, bool, bool]]
+
+
+def apply_style_id(target: Union[Paragraph, Table], style_id: Union[str, None]) -> None:
+    """
+    Give a paragraph or table an already resolved style id, None for the default.
+
+    The public ``style`` setters look the default style up again on every
+    assignment, even for a style object, which costs ~1.7ms a paragraph
+    against ~0.2ms here. This is the only place that writes python-docx's
+    oxml attributes, to_word_test checks it against the public setters.
+    """
+    if isinstance(target, Table):
+        target._tbl.tblStyle_val = style_id
+    else:
+        target._p.style = style_id
+
+
+class DocxWriter:
+    """
+    Write parser events straight into python-docx paragraphs, runs and tables.
+
+    Paragraphs are added as their events arrive. Tables are buffered until
+    ``</table>`` because the column count is only known once every row has
+    been seen. python-docx resolves a style name, or even a style object,
+    by scanning every style in the document, so each style id is resolved
+    once and then applied with apply_style_id.
+    """
+
+    def __init__(
+        self,
+        doc: Union[DocxDocument, None] = None,
+        style_ids: Union[Dict[str, Union[str, None]], None] = None,
+    ) -> None:
+        self.doc = doc if doc is not None else Document()
+        # Documents cloned from one template can share their resolved ids
+        self.style_ids: Dict[str, Union[str, None]] = (
+            style_ids if style_ids is not None else {}
+        )
+        self.paragraph: Union[Paragraph, None] = None
+        self.open_tags: List[SupportedTags] = []
+        self.bold = 0
+        self.italic = 0
+        self.list_depth = 0
+        self.table_rows: Union[List[List[CellRuns]], None] = None
+
+    def style_id(
+        self, name: str, style_type: WD_STYLE_TYPE = WD_STYLE_TYPE.PARAGRAPH
+    ) -> Union[str, None]:
+        """Resolve a style name once, None stands for the default style."""
+        if name not in self.style_ids:
+            self.style_ids[name] = self.doc.part.get_style_id(name, style_type)
+        return self.style_ids[name]
+
+    def add_paragraph(self, style: Union[str, None] = None) -> Paragraph:
+        paragraph = self.doc.add_paragraph()
+        style_id = self.style_id(style) if style is not None else None
+        if style_id is not None:
+            apply_style_id(paragraph, style_id)
+        return paragraph
+
+    def list_style(self) -> str:
+        depth = min(max(self.list_depth, 1), len(LIST_STYLES))
+        return LIST_STYLES[depth - 1]
+
+    def write_events(self, events: Iterable[Event]) -> DocxDocument:
+        for kind, value in events:
+            if kind == TEXT:
+                self.write_text(value)
+            elif kind == OPEN:
+                self.open_tag(SupportedTags(value))
+            elif kind == CLOSE:
+                self.close_tag(SupportedTags(value))
+        return self.doc
+
+    def write_node(self, node: HtmlNode) -> DocxDocument:
+        return self.write_events(iter_node_events(node))
+
+    def open_tag(self, tag: SupportedTags) -> None:
+        self.open_tags.append(tag)
+        if self.table_rows is not None:
+            if tag is SupportedTags.TR:
+                self.table_rows.append([])
+            elif tag in (SupportedTags.TH, SupportedTags.TD) and self.table_rows:
+                self.table_rows[-1].append([])
+            elif tag is SupportedTags.BR:
+                self.write_text("\n")
+        elif tag in HEADING_LEVELS:
+            self.paragraph = self.add_paragraph(f"Heading {HEADING_LEVELS[tag]}")
+        elif tag is SupportedTags.LI:
+            self.paragraph = self.add_paragraph(self.list_style())
+        elif tag in (SupportedTags.P, SupportedTags.DIV):
+            # A paragraph inside a list item continues the item's paragraph
+            if SupportedTags.LI not in self.open_tags[:-1]:
+                self.paragraph = self.add_paragraph()
+        elif tag is SupportedTags.UL:
+            self.list_depth += 1
+            self.paragraph = None
+        elif tag is SupportedTags.TABLE:
+            self.table_rows = []
+            self.paragraph = None
+        elif tag is SupportedTags.BR:
+            if self.paragraph is not None:
+                self.paragraph.add_run().add_break()
+        elif tag is SupportedTags.HR:
+            self.doc.add_page_break()
+            self.paragraph = None
+
+        if tag is SupportedTags.STRONG:
+            self.bold += 1
+        elif tag is SupportedTags.EM:
+            self.italic += 1
+
+    def close_tag(self, tag: SupportedTags) -> None:
+        if self.open_tags and self.open_tags[-1] is tag:
+            self.open_tags.pop()
+        if tag is SupportedTags.STRONG:
+            self.bold = max(0, self.bold - 1)
+        elif tag is SupportedTags.EM:
+            self.italic = max(0, self.italic - 1)
+        elif tag is SupportedTags.UL:
+            self.list_depth = max(0, self.list_depth - 1)
+        elif tag is SupportedTags.TABLE and self.table_rows is not None:
+            self.write_table(self.table_rows)
+            self.table_rows = None
+        elif tag in BLOCK_TAGS and SupportedTags.LI not in self.open_tags:
+            self.paragraph = None
+
+    def write_text(self, text: str) -> None:
+        if self.table_rows is not None:
+            if self.table_rows and self.table_rows[-1]:
+                header = SupportedTags.TH in self.open_tags
+                self.table_rows[-1][-1].append(
+                    (text, bool(self.bold) or header, bool(self.italic))
+                )
+            return
+        if self.paragraph is None:
+            if not text.strip():
+                return
+            style = self.list_style() if self.list_depth else None
+            self.paragraph = self.add_paragraph(style)
+        run = self.paragraph.add_run(text)
+        if self.bold:
+            run.bold = True
+        if self.italic:
+            run.italic = True
+
+    def write_table(self, rows: List[List[CellRuns]]) -> None:
+        columns = max((len(row) for row in rows), default=0)
+        if not columns:
+            return
+        table = self.doc.add_table(rows=len(rows), cols=columns)
+        apply_style_id(table, self.style_id(TABLE_STYLE, WD_STYLE_TYPE.TABLE))
+        for row, cells in zip(table.rows, rows):
+            for cell, runs in zip(row.cells, cells):
+                paragraph = cell.paragraphs[0]
+                for text, bold, italic in runs:
+                    run = paragraph.add_run(text)
+                    if bold:
+                        run.bold = True
+                    if italic:
+                        run.italic = True
+
+
+class DocxTemplate:
+    """
+    A template package parsed once and cloned in memory for every document.
+
+    ``Document()`` unzips and parses the template on each call. Cloning the
+    parsed one is cheaper, and every clone shares the template's style ids.
+    """
+
+    def __init__(self, template_path: Union[Path, str, None] = None) -> None:
+        self.document = Document(template_path)
+        self.style_ids: Dict[str, Union[str, None]] = {}
+
+    def new_document(self) -> DocxDocument:
+        return copy.deepcopy(self.document)
+
+    def new_writer(self) -> DocxWriter:
+        return DocxWriter(self.new_document(), style_ids=self.style_ids)
+
+
+@dataclass
+class DocumentTiming:
+    output_path: Path
+    convert_seconds: float
+    save_seconds: float = 0.0
+
+
+# A tree, an HTML string or the tree's events already flattened
+DocumentSource = Union[HtmlNode, str, List[Event]]
+# Parsed once per worker process and cloned for each of its documents
+_worker_template: Union[DocxTemplate, None] = None
+
+
+def document_events(source: DocumentSource) -> Iterable[Event]:
+    if isinstance(source, str):
+        return iter_html_events(source)
+    if isinstance(source, list):
+        return source
+    return iter_node_events(source)
+
+
+def write_document(
+    output_path: Path, source: DocumentSource, template: DocxTemplate
+) -> DocumentTiming:
+    started = time.perf_counter()
+    writer = template.new_writer()
+    writer.write_events(document_events(source))
+    timing = DocumentTiming(output_path, time.perf_counter() - started)
+    started = time.perf_counter()
+    writer.doc.save(output_path)
+    timing.save_seconds = time.perf_counter() - started
+    return timing
+
+
+def _load_worker_template(template_path: Union[Path, str, None]) -> None:
+    global _worker_template
+    _worker_template = DocxTemplate(template_path)
+
+
+def _write_in_worker(output_path: Path, source: DocumentSource) -> DocumentTiming:
+    return write_document(output_path, source, _worker_template)
+
+
+def convert_documents(
+    documents: Iterable[Tuple[Union[Path, str], DocumentSource]],
+    template_path: Union[Path, str, None] = None,
+    max_workers: Union[int, None] = None,
+) -> List[DocumentTiming]:
+    """
+    Convert and save many (output path, tree or HTML) pairs on a process pool.
+
+    Conversion is pure Python and holds the GIL, so each worker process
+    converts and writes whole documents from its own copy of the template.
+    Timings are returned in input order.
+    """
+    jobs = [(Path(output_path), source) for output_path, source in documents]
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers <= 1 or len(jobs) < 2:
+        template = DocxTemplate(template_path)
+        return [write_document(path, source, template) for path, source in jobs]
+
+    # Trees go over as flat event lists, far cheaper to pickle than linked nodes
+    paths = [path for path, _ in jobs]
+    sources = [
+        source if isinstance(source, (str, list)) else list(iter_node_events(source))
+        for _, source in jobs
+    ]
+    chunksize = max(1, len(jobs) // (max_workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_load_worker_template,
+        initargs=(template_path,),
+    ) as pool:
+        return list(pool.map(_write_in_worker, paths, sources, chunksize=chunksize))
 
 
 class HtmlToWordConverter:
@@ -11,17 +298,17 @@ class HtmlToWordConverter:
         html_node: Union[HtmlNode, None],
         test_output_path: Union[Path, str, None],
         html_file_path: Union[Path, str, None] = None,
+        template: Union[DocxTemplate, None] = None,
     ):
         self.html_file_path = html_file_path
         self.html_node = html_node
         self.test_output_path = test_output_path
-        self.doc = Document()
+        self.writer = template.new_writer() if template is not None else DocxWriter()
+        self.doc = self.writer.doc
         self.html_as_string = None
 
         if self.html_file_path and self.html_node is None:
             self.open_html_file()
-        elif self.html_node:
-            self.html_as_string = self.html_node.display_string()
 
         self.convert()
         # self.save_to_file(self.test_output_path)
@@ -39,71 +326,20 @@ class HtmlToWordConverter:
         raw_data = self.html_file_path.read_text()
         self.html_as_string = raw_data
 
-    def recursive_convert(self, node: BeautifulSoup, parent_element: None):
-        for child in node.contents:
-            # Will need to also process siblings here
-            name = child.name
-            match name:
-                case (SupportedTags.HEADER, SupportedTags.BODY):
-                    continue
-                case (SupportedTags.BR, SupportedTags.HR):
-                    self.doc.add_page_break()
-                case (
-                    SupportedTags.P,
-                    SupportedTags.DIV,
-                ):
-                    paragraph = self.doc.add_paragraph()
-                    text = child.content
-                    paragraph.add_run(text)
-
-                case SupportedTags.TABLE:
-                    table = self.doc.add_table()
-                case SupportedTags.TH:
-                    ...
-                case SupportedTags.TR:
-                    ...
-                case SupportedTags.LI:
-                    ...
-                case SupportedTags.UL:
-                    ...
-                case (
-                    SupportedTags.H1,
-                    SupportedTags.H2,
-                    SupportedTags.H3,
-                    SupportedTags.H4,
-                    SupportedTags.H5,
-                    SupportedTags.H6,
-                ):
-                    ...
-                case SupportedTags.A:
-                    ...
-                case SupportedTags.IMG:
-                    # Content here would have to be bytes
-                    # self.doc.add_picture(child.content)
-                    ...
-                case (
-                    SupportedTags.EM,
-                    SupportedTags.SPAN,
-                    SupportedTags.STRONG,
-                ):
-                    parent_element = cast(Document.Paragraph, parent_element)
-                    parent_element
-
-            if child.children:
-                self.recursive_convert(child, parent_element=parent_element)
-
     def convert(self):
-        try:
-            as_soup = BeautifulSoup(self.html_as_string, "html.parser")
-            print(as_soup)
-            return True
-        except Exception as e:
-            raise e
+        if self.html_node is not None:
+            self.writer.write_node(self.html_node)
+        elif self.html_as_string is not None:
+            self.writer.write_events(iter_html_events(self.html_as_string))
+        return True
 
     def get_doc(self):
         return self.doc
 
-    def convert_to_bytes(self): ...
+    def convert_to_bytes(self) -> bytes:
+        buffer = BytesIO()
+        self.doc.save(buffer)
+        return buffer.getvalue()
 
     def save_to_file(self, file_path: Union[Path, str]):
         self.doc.save(file_path)
@@ -67,6 +67,31 @@ class PromptOutput(TypedDict):
     key: str
 
 
+def _relationship_pointer(string: str, indent: int = 0) -> str:
+    left = "-" * indent
+    return f"{left}>{string}\n"
+
+
+def _display_relationship(node: Union["TicketTree", "TicketNode"]) -> str:
+    initial_index = node.initial_index
+    result_str = _relationship_pointer(node.ticket_type, initial_index)
+    # BFS style display, walks copies so the tree itself is left untouched
+    for _child in node.child:
+        initial_index += 2
+        result_str += _relationship_pointer(_child.ticket_type, indent=initial_index)
+        next_children = list(_child.child)
+        if len(next_children):
+            initial_index = node.initial_index + 2
+            while next_children:
+                next_child = next_children.pop()
+                result_str += _relationship_pointer(
+                    next_child.ticket_type, indent=initial_index + 2
+                )
+                next_children.extend(next_child.child)
+                initial_index += 2
+    return result_str
+
+
 class TicketTree(BaseModel):
     # Basically this the model that maps from the parent ticket to the test
     parent: Union["TicketTree", None] = None
@@ -79,29 +104,90 @@ class TicketTree(BaseModel):
         super().__init__(**data)
 
     def relationship_pointer(self, string: str, indent: int = 0):
-        left = "-" * indent
-        return f"{left}>{string}\n"
+        return _relationship_pointer(string, indent)
 
     def display_relationship(self):
-        initial_index = self.initial_index
-        result_str = self.relationship_pointer(self.ticket_type, initial_index)
-        # BFS style display
-        for _child in self.child:
-            initial_index += 2
-            result_str += self.relationship_pointer(
-                _child.ticket_type, indent=initial_index
-            )
-            next_children = _child.child
-            if len(next_children):
-                initial_index = self.initial_index + 2
-                while next_children:
-                    next_child = next_children.pop()
-                    result_str += self.relationship_pointer(
-                        next_child.ticket_type, indent=initial_index + 2
-                    )
-                    next_children.extend(next_child.child)
-                    initial_index += 2
-        return result_str
+        return _display_relationship(self)
 
     def __repr__(self):
         return self.display_relationship()
+
+
+class TicketNode:
+    """
+    Runtime counterpart of TicketTree used on the ingestion and traversal paths.
+
+    Plain slotted attributes without validation, TicketTree stays the model at
+    the YAML/config boundary. Convert with ticket_tree_to_node and
+    node_to_ticket_tree.
+    """
+
+    __slots__ = ("parent", "ticket_type", "child", "action", "initial_index")
+
+    def __init__(
+        self,
+        ticket_type: str,
+        parent: Union["TicketNode", None] = None,
+        action: ActionType = ActionType.DESCRIPTION,
+        initial_index: int = 0,
+    ):
+        self.parent = parent
+        self.ticket_type = ticket_type
+        self.child: List["TicketNode"] = []
+        self.action = action
+        self.initial_index = initial_index
+
+    def relationship_pointer(self, string: str, indent: int = 0):
+        return _relationship_pointer(string, indent)
+
+    def display_relationship(self):
+        return _display_relationship(self)
+
+    def __repr__(self):
+        return self.display_relationship()
+
+
+def ticket_tree_to_node(ticket_tree: TicketTree) -> TicketNode:
+    root = TicketNode(
+        ticket_tree.ticket_type,
+        action=ticket_tree.action,
+        initial_index=ticket_tree.initial_index,
+    )
+    stack = [(ticket_tree, root)]
+    while stack:
+        model, node = stack.pop()
+        for model_child in model.child:
+            node_child = TicketNode(
+                model_child.ticket_type,
+                parent=node,
+                action=model_child.action,
+                initial_index=model_child.initial_index,
+            )
+            node.child.append(node_child)
+            stack.append((model_child, node_child))
+    return root
+
+
+def node_to_ticket_tree(node: TicketNode) -> TicketTree:
+    root = TicketTree(
+        ticket_type=node.ticket_type,
+        action=node.action,
+        initial_index=node.initial_index,
+    )
+    stack = [(node, root)]
+    while stack:
+        runtime_node, model = stack.pop()
+        for node_child in runtime_node.child:
+            model_child = TicketTree(
+                ticket_type=node_child.ticket_type,
+                parent=model,
+                action=node_child.action,
+                initial_index=node_child.initial_index,
+            )
+            model.child.append(model_child)
+            stack.append((node_child, model_child))
+    return root
+
+
+# Either representation of a ticket tree, for helpers that only read it
+AnyTicketTree = Union[TicketTree, TicketNode]
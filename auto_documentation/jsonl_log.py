@@ -0,0 +1,58 @@
+from pathlib import Path
+from typing import Any, Dict, List, Union
+import jsonlines
+
+
+class JsonlLog:
+    """
+    Append-only JSONL log of records keyed by their ``key`` field.
+
+    Appended records are written on ``flush``, the last record for a key wins
+    on load and the file is compacted once stale records outnumber live ones.
+    Owners may drop keys from ``entries`` to have them compacted away. The log
+    takes no lock, its owner serialises access.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._pending: List[Dict[str, Any]] = []
+        self._records_on_disk = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with jsonlines.open(self.path) as reader:
+            for record in reader:
+                self.entries[record["key"]] = record
+                self._records_on_disk += 1
+
+    def append(self, record: Dict[str, Any]) -> None:
+        self.entries[record["key"]] = record
+        self._pending.append(record)
+
+    def flush(self) -> None:
+        """Append pending records, compacting when the log has grown stale."""
+        appended, self._pending = self._pending, []
+        if 2 * len(self.entries) < self._records_on_disk + len(appended):
+            self._compact()
+            return
+        # Records dropped or replaced since they were appended are not written
+        pending = [
+            record for record in appended if self.entries.get(record["key"]) is record
+        ]
+        if not pending:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with jsonlines.open(self.path, mode="a") as writer:
+            writer.write_all(pending)
+        self._records_on_disk += len(pending)
+
+    def _compact(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with jsonlines.open(tmp_path, mode="w") as writer:
+            writer.write_all(self.entries.values())
+        tmp_path.replace(self.path)
+        self._records_on_disk = len(self.entries)
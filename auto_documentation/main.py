@@ -1,5 +1,5 @@
 import logging
-from typing import Union
+from typing import List, Union
 from auto_documentation.custom_exceptions import InvalidTicketStructureError
 from auto_documentation.custom_types import FileType
 from auto_documentation.ticket_ingestion.jira_main import IngestJira
@@ -9,9 +9,13 @@ from auto_documentation.utils import (
     find_testable_ticket,
 )
 from dynaconf import Dynaconf
-from auto_documentation.test_runner.test_runner import TestRunner
-from auto_documentation.markdown_converter.markdown import parse as md_parse
+from auto_documentation.test_runner.test_runner import (
+    TestRunnerBase,
+    TestRunnerFactory,
+)
+from auto_documentation.markdown_converter.markdown import parse_fragments
 from auto_documentation.markdown_converter.html_validator import HTMLProcessor
+from auto_documentation.markdown_converter.render_cache import RenderCache
 
 logger = logging.getLogger(__name__)
 
@@ -28,15 +32,52 @@ settings = Dynaconf(
 )
 
 
+def find_testable_keys(ticket_src_cls: GenericIngester) -> List[str]:
+    return [
+        key
+        for node in find_testable_ticket(ticket_src_cls.ticket_tree)
+        for key in ticket_src_cls.types_to_keys.get(node.ticket_type, [])
+    ]
+
+
 def generate_html_for_docs(
-    ticket_src_cls: GenericIngester, test_runner: TestRunner
+    ticket_src_cls: GenericIngester,
+    test_runner: Union[TestRunnerBase, None],
+    state_path: FileType = None,
 ) -> HTMLProcessor:
-    ticket_src_cls.build_formatted_tree()
-    testable_keys = find_testable_ticket(ticket_src_cls)
-    test_runner.run_tests(testable_keys)
-    md = ticket_src_cls.get_ticket_tree_as_markdown()
-    as_html_tree = md_parse(md)
-    valid_html = HTMLProcessor(as_html_tree)
+    if state_path is not None:
+        ticket_src_cls.build_formatted_tree_incremental(state_path)
+    else:
+        ticket_src_cls.build_formatted_tree()
+    if test_runner is not None:
+        testable_keys = find_testable_keys(ticket_src_cls)
+        fingerprints = None
+        if ticket_src_cls.jira_config.get("test_select_changed", False):
+            fingerprints = {
+                key: ticket_src_cls.ticket_fingerprint(key) for key in testable_keys
+            }
+        test_results = test_runner.run_tests(testable_keys, fingerprints)
+        failed = [
+            result.test_name for result in test_results if result.status == "FAIL"
+        ]
+        logger.info(
+            "Ran %s tests (%s files reused from the last green run), failed: %s",
+            len(test_results),
+            len(getattr(test_runner, "reused_files", [])),
+            failed,
+        )
+    # Every ticket is converted on its own whatever the settings, so workers
+    # and the cache only change how fast the document is built, never its HTML
+    markdown_workers = ticket_src_cls.jira_config.get("markdown_workers", 1)
+    render_cache = RenderCache.from_config(ticket_src_cls.jira_config)
+    events = parse_fragments(
+        ticket_src_cls.iter_ticket_tree_markdown(), markdown_workers, render_cache
+    )
+    valid_html = HTMLProcessor.from_events(events)
+    if state_path is not None:
+        ticket_src_cls.save_state(state_path)
+    if render_cache is not None:
+        logger.info("Render cache: %s", render_cache.stats)
     return valid_html
 
 
@@ -44,6 +85,7 @@ def build_tree(
     ticket_tree_src: FileType,
     parent_ticket_id: str,
     test_folder: Union[str, None],
+    state_path: FileType = None,
 ):
     if ticket_tree_src is not None:
         try:
@@ -60,5 +102,8 @@ def build_tree(
         ticket_tree=loaded_ticket_tree,
         parent_ticket_id=parent_ticket_id,
     )
+    test_runner = None
+    if test_folder is not None:
+        test_runner = TestRunnerFactory(test_folder, settings)
 
-    generate_html_for_docs(ticket_src_cls, test_folder)
+    generate_html_for_docs(ticket_src_cls, test_runner, state_path)
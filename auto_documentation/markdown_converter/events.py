@@ -0,0 +1,16 @@
+from typing import Iterable, Tuple
+
+# Structural events emitted by the markdown parser: (kind, tag name or text)
+OPEN = "open"
+CLOSE = "close"
+TEXT = "text"
+Event = Tuple[str, str]
+
+
+def serialize_events(events: Iterable[Event]) -> str:
+    return "".join(
+        [
+            value if kind == TEXT else f"<{value}>" if kind == OPEN else f"</{value}>"
+            for kind, value in events
+        ]
+    )
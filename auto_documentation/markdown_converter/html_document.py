@@ -0,0 +1,315 @@
+from array import array
+from hashlib import sha256
+from typing import Iterable, Iterator, List, Tuple, Union
+import io
+from auto_documentation.markdown_converter.events import CLOSE, OPEN, TEXT, Event
+from auto_documentation.markdown_converter.html_validator import (
+    HtmlNode,
+    SupportedTags,
+    write_html,
+)
+
+# Small int ids for the tag array, index 0 is the body root
+TAG_IDS = [SupportedTags.BODY] + [
+    tag for tag in SupportedTags if tag is not SupportedTags.BODY
+]
+TAG_TO_ID = {tag: tag_id for tag_id, tag in enumerate(TAG_IDS)}
+# Opening tags as HtmlNode.tag spells them, hashed by structural_hash
+TAG_HTML = [f"<{tag.value}>" for tag in TAG_IDS]
+NO_NODE = -1
+
+
+class HtmlDocument:
+    """
+    HTML tree stored in parallel arrays instead of one object per element.
+
+    Node 0 is the ``<body>`` root and nodes are numbered in document order,
+    so the subtree of a node is a contiguous range of indices. Every node
+    keeps a tag id, its parent, first child and next sibling, and the
+    offsets of its leading text and content in one shared text buffer.
+    ``node()`` and ``root`` hand out read-only HtmlNodeView objects for code
+    that expects an HtmlNode.
+
+    Content is sliced out of the buffer when it is read, so reading every
+    node's content costs more than on an HtmlNode tree, which already holds
+    the strings. That is the price of the smaller document. Walks over
+    content should use ``iter_contents`` rather than views.
+    """
+
+    def __init__(self) -> None:
+        self.tags = array("B", [TAG_TO_ID[SupportedTags.BODY]])
+        self.parents = array("i", [NO_NODE])
+        self.first_children = array("i", [NO_NODE])
+        self.next_siblings = array("i", [NO_NODE])
+        # NO_NODE start means the node was never given content, like None
+        self.content_starts = array("q", [NO_NODE])
+        self.content_ends = array("q", [NO_NODE])
+        # Text before the node's opening tag, empty spans when there is none
+        self.leading_starts = array("q", [0])
+        self.leading_ends = array("q", [0])
+        self.text = ""
+        # Filled on the first structural_hash call, once the document is built
+        self._hashes: List[Union[bytes, None]] = []
+
+    @classmethod
+    def from_events(cls, events: Iterable[Event]) -> "HtmlDocument":
+        """Build a document from parser events, raising on unbalanced tags."""
+        document = cls()
+        tags, parents = document.tags, document.parents
+        first_children, next_siblings = document.first_children, document.next_siblings
+        content_starts, content_ends = document.content_starts, document.content_ends
+        leading_starts, leading_ends = document.leading_starts, document.leading_ends
+
+        chunks: List[str] = []
+        text_length = 0
+        pending_start = 0
+        # Open nodes and the last child added to each of them
+        stack: List[int] = [0]
+        last_children: List[int] = [NO_NODE]
+        for kind, value in events:
+            if kind == TEXT:
+                chunks.append(value)
+                text_length += len(value)
+                continue
+            tag_id = TAG_TO_ID[SupportedTags(value)]
+            if kind == OPEN:
+                index = len(tags)
+                parent = stack[-1]
+                tags.append(tag_id)
+                parents.append(parent)
+                first_children.append(NO_NODE)
+                next_siblings.append(NO_NODE)
+                content_starts.append(NO_NODE)
+                content_ends.append(NO_NODE)
+                leading_starts.append(pending_start)
+                leading_ends.append(text_length)
+                if last_children[-1] == NO_NODE:
+                    first_children[parent] = index
+                else:
+                    next_siblings[last_children[-1]] = index
+                last_children[-1] = index
+                stack.append(index)
+                last_children.append(NO_NODE)
+            else:
+                if len(stack) == 1 or tags[stack[-1]] != tag_id:
+                    raise ValueError(f"Unbalanced closing tag: </{value}>")
+                index = stack.pop()
+                last_children.pop()
+                content_starts[index] = pending_start
+                content_ends[index] = text_length
+            pending_start = text_length
+
+        if len(stack) != 1:
+            raise ValueError(f"Unclosed tag: <{TAG_IDS[tags[stack[-1]]].value}>")
+        document.text = "".join(chunks)
+        return document
+
+    @classmethod
+    def from_node(cls, node: HtmlNode) -> "HtmlDocument":
+        """Pack an existing HtmlNode tree, a ``<body>`` root becomes node 0."""
+        return cls.from_events(iter_node_events(node))
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (
+            self.tags,
+            self.parents,
+            self.first_children,
+            self.next_siblings,
+            self.content_starts,
+            self.content_ends,
+            self.leading_starts,
+            self.leading_ends,
+        )
+        return sum(len(values) * values.itemsize for values in arrays) + len(self.text)
+
+    @property
+    def root(self) -> "HtmlNodeView":
+        return HtmlNodeView(self, 0)
+
+    def node(self, index: int) -> "HtmlNodeView":
+        return HtmlNodeView(self, index)
+
+    def tag_of(self, index: int) -> SupportedTags:
+        return TAG_IDS[self.tags[index]]
+
+    def content_of(self, index: int) -> Union[str, None]:
+        start = self.content_starts[index]
+        if start == NO_NODE:
+            return None
+        return self.text[start : self.content_ends[index]]
+
+    def leading_text_of(self, index: int) -> str:
+        return self.text[self.leading_starts[index] : self.leading_ends[index]]
+
+    def children_of(self, index: int) -> Iterator[int]:
+        child = self.first_children[index]
+        while child != NO_NODE:
+            yield child
+            child = self.next_siblings[child]
+
+    def subtree_end(self, index: int) -> int:
+        """One past the last descendant of ``index``."""
+        while index != NO_NODE:
+            if self.next_siblings[index] != NO_NODE:
+                return self.next_siblings[index]
+            index = self.parents[index]
+        return len(self.tags)
+
+    def iter_subtree(self, index: int = 0) -> range:
+        """Indices of ``index`` and its descendants in document order."""
+        return range(index, self.subtree_end(index))
+
+    def iter_contents(self, index: int = 0) -> Iterator[Tuple[int, str]]:
+        """(index, content) of every node in the subtree that has content."""
+        stop = self.subtree_end(index)
+        text = self.text
+        for node, start, end in zip(
+            range(index, stop),
+            self.content_starts[index:stop],
+            self.content_ends[index:stop],
+        ):
+            if start != NO_NODE:
+                yield node, text[start:end]
+
+    def structural_hash(self, index: int = 0) -> bytes:
+        """
+        HtmlNode.structural_hash of the subtree at ``index``, cached per node.
+
+        Descendants come after their node, so hashing the subtree range
+        backwards always finds the children's hashes ready.
+        """
+        hashes = self._hashes
+        if len(hashes) != len(self.tags):
+            hashes[:] = [None] * len(self.tags)
+        if hashes[index] is not None:
+            return hashes[index]
+        tags, text = self.tags, self.text
+        content_starts, content_ends = self.content_starts, self.content_ends
+        leading_starts, leading_ends = self.leading_starts, self.leading_ends
+        first_children, next_siblings = self.first_children, self.next_siblings
+        for node in reversed(self.iter_subtree(index)):
+            if hashes[node] is not None:
+                continue
+            start = content_starts[node]
+            content = "" if start == NO_NODE else text[start : content_ends[node]]
+            leading_text = text[leading_starts[node] : leading_ends[node]]
+            digest = sha256(
+                f"{TAG_HTML[tags[node]]}\0{leading_text}\0{content}\0".encode()
+            )
+            child = first_children[node]
+            while child != NO_NODE:
+                digest.update(hashes[child])
+                child = next_siblings[child]
+            hashes[node] = digest.digest()
+        return hashes[index]
+
+    def find_all(self, tag: SupportedTags) -> List[int]:
+        """Indices of every node with ``tag``, scanning the raw tag bytes."""
+        tag_bytes = self.tags.tobytes()
+        tag_id = TAG_TO_ID[tag]
+        found: List[int] = []
+        position = tag_bytes.find(tag_id)
+        while position != -1:
+            found.append(position)
+            position = tag_bytes.find(tag_id, position + 1)
+        return found
+
+
+class HtmlNodeView:
+    """
+    Read-only HtmlNode lookalike for one node of an HtmlDocument.
+
+    It hashes like the HtmlNode it stands for, so compare_nodes_equal and
+    diff_nodes accept views, trees or a mix of both.
+    """
+
+    __slots__ = ("document", "index")
+
+    closed = True
+
+    def __init__(self, document: HtmlDocument, index: int) -> None:
+        self.document = document
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"tag={self.tag}, index={self.index}, children={len(self.children)}"
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, HtmlNodeView)
+            and self.document is other.document
+            and self.index == other.index
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self.document), self.index))
+
+    @property
+    def enum_value(self) -> SupportedTags:
+        return self.document.tag_of(self.index)
+
+    @property
+    def text(self) -> str:
+        return self.enum_value.value
+
+    @property
+    def tag(self) -> str:
+        return f"<{self.enum_value.value}>"
+
+    @property
+    def content(self) -> Union[str, None]:
+        return self.document.content_of(self.index)
+
+    @property
+    def leading_text(self) -> str:
+        return self.document.leading_text_of(self.index)
+
+    @property
+    def parent(self) -> Union["HtmlNodeView", None]:
+        parent = self.document.parents[self.index]
+        return None if parent == NO_NODE else HtmlNodeView(self.document, parent)
+
+    @property
+    def children(self) -> List["HtmlNodeView"]:
+        document = self.document
+        return [
+            HtmlNodeView(document, child) for child in document.children_of(self.index)
+        ]
+
+    def structural_hash(self) -> bytes:
+        return self.document.structural_hash(self.index)
+
+    def iter_contents(self) -> Iterator[Tuple[int, str]]:
+        return self.document.iter_contents(self.index)
+
+    def serialize(self, pretty: bool = False, indent: int = 4) -> str:
+        sink = io.StringIO()
+        write_html(self, sink, pretty=pretty, indent=indent)
+        return sink.getvalue()
+
+    def display_string(self, indent: int = 4) -> str:
+        return self.serialize(pretty=True, indent=indent)
+
+
+def iter_node_events(node: HtmlNode) -> Iterator[Event]:
+    """Replay an HtmlNode tree as parser events, every text where it was parsed."""
+    stack: List[Tuple[HtmlNode, bool]] = [(node, False)]
+    if node.enum_value is SupportedTags.BODY:
+        stack = [(child, False) for child in reversed(node.children)]
+    while stack:
+        current, closing = stack.pop()
+        if closing:
+            if current.content:
+                yield TEXT, current.content
+            yield CLOSE, current.enum_value.value
+            continue
+        # The leading text of the node replayed itself lies outside of it
+        if current.leading_text and current is not node:
+            yield TEXT, current.leading_text
+        yield OPEN, current.enum_value.value
+        stack.append((current, True))
+        stack.extend((child, False) for child in reversed(current.children))
@@ -1,9 +1,13 @@
 from collections import deque
-from typing import List, Deque, cast, Optional, Union
+from typing import Iterable, Iterator, List, Deque, Optional, TextIO, Tuple, Union
 from pathlib import Path
+from dataclasses import dataclass
+from difflib import SequenceMatcher
 from enum import Enum
+from hashlib import sha256
+import io
 import re
-from collections import deque
+from auto_documentation.markdown_converter.events import CLOSE, OPEN, TEXT, Event
 
 
 class SupportedTags(Enum):
@@ -33,18 +37,48 @@ class SupportedTags(Enum):
 
 
 MEMBER_SET = {v.value for v in SupportedTags._value2member_map_.values()}
+# Kinds of NodeChange reported by diff_nodes
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+REPLACED = "replaced"
+# Number of serialized pieces buffered before each sink.write
+WRITE_BATCH = 4096
+NON_TAG_CHARS = re.compile("[^a-z0-9]+")
+# Exact spellings of every supported open/close tag, anything else is normalised
+TAG_LOOKUP = {
+    **{f"<{tag.value}>": tag for tag in SupportedTags},
+    **{f"</{tag.value}>": tag for tag in SupportedTags},
+}
+
+
+def lookup_tag(tag: str) -> Union[SupportedTags, None]:
+    """Map a raw tag to its SupportedTags member, caching unusual spellings."""
+    enum_value = TAG_LOOKUP.get(tag)
+    if enum_value is None:
+        stripped = NON_TAG_CHARS.sub("", tag)
+        if stripped not in MEMBER_SET:
+            return None
+        enum_value = TAG_LOOKUP[tag] = SupportedTags(stripped)
+    return enum_value
 
 
 class HtmlNode:
-    def __init__(self, tag: str) -> None:
+    def __init__(self, tag: str, enum_value: Union[SupportedTags, None] = None) -> None:
         self.tag = tag
-        self.text = re.sub("[^a-z0-9]+", "", tag)
-        # This will throw an error if the raw text is not a member of supported tags
-        self.enum_value = SupportedTags(self.text)
+        if enum_value is None:
+            # This will throw an error if the raw text is not a member of supported tags
+            enum_value = SupportedTags(NON_TAG_CHARS.sub("", tag))
+        self.enum_value = enum_value
+        self.text = enum_value.value
+        # Text right before the closing tag, after the last child
         self.content: Union[str, None] = None
+        # Text between the previous sibling, or the parent's opening tag, and this tag
+        self.leading_text = ""
         self.children: List[HtmlNode] = []
         self.parent: Optional[HtmlNode] = None
         self.closed = False
+        self._hash: Union[bytes, None] = None
 
     def __repr__(self) -> str:
         return f"tag={self.tag}, closed={self.closed}, parent={self.parent.tag if self.parent else 'Root'} , Children={self.children}"
@@ -65,131 +99,331 @@ class HtmlNode:
     def compare_root(self, other: "HTMLProcessor") -> bool:
         return id(self) == id(other.root)
 
+    def structural_hash(self) -> bytes:
+        """
+        Merkle hash of tag, text and children, cached on every node.
+
+        Computed bottom-up without recursion. Call invalidate_hash after
+        editing a node in place so it and its ancestors are rehashed.
+        """
+        if self._hash is not None:
+            return self._hash
+        # Pre-order visits parents before children, so hashing the nodes in
+        # reverse order always finds the children's hashes ready
+        order: List[HtmlNode] = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(child for child in node.children if child._hash is None)
+        for node in reversed(order):
+            digest = sha256(
+                f"{node.tag}\0{node.leading_text}\0{node.content or ''}\0".encode()
+            )
+            for child in node.children:
+                digest.update(child._hash)
+            node._hash = digest.digest()
+        return self._hash
+
+    def invalidate_hash(self) -> None:
+        # A node only has a hash when all of its descendants do, so stop at
+        # the first ancestor that was never hashed
+        node = self
+        while node is not None and node._hash is not None:
+            node._hash = None
+            node = node.parent
+
+    def write(self, sink: TextIO, pretty: bool = False, indent: int = 4) -> None:
+        write_html(self, sink, pretty=pretty, indent=indent)
+
+    def serialize(self, pretty: bool = False, indent: int = 4) -> str:
+        sink = io.StringIO()
+        write_html(self, sink, pretty=pretty, indent=indent)
+        return sink.getvalue()
+
     def display_string(self, indent: int = 4) -> str:
-        result = f"{indent * ' '}{self.tag}\n"
-        if self.content:
-            result += indent * " " + self.content + "\n"
-
-        for child in self.children:
-            result += indent * " " + child.tag + "\n"
-            if child.content:
-                result += indent * " " + child.content + "\n"
-            # Add content here if applicable
-            for next_child in child.children:
-                result += next_child.display_string(indent + 4)
-            result += indent * " " + f"{child.tag.replace('<', '</')}\n"
-        result += f"{indent * ' '}{self.tag.replace('<', '</')}\n"
-        return result
-
-    def write_to_file(self, file_path: Path):
+        return self.serialize(pretty=True, indent=indent)
+
+    def write_to_file(self, file_path: Path, pretty: bool = True):
         if file_path.suffix != ".html":
             raise ValueError("File path must be a valid HTML file")
 
         with open(file_path, "w") as f:
-            f.write(self.display_string())
+            write_html(self, f, pretty=pretty)
+
+
+def write_html(
+    node: HtmlNode, sink: TextIO, pretty: bool = False, indent: int = 4
+) -> None:
+    """
+    Serialize ``node`` into ``sink`` without recursion.
+
+    Compact mode writes every text where the parser found it, each child's
+    leading text before its tag and the content before the closing tag, so
+    parsing the output gives the same tree back. Pretty mode keeps the
+    display_string layout: one tag or text per line, content right after
+    the opening tag, and the indent growing every second level.
+    """
+    # Pieces are batched so the sink sees a few large writes
+    parts: List[str] = []
+    write = parts.append
+    # Closing text is pushed as a plain string so it is written after the children
+    stack: List[Union[Tuple[HtmlNode, int], str]] = [(node, 0)]
+    pop, push, extend = stack.pop, stack.append, stack.extend
+    while stack:
+        item = pop()
+        if item.__class__ is str:
+            write(item)
+            continue
+        if len(parts) >= WRITE_BATCH:
+            sink.write("".join(parts))
+            parts.clear()
+        current, depth = item
+        close_tag = current.tag.replace("<", "</")
+        # The leading text sits in the parent, outside of the node written
+        leading_text = current.leading_text if depth else ""
+        if pretty:
+            if leading_text:
+                write(f"{' ' * (indent + 4 * ((depth - 1) // 2))}{leading_text}\n")
+            padding = " " * (indent + 4 * (depth // 2))
+            if current.content:
+                write(f"{padding}{current.tag}\n{padding}{current.content}\n")
+            else:
+                write(f"{padding}{current.tag}\n")
+            push(f"{padding}{close_tag}\n")
+        else:
+            write(f"{leading_text}{current.tag}" if leading_text else current.tag)
+            push(f"{current.content}{close_tag}" if current.content else close_tag)
+        if current.children:
+            depth += 1
+            extend([(child, depth) for child in reversed(current.children)])
+    sink.write("".join(parts))
 
 
 class HTMLProcessor:
-    def __init__(self, html: str):
+    def __init__(self, html: Union[str, None], events: Iterable[Event] = ()):
         self.html = html
-        self.member_set = set(
-            [value.value for value in SupportedTags._member_map_.values()]
-        )
-        self.in_tag = False
-        self.current_tag = ""
-        self.current_content = ""
         self.stack: Deque[HtmlNode] = deque()
         self.root: Optional[HtmlNode] = None
         self.node_tracker: Optional[HtmlNode] = None
-        self.valid = self.validate()
-
-    def process_tag(self, char: str) -> bool:
-        self.in_tag = False
-        self.current_tag += char
-        stripped_tag = re.sub("[^a-z0-9]+", "", self.current_tag)
-        if stripped_tag not in self.member_set:
+        if html is None:
+            self.valid = self.validate_events(events)
+        else:
+            self.valid = self.validate()
+
+    @classmethod
+    def from_events(cls, events: Iterable[Event]) -> "HTMLProcessor":
+        """Build the tree straight from parser events, no HTML string involved."""
+        return cls(None, events)
+
+    def process_tag(self, tag: str, content: str) -> bool:
+        """Apply one tag to the tree, ``content`` is the text right before it."""
+        enum_value = lookup_tag(tag)
+        if enum_value is None:
             raise ValueError(
-                f"Invalid tag: {self.current_tag} stripped_to: {stripped_tag}"
+                f"Invalid tag: {tag} stripped_to: {NON_TAG_CHARS.sub('', tag)}"
             )
-        elif self.current_tag.startswith("</"):
-            if not self.stack:
-                return False
-
-            last = cast(HtmlNode, self.stack.pop())
-            last.content = self.current_content
-            current_node = HtmlNode(self.current_tag)
+        elif tag.startswith("</"):
+            return self.close_node(enum_value, content)
+        self.open_node(tag, enum_value, content)
+        return True
 
-            if not last.compare_close(current_node):
-                return False
+    def open_node(
+        self, tag: str, enum_value: SupportedTags, leading_text: str = ""
+    ) -> None:
+        current_node = HtmlNode(tag, enum_value)
+        current_node.leading_text = leading_text
+        if self.root is None:
+            self.root = HtmlNode("<body>", SupportedTags.BODY)
+            self.root.children.append(current_node)
+            self.node_tracker = current_node
+            self.node_tracker.parent = self.root
+        else:
+            self.node_tracker.children.append(current_node)
+            self.node_tracker.invalidate_hash()
+            current_node.parent = self.node_tracker
+            self.node_tracker = current_node
+
+        self.stack.append(current_node)
+        self.root.closed = True
 
-            last.closed = True
-            if last.parent is not None:
-                self.node_tracker = last.parent
-            else:
-                self.node_tracker = last
-
-        elif self.current_tag.startswith("<"):
-            current_node = HtmlNode(self.current_tag)
-            if self.root is None:
-                self.root = HtmlNode("<body>")
-                self.root.children.append(current_node)
-                self.node_tracker = current_node
-                self.node_tracker.parent = self.root
-            else:
-                self.node_tracker.children.append(current_node)
-                current_node.parent = self.node_tracker
-                self.node_tracker = current_node
+    def close_node(self, enum_value: SupportedTags, content: str) -> bool:
+        if not self.stack:
+            return False
 
-            self.stack.append(current_node)
+        last = self.stack.pop()
+        last.content = content
+        last.invalidate_hash()
+        if last.enum_value is not enum_value:
+            return False
 
-        self.root.closed = True
-        self.current_tag = ""
+        last.closed = True
+        if last.parent is not None:
+            self.node_tracker = last.parent
+        else:
+            self.node_tracker = last
         return True
 
     def get_tags(self) -> bool:
-        for char in self.html:
-            if char == "<":
-                self.in_tag = True
-                self.current_tag += char
-            elif char == ">":
-                matched = self.process_tag(char)
-                if not matched:
-                    return False
-                self.current_content = ""
-            elif self.in_tag:
-                self.current_tag += char
-            elif not self.in_tag:
-                self.current_content += char
+        # Jump between delimiters with str.find and slice tags and text out
+        # instead of growing buffers one character at a time
+        html = self.html
+        position = 0
+        while True:
+            tag_start = html.find("<", position)
+            content = html[position:] if tag_start == -1 else html[position:tag_start]
+            if ">" in content:
+                stray = content.index(">")
+                raise ValueError(f"Invalid tag: > at position {position + stray}")
+            if tag_start == -1:
+                break
+            tag_end = html.find(">", tag_start)
+            if tag_end == -1:
+                break
+            if not self.process_tag(html[tag_start : tag_end + 1], content):
+                return False
+            position = tag_end + 1
         return len(self.stack) == 0
 
     def validate(self) -> bool:
         all_tags_stack_empty = self.get_tags()
+        if self.root is None:
+            return False
         validate_further = check_valid(self.root)
         return all_tags_stack_empty and validate_further
 
+    def validate_events(self, events: Iterable[Event]) -> bool:
+        content: List[str] = []
+        for kind, value in events:
+            if kind == TEXT:
+                content.append(value)
+                continue
+            # Unsupported tags raise just like they do in the string tokenizer
+            enum_value = SupportedTags(value)
+            if kind == OPEN:
+                self.open_node(f"<{value}>", enum_value, "".join(content))
+            elif not self.close_node(enum_value, "".join(content)):
+                return False
+            content = []
+        if self.root is None:
+            return False
+        return len(self.stack) == 0 and check_valid(self.root)
+
     def __repr__(self):
         return self.root.display_string()
 
 
-def compare_nodes_equal(left: HtmlNode, right: HtmlNode) -> bool:
-    if left.tag != right.tag:
-        return False
-
-    if left.children and not right.children:
-        return False
-
-    if right.children and not left.children:
-        return False
-
-    if len(right.children) != len(left.children):
-        return False
+def iter_html_events(html: str) -> Iterator[Event]:
+    """Tokenize an HTML string into parser events, raising like HTMLProcessor."""
+    position = 0
+    while True:
+        tag_start = html.find("<", position)
+        content = html[position:] if tag_start == -1 else html[position:tag_start]
+        if ">" in content:
+            stray = content.index(">")
+            raise ValueError(f"Invalid tag: > at position {position + stray}")
+        if content:
+            yield TEXT, content
+        if tag_start == -1:
+            return
+        tag_end = html.find(">", tag_start)
+        if tag_end == -1:
+            return
+        tag = html[tag_start : tag_end + 1]
+        enum_value = lookup_tag(tag)
+        if enum_value is None:
+            raise ValueError(
+                f"Invalid tag: {tag} stripped_to: {NON_TAG_CHARS.sub('', tag)}"
+            )
+        yield CLOSE if tag.startswith("</") else OPEN, enum_value.value
+        position = tag_end + 1
 
-    for left_child, right_child in zip(left.children, right.children):
-        if not compare_nodes_equal(left_child, right_child):
-            return False
 
-    # Could most likely just return True -> but this ensures matching
-    return left.tag == right.tag
+def compare_nodes_equal(left: HtmlNode, right: HtmlNode) -> bool:
+    return left is right or left.structural_hash() == right.structural_hash()
+
+
+@dataclass
+class NodeChange:
+    """One changed subtree, ``path`` is the child indices leading to it."""
+
+    kind: str
+    path: Tuple[int, ...]
+    old: Union[HtmlNode, None] = None
+    new: Union[HtmlNode, None] = None
+
+
+def diff_nodes(old: HtmlNode, new: HtmlNode) -> List[NodeChange]:
+    """
+    Report the subtrees that differ between two builds of a document.
+
+    Subtrees with equal hashes are skipped without being walked. Children
+    are aligned on their hashes, so an inserted or removed section shows up
+    as a single change instead of shifting every sibling after it. Paths of
+    removed subtrees index into the old tree, all others into the new one.
+    """
+    changes: List[NodeChange] = []
+    stack: List[Tuple[HtmlNode, HtmlNode, Tuple[int, ...]]] = [(old, new, ())]
+    while stack:
+        old_node, new_node, path = stack.pop()
+        if compare_nodes_equal(old_node, new_node):
+            continue
+        if old_node.tag != new_node.tag:
+            changes.append(NodeChange(REPLACED, path, old_node, new_node))
+            continue
+        if (
+            old_node.content != new_node.content
+            or old_node.leading_text != new_node.leading_text
+        ):
+            changes.append(NodeChange(CHANGED, path, old_node, new_node))
+
+        old_children, new_children = old_node.children, new_node.children
+        old_hashes = [child.structural_hash() for child in old_children]
+        new_hashes = [child.structural_hash() for child in new_children]
+        # Only align the middle that differs, repeated siblings such as
+        # identical tables make SequenceMatcher slow on long child lists
+        start, old_stop, new_stop = 0, len(old_hashes), len(new_hashes)
+        while (
+            start < min(old_stop, new_stop) and old_hashes[start] == new_hashes[start]
+        ):
+            start += 1
+        while (
+            old_stop > start
+            and new_stop > start
+            and old_hashes[old_stop - 1] == new_hashes[new_stop - 1]
+        ):
+            old_stop -= 1
+            new_stop -= 1
+        matcher = SequenceMatcher(
+            None,
+            old_hashes[start:old_stop],
+            new_hashes[start:new_stop],
+            autojunk=False,
+        )
+        pairs = []
+        for opcode, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+            if opcode == "equal":
+                continue
+            old_start, old_end = old_start + start, old_end + start
+            new_start, new_end = new_start + start, new_end + start
+            paired = min(old_end - old_start, new_end - new_start)
+            if opcode == "replace":
+                pairs.extend(
+                    (old_start + offset, new_start + offset) for offset in range(paired)
+                )
+            changes.extend(
+                NodeChange(REMOVED, path + (index,), old=old_children[index])
+                for index in range(old_start + paired, old_end)
+            )
+            changes.extend(
+                NodeChange(ADDED, path + (index,), new=new_children[index])
+                for index in range(new_start + paired, new_end)
+            )
+        stack.extend(
+            (old_children[old_index], new_children[new_index], path + (new_index,))
+            for old_index, new_index in reversed(pairs)
+        )
+    return changes
 
 
 def check_valid(html_node: HtmlNode) -> bool:
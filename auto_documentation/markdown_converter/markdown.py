@@ -1,7 +1,27 @@
-from typing import Dict, List, Generator, Union
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Generator,
+    Set,
+    Tuple,
+    Union,
+)
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from collections import deque
 import re
 from dataclasses import dataclass, field
+from auto_documentation.markdown_converter.events import (
+    CLOSE,
+    OPEN,
+    TEXT,
+    Event,
+    serialize_events,
+)
+from auto_documentation.markdown_converter.render_cache import RenderCache
 
 
 @dataclass
@@ -9,18 +29,25 @@ class MarkdownState:
     in_list: bool = False
     in_header: str = ""
     chars: List[str] = field(default_factory=list)
-    open_tags: List[str] = field(default_factory=list)
-    all_tokens: List[str] = field(default_factory=list)
-    all_text: List[str] = field(default_factory=list)
+    open_tags: Set[str] = field(default_factory=set)
+    all_tokens: List[Event] = field(default_factory=list)
+    all_text: List[Union[List[Event], None]] = field(default_factory=list)
     last_token: Union[str, None] = None
-    all_tags = deque()
+    all_tags: deque = field(default_factory=deque)
     in_table: bool = False
     last_header: bool = False
-
-    def process_line(self, text: str) -> None:
+    # Entries of all_text before this index belong to blocks that have closed
+    closed_text: int = 0
+    # Whether the last token of the line closed a tag
+    after_close: bool = False
+    # Build HTML strings instead of events, for MarkDownParser.parse
+    html: bool = False
+
+    def process_line(self, text: Union[List[Event], None]) -> None:
         self.last_token = ""
         self.chars = []
         self.all_tokens = []
+        self.after_close = False
         self.in_header = ""
         self.all_text.append(text)
 
@@ -65,6 +92,27 @@ class HTMLTag:
         "td": 0,
         "th": 0,
     }
+    MAX_TAG_LENGTH = max(len(tag) for tag in TAG_PRIORITY)
+
+
+@lru_cache(maxsize=1024)
+def priority_order(tags: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Stable priority order, only computed once per distinct combination of tags."""
+    return tuple(sorted(tags, key=HTMLTag.TAG_PRIORITY.get))
+
+
+@lru_cache(maxsize=None)
+def special_chars_pattern(mapped_chars: FrozenSet[str]) -> re.Pattern:
+    """Characters that can change parser state, everything between them is plain text."""
+    special = {HTMLTag.AT, HTMLTag.PIPE, ".", *mapped_chars}
+    return re.compile("[" + "".join(re.escape(char) for char in sorted(special)) + "]")
+
+
+DIGITS = re.compile(r"\d")
+BLOCK_PREFIXES = ("<table", "<tr", "<th", "<td", "<h", "<ul", "<p", "<li")
+BLOCK_TAG_PREFIXES = tuple(prefix[1:] for prefix in BLOCK_PREFIXES)
+PARAGRAPH_OPEN: Event = (OPEN, "p")
+PARAGRAPH_CLOSE: Event = (CLOSE, "p")
 
 
 class MarkDownParser:
@@ -72,6 +120,9 @@ class MarkDownParser:
         self.mapping = mapping
         self.upper_lim = upper_lim
         self.state = MarkdownState()
+        self.special_chars = special_chars_pattern(
+            frozenset(key for key in mapping if len(key) == 1)
+        )
 
     def parse_header(self, text: str):
         length = len(text)
@@ -82,7 +133,7 @@ class MarkDownParser:
 
     def __process_header(self, char: str) -> None:
         if len(self.state.all_tags):
-            tag_number = int("".join(re.findall(r"\d", self.state.all_tags[-1])))
+            tag_number = int("".join(DIGITS.findall(self.state.all_tags[-1])))
             if (tag_number + 1) < self.upper_lim + 1:
                 self.state.all_tags[-1] = f"h{tag_number + 1}"
                 self.state.in_header += "#"
@@ -144,26 +195,36 @@ class MarkDownParser:
                 self.state.all_tags.append(self.mapping.get("__"))
 
     def process_tags(self) -> None:
-        middle_string = "".join(self.state.chars)
-        if self.state.in_table:
-            middle_string = middle_string.strip()
-        elif middle_string != " ":
-            middle_string = middle_string.lstrip()
-
-        empty = len(middle_string) == 0
-        if not empty:
-            self.state.all_tokens.append(middle_string)
-
-        for token in sorted(
-            self.state.all_tags, key=lambda k: HTMLTag.TAG_PRIORITY.get(k)
-        ):
-            if token not in self.state.open_tags:
-                self.state.all_tokens.append(f"<{token}>")
-                self.state.open_tags.append(token)
+        state = self.state
+        chars = state.chars
+        all_tokens = state.all_tokens
+        html = state.html
+        if chars:
+            middle_string = chars[0] if len(chars) == 1 else "".join(chars)
+            if state.in_table:
+                middle_string = middle_string.strip()
+            elif middle_string != " " and not state.after_close:
+                # Markers such as "# " leave a space to strip, after a closing
+                # inline tag the space belongs to the text
+                middle_string = middle_string.lstrip()
+            if middle_string:
+                all_tokens.append(middle_string if html else (TEXT, middle_string))
+                state.after_close = False
+
+        pending = state.all_tags
+        if not pending:
+            return
+        tags = priority_order(tuple(pending)) if len(pending) > 1 else pending
+        open_tags = state.open_tags
+        for token in tags:
+            if token not in open_tags:
+                all_tokens.append(f"<{token}>" if html else (OPEN, token))
+                open_tags.add(token)
             else:
-                self.state.all_tokens.append(f"</{token}>")
-                self.state.open_tags.remove(token)
-        self.state.all_tags.clear()
+                all_tokens.append(f"</{token}>" if html else (CLOSE, token))
+                open_tags.discard(token)
+        state.after_close = token not in open_tags
+        pending.clear()
 
     def process_end(self) -> None:
         header_no = len(self.state.in_header)
@@ -178,24 +239,32 @@ class MarkDownParser:
     def cleanup(self) -> None:
         self.state = MarkdownState()
 
-    def parse_final_string(self) -> str:
-        string = "".join(self.state.all_tokens)
-        if (
-            string.startswith("<table")
-            or string.startswith("<tr")
-            or string.startswith("<th")
-            or string.startswith("<td")
-            or string.startswith("<h")
-            or string.startswith("<ul")
-            or string.startswith("<p")
-            or string.startswith("<li")
-            or string.startswith("<tr")
-            or string.startswith("<td")
-            or string.startswith("<th")
-        ):
+    def line_events(self) -> List[Event]:
+        events = self.state.all_tokens
+        if self.state.html:
+            return self.line_html(events)
+        # Only the first event decides whether the line is already a block
+        if events:
+            kind, value = events[0]
+            if (kind == OPEN and value.startswith(BLOCK_TAG_PREFIXES)) or (
+                kind == TEXT and value.startswith(BLOCK_PREFIXES)
+            ):
+                return events
+        # all_tokens is replaced for every line, so it can be wrapped in place
+        events.insert(0, PARAGRAPH_OPEN)
+        events.append(PARAGRAPH_CLOSE)
+        return events
+
+    @staticmethod
+    def line_html(tokens: List[str]) -> str:
+        string = "".join(tokens)
+        if string.startswith(BLOCK_PREFIXES):
             return string
         return f"<p>{string}</p>"
 
+    def parse_final_string(self) -> str:
+        return serialize_events(self.line_events())
+
     def header_in_text(self, char: str) -> bool:
         return (
             char == HTMLTag.SPACE
@@ -223,9 +292,13 @@ class MarkDownParser:
             self.state.all_tags.append(self.mapping.get("in_table"))
             self.state.all_tags.append(self.mapping.get("in_cell"))
 
+    def close_block(self, tag: str) -> None:
+        self.state.all_text.append(f"</{tag}>" if self.state.html else [(CLOSE, tag)])
+        self.state.closed_text = len(self.state.all_text)
+
     def process_table_end(self) -> None:
         self.state.in_table = False
-        self.state.all_text.append("</table>")
+        self.close_block("table")
 
     def process_in_table(self, last: bool) -> None:
         mapped = (
@@ -241,31 +314,48 @@ class MarkDownParser:
 
     def process_in_list(self, char: str) -> None:
         self.state.in_list = False
-        self.state.all_text.append("</ul>")
+        self.close_block("ul")
         self.state.chars.append(char)
 
     def list_end(self) -> None:
         self.state.in_list = False
-        self.state.all_text.append("</ul>")
+        self.close_block("ul")
 
     def match_char(self, char, start, last):
+        state = self.state
         if char == HTMLTag.AT:
             self.process_end()
         elif start and char == HTMLTag.PIPE:
             self.process_table_start()
-        elif len(self.state.chars) > 0 and char == HTMLTag.PIPE:
+        elif state.chars and char == HTMLTag.PIPE:
             self.process_in_table(last)
         elif self.list_in_text(char):
             return
         elif char in self.mapping:
             self.append_tags(char)
-        elif start and self.state.in_list:
+        elif start and state.in_list:
             self.process_in_list(char)
-        elif len(self.state.all_tags):
+        elif state.all_tags:
             self.process_tags()
-            self.state.chars = [char]
+            state.chars = [char]
         else:
-            self.state.chars.append(char)
+            state.chars.append(char)
+
+    def process_plain_text(self, text: str) -> None:
+        """Handle a run of characters that match_char would treat as plain text."""
+        state = self.state
+        if text[0] == HTMLTag.SPACE and self.list_in_text(text[0]):
+            state.last_token = text[0]
+            text = text[1:]
+            if not text:
+                return
+        # The first character flushes pending tags, the rest only extends the text
+        if state.all_tags:
+            self.process_tags()
+            state.chars = [text]
+        else:
+            state.chars.append(text)
+        state.last_token = text[-1]
 
     def process_html_tag_md(self) -> None:
         tag = HTMLTag.TAG_PRIORITY.get("".join(self.state.chars))
@@ -273,27 +363,52 @@ class MarkDownParser:
         self.state.in_header = True
         self.state.chars.clear()
 
-    def __parse_text(self, given_text: str) -> Union[str, None]:
+    def __parse_text(self, given_text: str) -> Union[List[Event], None]:
         if self.state.last_header:
             self.state.last_header = False
             return None
 
         html_tag_to_close = None
-        for index, char in enumerate(given_text):
-            start = index == 0
-            last = index == len(given_text) - 2
-            if start:
-                if char != HTMLTag.PIPE and self.state.in_table:
-                    self.process_table_end()
-                if char != HTMLTag.ASTERISK and self.state.in_list:
-                    self.list_end()
-            if char == "." and "".join(self.state.chars) in HTMLTag.TAG_PRIORITY.keys():
-                html_tag_to_close = "".join(self.state.chars)
-                self.state.all_tags.append(html_tag_to_close)
-                self.state.chars = []
+        state = self.state
+        final_index = len(given_text) - 2
+        if given_text[0] != HTMLTag.PIPE and state.in_table:
+            self.process_table_end()
+        if given_text[0] != HTMLTag.ASTERISK and state.in_list:
+            self.list_end()
+
+        position = 0
+        plain_dot = "." not in self.mapping
+        for match in self.special_chars.finditer(given_text):
+            index = match.start()
+            if position < index:
+                text = given_text[position:index]
+                if state.all_tags or text[0] == HTMLTag.SPACE:
+                    self.process_plain_text(text)
+                else:
+                    state.chars.append(text)
+                    state.last_token = text[-1]
+                position = index
+
+            char = given_text[index]
+            if char == ".":
+                if (
+                    len(state.chars) <= HTMLTag.MAX_TAG_LENGTH
+                    and "".join(state.chars) in HTMLTag.TAG_PRIORITY
+                ):
+                    html_tag_to_close = "".join(state.chars)
+                    state.all_tags.append(html_tag_to_close)
+                    state.chars = []
+                elif plain_dot and not state.all_tags:
+                    # Leave it to be appended with the text that follows
+                    continue
+                else:
+                    self.match_char(char, index == 0, index == final_index)
+            elif char == HTMLTag.AT:
+                self.process_end()
             else:
-                self.match_char(char, start, last)
-            self.state.last_token = char
+                self.match_char(char, index == 0, index == final_index)
+            state.last_token = char
+            position = index + 1
 
         if self.state.chars:
             self.process_tags()
@@ -301,32 +416,172 @@ class MarkDownParser:
             self.state.chars = []
             self.state.all_tags.append(html_tag_to_close)
             self.process_tags()
-        return self.parse_final_string()
+        return self.line_events()
+
+    def feed_blocks(self, line: str) -> List[List[Event]]:
+        """Parse one line, returning the events of every block that is now complete.
+
+        Lists and tables are held back until they close, so each returned
+        block is whole.
+        """
+        self.read_line(line.rstrip("\n"))
+        return self.drain()
+
+    def read_line(self, line: str) -> None:
+        """Parse one line into the pending blocks without draining them."""
+        if line:
+            self.state.process_line(self.__parse_text(line + HTMLTag.AT))
+            self.state.last_token = None
+
+    def drain(self) -> List[List[Event]]:
+        state = self.state
+        all_text = state.all_text
+        if state.in_list or state.in_table:
+            ready = state.closed_text
+            state.closed_text = 0
+            if not ready:
+                return []
+        else:
+            state.closed_text = 0
+            if len(all_text) == 1:
+                # The common case, one finished line and nothing held back
+                block = all_text.pop()
+                return [block] if block is not None else []
+            ready = len(all_text)
+        blocks = [block for block in all_text[:ready] if block is not None]
+        del all_text[:ready]
+        return blocks
+
+    def close_blocks(self) -> List[List[Event]]:
+        """Close any open list or table and reset the parser for the next document."""
+        if self.state.in_list:
+            self.close_block("ul")
+        if self.state.in_table:
+            self.close_block("table")
+        self.state.in_list = self.state.in_table = False
+        blocks = self.drain()
+        self.cleanup()
+        return blocks
+
+    def feed(self, line: str) -> List[str]:
+        """Parse one line, returning the HTML of every block that is now complete."""
+        return [serialize_events(block) for block in self.feed_blocks(line)]
+
+    def close(self) -> List[str]:
+        return [serialize_events(block) for block in self.close_blocks()]
+
+    def iter_events(self, lines: Iterable[str]) -> Generator[Event, None, None]:
+        """Yield structural events block by block from any iterable of lines."""
+        try:
+            for line in lines:
+                for block in self.feed_blocks(line):
+                    yield from block
+            for block in self.close_blocks():
+                yield from block
+        finally:
+            self.cleanup()
+
+    def parse_lines(self, lines: Iterable[str]) -> Generator[str, None, None]:
+        """Yield HTML block by block from any iterable of lines, e.g. an open file."""
+        try:
+            for line in lines:
+                yield from self.feed(line)
+            yield from self.close()
+        finally:
+            self.cleanup()
 
     def parse(self, given_text: str) -> Generator[List[str], None, None]:
         if not given_text:
             raise ValueError("Empty text provided")
+        # The whole text is at hand, so the parser builds HTML strings directly
+        # and skips the events that feed and parse_lines serialize
+        self.state.html = True
         try:
             for line in given_text.split("\n"):
-                if not line:
-                    continue
-                self.state.process_line(self.__parse_text(line + HTMLTag.AT))
-                self.state.last_token = None
-            if self.state.in_list:
-                self.state.all_text.append("</ul>")
-            if self.state.in_table:
-                self.state.all_text.append("</table>")
-            yield self.state.all_text
+                self.read_line(line)
+            html = self.close_blocks()
         finally:
             self.cleanup()
+        yield html
+
+
+def iter_lines(chunks: Iterable[str]) -> Generator[str, None, None]:
+    """Re-split arbitrary text chunks into lines, without joining them first."""
+    pending = ""
+    for chunk in chunks:
+        *lines, pending = (pending + chunk).split("\n")
+        yield from lines
+    if pending:
+        yield pending
+
+
+def parse_stream(
+    lines: Iterable[str], md: Union[MarkDownParser, None] = None
+) -> Generator[str, None, None]:
+    if md is None:
+        md = MarkDownParser()
+    return md.parse_lines(lines)
+
+
+def parse_events(
+    lines: Iterable[str], md: Union[MarkDownParser, None] = None
+) -> Generator[Event, None, None]:
+    if md is None:
+        md = MarkDownParser()
+    return md.iter_events(lines)
+
+
+def fragment_events(text: str) -> List[Event]:
+    """Events for one self-contained fragment, e.g. a single ticket's markdown."""
+    return list(MarkDownParser().iter_events(text.split("\n")))
+
+
+def convert_fragments(
+    fragments: List[str], max_workers: int = 1
+) -> Iterator[List[Event]]:
+    if max_workers <= 1 or len(fragments) < 2:
+        return map(fragment_events, fragments)
+
+    # Ship fragments in batches so IPC does not dominate for small tickets
+    chunksize = max(1, len(fragments) // (max_workers * 4))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return iter(list(pool.map(fragment_events, fragments, chunksize=chunksize)))
+
+
+def parse_fragments(
+    fragments: Iterable[str],
+    max_workers: int = 1,
+    cache: Union[RenderCache, None] = None,
+) -> Generator[Event, None, None]:
+    """Convert independent fragments on a process pool, yielding events in order.
+
+    Every fragment gets a fresh parser, so a list or table cannot run on
+    from one fragment into the next. With a cache only fragments whose
+    markdown has not been rendered before are converted.
+    """
+    fragments = list(fragments)
+    rendered: List[Union[List[Event], None]] = [None] * len(fragments)
+    if cache is not None:
+        for index, fragment in enumerate(fragments):
+            cached = cache.get(fragment)
+            if cached is not None:
+                rendered[index] = cached.events
+
+    missing = [index for index, events in enumerate(rendered) if events is None]
+    converted = convert_fragments([fragments[index] for index in missing], max_workers)
+    for index, events in zip(missing, converted):
+        rendered[index] = events
+        if cache is not None:
+            cache.put(fragments[index], events)
+    if cache is not None:
+        cache.flush()
+
+    for events in rendered:
+        yield from events
 
 
 def parse(text: str, md: Union[MarkDownParser, None] = None):
-    joined = ""
     if md is None:
         md = MarkDownParser()
 
-    for line in md.parse(text):
-        for text in line:
-            joined += text if text is not None else ""
-    return joined
+    return "".join(text for line in md.parse(text) for text in line)
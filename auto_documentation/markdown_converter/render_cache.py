@@ -0,0 +1,182 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Set, Union
+import json
+import threading
+from auto_documentation.markdown_converter.events import Event, serialize_events
+from auto_documentation.markdown_converter.html_validator import (
+    HtmlNode,
+    HTMLProcessor,
+)
+
+# Bump whenever the parser's output for the same markdown changes
+PARSER_VERSION = "2"
+KEY_LENGTH = 64
+
+
+@dataclass
+class RenderedFragment:
+    events: List[Event]
+    html: str
+
+    def to_nodes(self) -> List[HtmlNode]:
+        """Top level HtmlNode subtree(s) of this fragment."""
+        processor = HTMLProcessor.from_events(self.events)
+        return processor.root.children if processor.root else []
+
+
+class RenderCache:
+    """
+    Content-addressed cache of rendered markdown fragments.
+
+    Entries are keyed by sha256 of the parser version and the fragment's
+    markdown, which already carries its heading level. Hot entries live in
+    an in-memory LRU. When ``path`` is set, new entries are appended to a
+    log of ``<hash> <json>`` lines on flush, and only an index of byte
+    offsets is kept in memory. Once the log holds more than twice the
+    entries used by this run, flush rewrites it with just those entries.
+    """
+
+    def __init__(
+        self, path: Union[str, Path, None] = None, max_entries: int = 4096
+    ) -> None:
+        self.path = Path(path) if path is not None else None
+        self.max_entries = max_entries
+        self.memory: "OrderedDict[str, RenderedFragment]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._offsets: Dict[str, int] = {}
+        self._pending: Dict[str, str] = {}
+        self._used: Set[str] = set()
+        self._reader: Union[BinaryIO, None] = None
+        self._lock = threading.Lock()
+        self._load_index()
+
+    @classmethod
+    def from_config(cls, config: Any) -> Union["RenderCache", None]:
+        path = config.get("render_cache_path")
+        if not path:
+            return None
+        return cls(path, max_entries=config.get("render_cache_max_entries", 4096))
+
+    @staticmethod
+    def key_for(markdown: str) -> str:
+        return sha256(f"{PARSER_VERSION}\0{markdown}".encode()).hexdigest()
+
+    def _load_index(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        offset = 0
+        with open(self.path, "rb") as ff:
+            for line in ff:
+                self._offsets[line[:KEY_LENGTH].decode()] = offset
+                offset += len(line)
+
+    def _read_record(self, key: str) -> Union[str, None]:
+        if key in self._pending:
+            return self._pending[key]
+        offset = self._offsets.get(key)
+        if offset is None:
+            return None
+        if self._reader is None:
+            self._reader = open(self.path, "rb")
+        self._reader.seek(offset)
+        return self._reader.readline()[KEY_LENGTH + 1 :].rstrip(b"\n").decode()
+
+    def _remember(self, key: str, fragment: RenderedFragment) -> None:
+        self.memory[key] = fragment
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, markdown: str) -> Union[RenderedFragment, None]:
+        key = self.key_for(markdown)
+        with self._lock:
+            self._used.add(key)
+            fragment = self.memory.get(key)
+            if fragment is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return fragment
+
+            record = self._read_record(key)
+            if record is None:
+                self.misses += 1
+                return None
+            stored = json.loads(record)
+            fragment = RenderedFragment(
+                events=[tuple(event) for event in stored["events"]],
+                html=stored["html"],
+            )
+            self.disk_hits += 1
+            self._remember(key, fragment)
+            return fragment
+
+    def put(self, markdown: str, events: List[Event]) -> RenderedFragment:
+        key = self.key_for(markdown)
+        fragment = RenderedFragment(events=events, html=serialize_events(events))
+        with self._lock:
+            self._used.add(key)
+            self._remember(key, fragment)
+            if self.path is not None and key not in self._offsets:
+                self._pending[key] = json.dumps(
+                    {"events": events, "html": fragment.html}
+                )
+        return fragment
+
+    def flush(self) -> None:
+        """Persist new entries, compacting the log when most of it went unused."""
+        if self.path is None:
+            return
+        with self._lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+            if len(self._offsets) + len(self._pending) > 2 * len(self._used):
+                self._compact()
+                return
+            if not self._pending:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as ff:
+                offset = ff.tell()
+                for key, record in self._pending.items():
+                    line = f"{key} {record}\n".encode()
+                    ff.write(line)
+                    self._offsets[key] = offset
+                    offset += len(line)
+            self._pending = {}
+
+    def _compact(self) -> None:
+        records = {
+            key: self._read_record(key)
+            for key in self._used
+            if key in self._offsets or key in self._pending
+        }
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        offsets: Dict[str, int] = {}
+        with open(tmp_path, "wb") as ff:
+            for key, record in records.items():
+                offsets[key] = ff.tell()
+                ff.write(f"{key} {record}\n".encode())
+        tmp_path.replace(self.path)
+        self._offsets = offsets
+        self._pending = {}
+
+    @property
+    def stats(self) -> Dict[str, Union[int, float]]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": len(self.memory),
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,260 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Tuple, Union
+import asyncio
+import logging
+import requests
+from auto_documentation.custom_types import PromptDict, PromptOutput, TicketKey
+from auto_documentation.transport import TransportSettings, mount_transport
+
+logger = logging.getLogger(__name__)
+
+# Prompts are coalesced into one request until their text reaches this size
+DEFAULT_BATCH_CHARS = 16000
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_TIMEOUT = 120.0
+
+
+class LLMClient:
+    """
+    Asynchronous interface to a model provider.
+
+    ``complete`` sends a batch of prompt dicts and returns one output dict,
+    with ``python_code`` and ``Cucumber_file``, per prompt in the same order.
+    Providers without batch endpoints keep ``max_batch_size`` at 1.
+    """
+
+    max_batch_size = 1
+
+    async def complete(self, prompts: List[PromptDict]) -> List[Dict[str, str]]:
+        raise NotImplementedError("Subclasses must implement this method")
+
+    async def aclose(self) -> None:
+        return None
+
+
+class HttpLLMClient(LLMClient):
+    """
+    Provider reached over HTTP through the shared throttled transport.
+
+    Each batch is POSTed as ``{"model": ..., "prompts": [...]}`` and answered
+    with ``{"outputs": [...]}``. Requests go through a pooled session with
+    the same token bucket, 429 back-off and retries as the Jira ingester,
+    on a thread per in-flight request so the event loop never blocks on I/O.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        api_key: Union[str, None] = None,
+        model: Union[str, None] = None,
+        settings: Union[TransportSettings, None] = None,
+        max_batch_size: int = 1,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.url = url
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.timeout = timeout
+        settings = settings or TransportSettings()
+        settings.pool_size = max(settings.pool_size, max_in_flight)
+        # Generation writes nothing on the provider, a repeated POST is safe
+        settings.retry_non_idempotent = True
+        self.session = requests.Session()
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+        self.transport = mount_transport(self.session, settings)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_in_flight, thread_name_prefix="llm"
+        )
+
+    @classmethod
+    def from_config(cls, config: Any) -> Union["HttpLLMClient", None]:
+        url = config.get("llm_url")
+        if not url:
+            return None
+        return cls(
+            url,
+            api_key=config.get("llm_api_key"),
+            model=config.get("llm_model"),
+            settings=TransportSettings.from_config(config, prefix="llm_"),
+            max_batch_size=config.get("llm_batch_size", 1),
+            max_in_flight=config.get("llm_max_in_flight", DEFAULT_MAX_IN_FLIGHT),
+            timeout=config.get("llm_timeout", DEFAULT_TIMEOUT),
+        )
+
+    async def complete(self, prompts: List[PromptDict]) -> List[Dict[str, str]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._post, prompts)
+
+    def _post(self, prompts: List[PromptDict]) -> List[Dict[str, str]]:
+        response = self.session.post(
+            self.url,
+            json={"model": self.model, "prompts": prompts},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        outputs = response.json()["outputs"]
+        if len(outputs) != len(prompts):
+            raise ValueError(
+                f"Expected {len(prompts)} outputs from {self.url}, got {len(outputs)}"
+            )
+        return outputs
+
+    async def aclose(self) -> None:
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+def prompt_size(prompt_meta: PromptDict) -> int:
+    return len(prompt_meta.get("ticket_descriptions", "")) + len(
+        prompt_meta.get("tree_structure", "")
+    )
+
+
+class PromptDispatcher:
+    """
+    Send PromptBuilder output to an LLMClient and stream back PromptOutputs.
+
+    Consecutive small prompts are coalesced into one request, up to the
+    client's batch size and ``max_batch_chars`` of prompt text. At most
+    ``max_in_flight`` requests are outstanding at once and outputs are
+    yielded in the order they finish. A batch that fails is logged and
+    its keys are kept in ``failed``, the remaining batches carry on.
+    """
+
+    def __init__(
+        self,
+        client: LLMClient,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        max_batch_chars: int = DEFAULT_BATCH_CHARS,
+    ):
+        self.client = client
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_batch_chars = max_batch_chars
+        self.failed: Dict[TicketKey, str] = {}
+
+    @classmethod
+    def from_config(cls, config: Any) -> Union["PromptDispatcher", None]:
+        client = HttpLLMClient.from_config(config)
+        if client is None:
+            return None
+        return cls(
+            client,
+            max_in_flight=config.get("llm_max_in_flight", DEFAULT_MAX_IN_FLIGHT),
+            max_batch_chars=config.get("llm_batch_chars", DEFAULT_BATCH_CHARS),
+        )
+
+    def batches(
+        self, prompts: Iterable[Union[Dict[TicketKey, Dict[str, PromptDict]], None]]
+    ) -> Iterator[List[Tuple[TicketKey, PromptDict]]]:
+        batch: List[Tuple[TicketKey, PromptDict]] = []
+        batch_chars = 0
+        for prompt in prompts:
+            # PromptBuilder yields None for tickets it could not process
+            if not prompt:
+                continue
+            for key, value in prompt.items():
+                prompt_meta = value["prompt_meta"]
+                size = prompt_size(prompt_meta)
+                if batch and (
+                    len(batch) >= self.client.max_batch_size
+                    or batch_chars + size > self.max_batch_chars
+                ):
+                    yield batch
+                    batch, batch_chars = [], 0
+                batch.append((key, prompt_meta))
+                batch_chars += size
+        if batch:
+            yield batch
+
+    async def _send(
+        self, batch: List[Tuple[TicketKey, PromptDict]]
+    ) -> List[PromptOutput]:
+        try:
+            outputs = await self.client.complete([meta for _, meta in batch])
+        except Exception as e:
+            logger.error(f"Error dispatching prompts {[key for key, _ in batch]}: {e}")
+            self.failed.update((key, str(e)) for key, _ in batch)
+            return []
+        results: List[PromptOutput] = []
+        for (key, prompt_meta), output in zip(batch, outputs):
+            if "python_code" not in output:
+                self.failed[key] = "No python_code in the provider output"
+                continue
+            results.append(
+                PromptOutput(
+                    python_code=output["python_code"],
+                    Cucumber_file=output.get("Cucumber_file", ""),
+                    output_path=prompt_meta["src_folder"],
+                    key=key,
+                )
+            )
+        return results
+
+    async def stream(
+        self, prompts: Iterable[Union[Dict[TicketKey, Dict[str, PromptDict]], None]]
+    ) -> AsyncIterator[PromptOutput]:
+        """Yield a PromptOutput for every prompt as soon as its batch is done."""
+        self.failed = {}
+        slots = asyncio.Semaphore(self.max_in_flight)
+        done: asyncio.Queue = asyncio.Queue()
+        tasks = set()
+
+        async def send(batch: List[Tuple[TicketKey, PromptDict]]) -> None:
+            try:
+                await done.put(await self._send(batch))
+            finally:
+                slots.release()
+
+        async def feed() -> None:
+            sent = 0
+            try:
+                for batch in self.batches(prompts):
+                    await slots.acquire()
+                    task = asyncio.create_task(send(batch))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    sent += 1
+            except Exception as e:
+                await done.put(e)
+            # The count of batches tells the reader when the last one is in
+            await done.put(sent)
+
+        feeder = asyncio.create_task(feed())
+        expected, received = None, 0
+        try:
+            while expected is None or received < expected:
+                item = await done.get()
+                if isinstance(item, Exception):
+                    raise item
+                if isinstance(item, int):
+                    expected = item
+                    continue
+                received += 1
+                for output in item:
+                    yield output
+        finally:
+            feeder.cancel()
+            for task in list(tasks):
+                task.cancel()
+
+    async def dispatch(
+        self, prompts: Iterable[Union[Dict[TicketKey, Dict[str, PromptDict]], None]]
+    ) -> List[PromptOutput]:
+        return [output async for output in self.stream(prompts)]
+
+
+def dispatch_prompts(
+    prompts: Iterable[Union[Dict[TicketKey, Dict[str, PromptDict]], None]],
+    dispatcher: PromptDispatcher,
+) -> List[PromptOutput]:
+    """Run ``dispatcher`` over ``prompts`` from synchronous code."""
+
+    async def run() -> List[PromptOutput]:
+        try:
+            return await dispatcher.dispatch(prompts)
+        finally:
+            await dispatcher.client.aclose()
+
+    return asyncio.run(run())
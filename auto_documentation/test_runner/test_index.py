@@ -0,0 +1,160 @@
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+import os
+import re
+
+# test_<KEY>.py, where KEY is a ticket key such as MBA-14
+CONVENTION_PATTERN = re.compile(r"^test_([A-Za-z][A-Za-z0-9_]*-\d+)\.py$")
+# "# ticket: MBA-14" or "# tickets: MBA-14, MBA-15" near the top of any other test file
+MARKER_PATTERN = re.compile(
+    rb"^#\s*tickets?:\s*([A-Za-z][A-Za-z0-9_]*-\d+(?:\s*,\s*[A-Za-z][A-Za-z0-9_]*-\d+)*)",
+    re.MULTILINE,
+)
+# Markers are only looked for in the head of a file
+MARKER_BYTES = 2048
+SKIPPED_DIRS = {"__pycache__", "node_modules"}
+# (mtime_ns, sub directories, python files with the ticket keys they belong to)
+Listing = Tuple[int, List[str], List[Tuple[Path, Tuple[str, ...]]]]
+
+
+def is_test_file(name: str) -> bool:
+    return name.endswith(".py") and (
+        name.startswith("test_") or name.endswith("_test.py")
+    )
+
+
+def read_markers(path: str) -> Tuple[str, ...]:
+    try:
+        with open(path, "rb") as handle:
+            head = handle.read(MARKER_BYTES)
+    except OSError:
+        return ()
+    return tuple(
+        key.strip().decode()
+        for match in MARKER_PATTERN.finditer(head)
+        for key in match.group(1).split(b",")
+    )
+
+
+class TestFileIndex:
+    """
+    Ticket keys to the test files under a folder, found recursively.
+
+    A file belongs to a ticket by name, ``test_<KEY>.py``, or by a
+    ``# ticket: KEY`` marker in its first lines. Every directory listing is
+    kept with the directory's mtime, so ``refresh`` only lists directories
+    where files were added, removed or renamed since the last scan. Edits
+    to a marker inside an existing file are seen once its directory changes.
+
+    Files are identified by their path relative to the root, with ``/``
+    separators, so files sharing a name in different folders stay apart.
+    """
+
+    __test__ = False
+    indexes: Dict[str, "TestFileIndex"] = {}
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root).resolve()
+        self._listings: Dict[str, Listing] = {}
+        self.by_key: Dict[str, List[Path]] = {}
+        self.by_relative_path: Dict[str, Path] = {}
+        self.scanned_dirs = 0
+        self.refresh()
+
+    @classmethod
+    def for_folder(cls, root: Union[str, Path]) -> "TestFileIndex":
+        """The shared index of ``root``, brought up to date."""
+        key = str(Path(root).resolve())
+        index = cls.indexes.get(key)
+        if index is None:
+            index = cls.indexes[key] = cls(root)
+        else:
+            index.refresh()
+        return index
+
+    def refresh(self) -> None:
+        """Rebuild the lookups, listing only directories whose mtime moved."""
+        self.scanned_dirs = 0
+        listings: Dict[str, Listing] = {}
+        stack = [str(self.root)]
+        while stack:
+            directory = stack.pop()
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            listing = self._listings.get(directory)
+            if listing is None or listing[0] != mtime:
+                listing = self._scan(directory, mtime, listing)
+            listings[directory] = listing
+            stack.extend(reversed(listing[1]))
+        unchanged = not self.scanned_dirs and len(listings) == len(self._listings)
+        self._listings = listings
+        if unchanged:
+            return
+
+        by_key: Dict[str, List[Path]] = {}
+        by_relative_path: Dict[str, Path] = {}
+        for _, _, files in listings.values():
+            for path, keys in files:
+                by_relative_path[self.relative_path(path)] = path
+                for key in keys:
+                    by_key.setdefault(key, []).append(path)
+        self.by_key = by_key
+        self.by_relative_path = by_relative_path
+
+    def _scan(
+        self,
+        directory: str,
+        mtime: int,
+        previous: Union[Listing, None],
+    ) -> Listing:
+        self.scanned_dirs += 1
+        # Files that were already there are kept as they were, not read again
+        known = (
+            {path.name: (path, keys) for path, keys in previous[2]}
+            if previous is not None
+            else {}
+        )
+        sub_dirs: List[str] = []
+        files: List[Tuple[Path, Tuple[str, ...]]] = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if (
+                        not entry.name.startswith(".")
+                        and entry.name not in SKIPPED_DIRS
+                    ):
+                        sub_dirs.append(entry.path)
+                    continue
+                if not entry.name.endswith(".py"):
+                    continue
+                if entry.name in known:
+                    files.append(known[entry.name])
+                    continue
+                match = CONVENTION_PATTERN.match(entry.name)
+                if match is not None:
+                    keys = (match.group(1),)
+                elif not is_test_file(entry.name):
+                    # Still reachable by file name, never by a ticket key
+                    keys = ()
+                else:
+                    keys = read_markers(entry.path)
+                files.append((Path(entry.path), keys))
+        sub_dirs.sort()
+        files.sort()
+        return mtime, sub_dirs, files
+
+    def relative_path(self, path: Path) -> str:
+        """``path`` relative to the root, the name runners and timings use."""
+        return str(path)[len(str(self.root)) + 1 :].replace(os.sep, "/")
+
+    def files_for(self, key: str) -> List[Path]:
+        """Test files of a ticket key, or of a relative path ending in ``.py``."""
+        if key.endswith(".py"):
+            path = self.by_relative_path.get(key)
+            return [path] if path is not None else []
+        return self.by_key.get(key, [])
+
+    def missing(self, keys: List[str]) -> List[str]:
+        return [key for key in keys if not self.files_for(key)]
@@ -1,13 +1,42 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Union
-from typing import Dict
+from typing import Any, Dict, List, Tuple, Union
+from hashlib import sha256
+from xml.etree import ElementTree
+import heapq
+import math
+import os
+import subprocess
+import sys
+import tempfile
+from auto_documentation.prompt_builder.prompts import TestResult
+from auto_documentation.test_runner.test_index import TestFileIndex
+from auto_documentation.test_runner.timing_store import TestTimingStore
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[2]
+TIMEOUT_PLUGIN = "auto_documentation.test_runner.timeout_plugin"
+# Shards per worker, small shards keep the pool busy when test files differ in length
+SHARDS_PER_WORKER = 4
+# Extra seconds a session gets on top of its per-test budget for pytest start up
+SESSION_GRACE = 30.0
+# Estimated seconds for a test file that has never been timed
+DEFAULT_DURATION = 1.0
+OUTPUT_TAIL = 2000
 
 
 class TestRunnerBase:
+    # Keep pytest from collecting the runners as test classes
+    __test__ = False
+
     def validate(self) -> None:
         raise NotImplementedError("Subclasses must implement this method")
 
-    def run_tests(self) -> None:
+    def run_tests(
+        self,
+        testable_keys: Union[List[str], None] = None,
+        fingerprints: Union[Dict[str, str], None] = None,
+    ) -> List[TestResult]:
         raise NotImplementedError("Subclasses must implement this method")
 
     def build_test_paths(self) -> list[Path]:
@@ -15,12 +44,54 @@ class TestRunnerBase:
 
 
 class TestRunnerFromFolder(TestRunnerBase):
-    def __init__(self, src_folder: Union[str, Path], testable_keys: list[str]):
+    """
+    Run generated ticket tests in isolated pytest sessions on a worker pool.
+
+    Ticket keys are resolved to test files anywhere under ``src_folder``
+    through a TestFileIndex, by file name or by ``# ticket: KEY`` marker.
+    Test files are split into shards and each shard runs in its own
+    ``python -m pytest`` subprocess, so ``max_workers`` sessions run at once.
+    A single test running longer than ``timeout`` seconds fails on its own,
+    and a whole session is killed once it overruns every test's budget.
+
+    With a ``timing_store`` the shards are planned from past durations,
+    longest file first onto the least loaded worker, and files that failed
+    last time run at the start of their session. Given ticket fingerprints
+    as well, a file only runs when the fingerprint of its ticket chain and
+    source differs from its last green run, otherwise its cached results
+    are reported again.
+    """
+
+    def __init__(
+        self,
+        src_folder: Union[str, Path],
+        testable_keys: list[str],
+        max_workers: int = 1,
+        timeout: Union[float, None] = None,
+        timing_store: Union[TestTimingStore, None] = None,
+    ):
         self.src_folder = src_folder
         self.testable_keys = testable_keys
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.timing_store = timing_store
+        self.reused_files: List[str] = []
+        self.index: Union[TestFileIndex, None] = None
         self.validate()
         self.testable_paths = self.build_test_paths()
 
+    @classmethod
+    def from_config(
+        cls, src_folder: Union[str, Path], testable_keys: list[str], config: Any
+    ) -> "TestRunnerFromFolder":
+        return cls(
+            src_folder,
+            testable_keys,
+            max_workers=config.get("test_workers", 1),
+            timeout=config.get("test_timeout"),
+            timing_store=TestTimingStore.for_folder(src_folder, config),
+        )
+
     def validate(self) -> None:
         if not Path(self.src_folder).exists():
             raise FileNotFoundError(f"The folder {self.src_folder} does not exist")
@@ -28,19 +99,343 @@ class TestRunnerFromFolder(TestRunnerBase):
             raise NotADirectoryError(f"The path {self.src_folder} is not a directory")
         if isinstance(self.src_folder, str):
             self.src_folder = Path(self.src_folder)
-        folder_contents = {src.name for src in self.src_folder.iterdir()}
-        if not all(key in folder_contents for key in self.testable_keys):
+        self.index = TestFileIndex.for_folder(self.src_folder)
+        self.validate_keys(self.testable_keys, refresh=False)
+
+    def validate_keys(self, testable_keys: list[str], refresh: bool = True) -> None:
+        if refresh:
+            self.index.refresh()
+        missing = self.index.missing(testable_keys)
+        if missing:
             raise ValueError(
-                f"The folder {self.src_folder} does not contain all the testable keys: {self.testable_keys}"
+                f"The folder {self.src_folder} has no tests for the keys: {missing}"
+            )
+
+    def test_paths_for(self, testable_keys: List[str]) -> List[Path]:
+        """Every test file of the keys, once each, in the order of the keys."""
+        return list(
+            dict.fromkeys(
+                path for key in testable_keys for path in self.index.files_for(key)
             )
+        )
+
+    def file_fingerprints(
+        self, testable_keys: List[str], fingerprints: Dict[str, str]
+    ) -> Dict[str, str]:
+        """Ticket fingerprints by test file id, joined when a file has several."""
+        by_file: Dict[str, List[str]] = defaultdict(list)
+        for key in testable_keys:
+            if key not in fingerprints:
+                continue
+            for path in self.index.files_for(key):
+                by_file[self.file_id(path)].append(fingerprints[key])
+        return {name: "\0".join(values) for name, values in by_file.items()}
+
+    def file_id(self, path: Path) -> str:
+        """How a test file is named in results and timings, relative to src_folder."""
+        return self.index.relative_path(path)
 
     def build_test_paths(self) -> list[Path]:
-        return [self.src_folder / key for key in self.testable_keys]
+        return self.test_paths_for(self.testable_keys)
 
-    def run_tests(self) -> None: ...
+    def shard(self, test_paths: List[Path]) -> List[List[Path]]:
+        if not test_paths:
+            return []
+        if self.timing_store is not None:
+            return self.schedule(test_paths)
+        shard_count = min(len(test_paths), self.max_workers * SHARDS_PER_WORKER)
+        shard_size = math.ceil(len(test_paths) / shard_count)
+        return [
+            test_paths[start : start + shard_size]
+            for start in range(0, len(test_paths), shard_size)
+        ]
+
+    def estimated_duration(self, test_path: Path, default: float) -> float:
+        duration = self.timing_store.duration(self.file_id(test_path))
+        return duration if duration is not None else default
+
+    def schedule(self, test_paths: List[Path]) -> List[List[Path]]:
+        """Longest-processing-time-first over one shard per worker."""
+        known = [
+            duration
+            for duration in map(
+                self.timing_store.duration, map(self.file_id, test_paths)
+            )
+            if duration is not None
+        ]
+        default = sum(known) / len(known) if known else DEFAULT_DURATION
+        by_duration = sorted(
+            test_paths,
+            key=lambda path: self.estimated_duration(path, default),
+            reverse=True,
+        )
+
+        shard_count = min(len(test_paths), self.max_workers)
+        shards: List[List[Path]] = [[] for _ in range(shard_count)]
+        # (planned seconds, shard index) of every worker
+        loads = [(0.0, index) for index in range(shard_count)]
+        for path in by_duration:
+            load, index = heapq.heappop(loads)
+            shards[index].append(path)
+            heapq.heappush(
+                loads, (load + self.estimated_duration(path, default), index)
+            )
+
+        # Stable sort, so each shard stays longest first after its failures
+        for shard in shards:
+            shard.sort(
+                key=lambda path: not self.timing_store.failed(self.file_id(path))
+            )
+        shards.sort(
+            key=lambda shard: (
+                not any(self.timing_store.failed(self.file_id(p)) for p in shard)
+            )
+        )
+        return shards
+
+    def select_changed(
+        self, test_paths: List[Path], fingerprints: Dict[str, str]
+    ) -> Tuple[List[Path], List[TestResult], Dict[str, str]]:
+        """Split files into those to run and the cached results of the rest."""
+        to_run: List[Path] = []
+        cached: List[TestResult] = []
+        file_fingerprints: Dict[str, str] = {}
+        for path in test_paths:
+            file_id = self.file_id(path)
+            ticket_fingerprint = fingerprints.get(file_id)
+            if ticket_fingerprint is None:
+                to_run.append(path)
+                continue
+            digest = sha256(f"{ticket_fingerprint}\0".encode())
+            digest.update(path.read_bytes())
+            file_fingerprints[file_id] = digest.hexdigest()
+            results = self.timing_store.cached_results(
+                file_id, file_fingerprints[file_id]
+            )
+            if results is None:
+                to_run.append(path)
+            else:
+                cached.extend(results)
+                self.reused_files.append(file_id)
+        return to_run, cached, file_fingerprints
+
+    def run_tests(
+        self,
+        testable_keys: Union[List[str], None] = None,
+        fingerprints: Union[Dict[str, str], None] = None,
+    ) -> List[TestResult]:
+        """
+        Run the tests for ``testable_keys``, or for the keys given at init.
+
+        ``fingerprints`` maps ticket keys to GenericIngester.ticket_fingerprint,
+        passing it turns on selection of changed tickets only.
+        """
+        if testable_keys is None:
+            testable_keys = self.testable_keys
+            test_paths = self.testable_paths
+        else:
+            testable_keys = list(testable_keys)
+            self.validate_keys(testable_keys)
+            test_paths = self.test_paths_for(testable_keys)
+
+        self.reused_files = []
+        cached: List[TestResult] = []
+        file_fingerprints: Dict[str, str] = {}
+        to_run = test_paths
+        if fingerprints is not None and self.timing_store is not None:
+            to_run, cached, file_fingerprints = self.select_changed(
+                test_paths, self.file_fingerprints(testable_keys, fingerprints)
+            )
+
+        shards = self.shard(to_run)
+        if self.max_workers == 1 or len(shards) < 2:
+            shard_results = [self.run_shard(shard) for shard in shards]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                shard_results = list(pool.map(self.run_shard, shards))
+        results = [result for results, _ in shard_results for result in results]
+        # Sessions that timed out or crashed have no real durations to keep
+        self.record_timings(
+            [
+                result
+                for results, reported in shard_results
+                if reported
+                for result in results
+            ],
+            file_fingerprints,
+        )
+
+        # Report in the order the keys were given, whatever the schedule was
+        results.extend(cached)
+        order = {self.file_id(path): index for index, path in enumerate(test_paths)}
+        results.sort(key=lambda result: order.get(result_file(result), len(order)))
+        return results
+
+    def record_timings(
+        self,
+        results: List[TestResult],
+        file_fingerprints: Union[Dict[str, str], None] = None,
+    ) -> None:
+        if self.timing_store is None:
+            return
+        file_fingerprints = file_fingerprints or {}
+        by_file: Dict[str, List[TestResult]] = defaultdict(list)
+        for result in results:
+            by_file[result_file(result)].append(result)
+        for file_name, file_results in by_file.items():
+            self.timing_store.record(
+                file_name,
+                sum(result.duration for result in file_results),
+                any(result.status == "FAIL" for result in file_results),
+                fingerprint=file_fingerprints.get(file_name),
+                results=file_results,
+            )
+        self.timing_store.flush()
+
+    def pytest_command(self, test_paths: List[Path], report_path: Path) -> List[str]:
+        command = [
+            sys.executable,
+            "-m",
+            "pytest",
+            "-q",
+            "-p",
+            "no:cacheprovider",
+            "-p",
+            TIMEOUT_PLUGIN,
+            f"--rootdir={self.index.root}",
+            # Files sharing a name in different folders can run in one session
+            "--import-mode=importlib",
+            "--continue-on-collection-errors",
+            f"--junitxml={report_path}",
+            "-o",
+            "junit_family=xunit1",
+            "-o",
+            "junit_logging=system-out",
+        ]
+        if self.timeout:
+            command.append(f"--ticket-timeout={self.timeout}")
+        return command + [str(path) for path in test_paths]
+
+    def run_shard(self, test_paths: List[Path]) -> Tuple[List[TestResult], bool]:
+        """
+        Run one pytest session over ``test_paths`` and read back its report.
+
+        The flag is False when the session timed out or crashed before
+        writing a report, the results then only stand in for the files.
+        """
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [str(PACKAGE_ROOT), env.get("PYTHONPATH")])
+        )
+        session_timeout = None
+        if self.timeout:
+            session_timeout = self.timeout * len(test_paths) + SESSION_GRACE
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            report_path = Path(tmp_dir) / "report.xml"
+            try:
+                completed = subprocess.run(
+                    self.pytest_command(test_paths, report_path),
+                    cwd=self.src_folder,
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    timeout=session_timeout,
+                )
+            except subprocess.TimeoutExpired:
+                return [
+                    TestResult(
+                        test_name=self.file_id(path),
+                        status="FAIL",
+                        duration=session_timeout,
+                        error_message=f"Session timed out after {session_timeout}s",
+                    )
+                    for path in test_paths
+                ], False
+            if not report_path.exists():
+                output = (completed.stdout + completed.stderr)[-OUTPUT_TAIL:]
+                return [
+                    TestResult(
+                        test_name=self.file_id(path),
+                        status="FAIL",
+                        duration=0.0,
+                        error_message=f"pytest exited with code {completed.returncode}",
+                        output=output,
+                    )
+                    for path in test_paths
+                ], False
+            return parse_junit_report(report_path), True
+
+
+def result_file(result: TestResult) -> str:
+    """The test file a result came from, names look like ``dir/test_KEY.py::test``."""
+    return result.test_name.split("::", 1)[0]
+
+
+def parse_junit_report(report_path: Path) -> List[TestResult]:
+    results: List[TestResult] = []
+    for testcase in ElementTree.parse(report_path).iter("testcase"):
+        status, error_message = "PASS", None
+        for outcome, outcome_status in (
+            ("failure", "FAIL"),
+            ("error", "FAIL"),
+            ("skipped", "SKIP"),
+        ):
+            element = testcase.find(outcome)
+            if element is not None:
+                status = outcome_status
+                error_message = element.get("message") or element.text
+                break
+        # xunit1 reports the file relative to the rootdir, the runner's src_folder
+        file_name = testcase.get("file", "").replace("\\", "/")
+        name = testcase.get("name", "")
+        output = testcase.find("system-out")
+        results.append(
+            TestResult(
+                test_name=f"{file_name}::{name}" if file_name else name,
+                status=status,
+                duration=float(testcase.get("time") or 0.0),
+                error_message=error_message,
+                output=output.text if output is not None else None,
+            )
+        )
+    return results
 
 
 class TestRunnerFactory:
-    test_runner_instances: Dict[str, TestRunnerBase]
+    """
+    One runner per test folder, so every run shares the folder's timing store.
+
+    ``TestRunnerFactory(src_folder, config)`` returns the cached runner for
+    ``src_folder``. It is created from ``config`` the first time, and again
+    whenever the runner settings in ``config`` change.
+    """
+
+    __test__ = False
+    test_runner_instances: Dict[str, Tuple[Any, TestRunnerBase]] = {}
+
+    @staticmethod
+    def runner_settings(config: Any, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        if config is None:
+            return args, kwargs
+        return (
+            config.get("test_workers", 1),
+            config.get("test_timeout"),
+            config.get("test_timings_path"),
+        )
 
-    def __new__(cls, *args, **kwargs): ...
+    def __new__(
+        cls, src_folder: Union[str, Path], config: Any = None, *args, **kwargs
+    ) -> TestRunnerBase:
+        key = str(Path(src_folder).resolve())
+        settings = cls.runner_settings(config, args, dict(kwargs))
+        cached = cls.test_runner_instances.get(key)
+        if cached is not None and cached[0] == settings:
+            return cached[1]
+        if config is None:
+            kwargs.setdefault("timing_store", TestTimingStore.for_folder(src_folder))
+            runner = TestRunnerFromFolder(src_folder, [], *args, **kwargs)
+        else:
+            runner = TestRunnerFromFolder.from_config(src_folder, [], config)
+        cls.test_runner_instances[key] = (settings, runner)
+        return runner
@@ -0,0 +1,33 @@
+"""pytest plugin loaded into every runner session to time out single tests."""
+
+import signal
+import pytest
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--ticket-timeout",
+        type=float,
+        default=None,
+        help="Fail any single test that runs longer than this many seconds",
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item: pytest.Item):
+    timeout = item.config.getoption("ticket_timeout")
+    # SIGALRM is POSIX only, elsewhere the runner's session timeout still applies
+    if not timeout or not hasattr(signal, "setitimer"):
+        yield
+        return
+
+    def on_timeout(signum, frame):
+        pytest.fail(f"Timed out after {timeout}s", pytrace=False)
+
+    previous = signal.signal(signal.SIGALRM, on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
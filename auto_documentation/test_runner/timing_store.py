@@ -0,0 +1,87 @@
+from pathlib import Path
+from typing import Any, Dict, List, Union
+import threading
+import time
+from auto_documentation.jsonl_log import JsonlLog
+from auto_documentation.prompt_builder.prompts import TestResult
+
+# Weight of the latest run in a file's smoothed duration
+DURATION_SMOOTHING = 0.5
+
+
+class TestTimingStore:
+    """
+    How each generated test file last ran, kept in a JsonlLog.
+
+    Durations are smoothed across runs so one slow run does not reorder every
+    schedule, while ``failed`` always reflects the latest run. A green run can
+    also keep its fingerprint and results, to be reported again while the
+    fingerprint stays the same.
+    """
+
+    __test__ = False
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.log = JsonlLog(self.path)
+        self.entries: Dict[str, Dict[str, Any]] = self.log.entries
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_folder(
+        cls, src_folder: Union[str, Path], config: Any = None
+    ) -> "TestTimingStore":
+        """The configured store, by default ``<folder>.timings.jsonl`` next to it."""
+        path = config.get("test_timings_path") if config is not None else None
+        if not path:
+            src_folder = Path(src_folder).resolve()
+            path = src_folder.with_name(f"{src_folder.name}.timings.jsonl")
+        return cls(path)
+
+    def duration(self, key: str) -> Union[float, None]:
+        record = self.entries.get(key)
+        return record["duration"] if record is not None else None
+
+    def failed(self, key: str) -> bool:
+        record = self.entries.get(key)
+        return record is not None and record["failed"]
+
+    def cached_results(
+        self, key: str, fingerprint: str
+    ) -> Union[List[TestResult], None]:
+        """Results of the last green run, if it ran with the same fingerprint."""
+        record = self.entries.get(key)
+        if record is None or record.get("fingerprint") != fingerprint:
+            return None
+        return [TestResult(**result) for result in record["results"]]
+
+    def record(
+        self,
+        key: str,
+        duration: float,
+        failed: bool,
+        fingerprint: Union[str, None] = None,
+        results: Union[List[TestResult], None] = None,
+    ) -> None:
+        with self._lock:
+            previous = self.entries.get(key)
+            if previous is not None:
+                duration = (
+                    DURATION_SMOOTHING * duration
+                    + (1 - DURATION_SMOOTHING) * previous["duration"]
+                )
+            record = {
+                "key": key,
+                "duration": duration,
+                "failed": failed,
+                "recorded_at": time.time(),
+            }
+            # Only green runs can be reused, a failing file always runs again
+            if fingerprint is not None and not failed:
+                record["fingerprint"] = fingerprint
+                record["results"] = [result.model_dump() for result in results or []]
+            self.log.append(record)
+
+    def flush(self) -> None:
+        with self._lock:
+            self.log.flush()
@@ -0,0 +1,93 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Union
+import threading
+import time
+from auto_documentation.jsonl_log import JsonlLog
+
+JIRA_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+
+def parse_updated(updated: str) -> datetime:
+    return datetime.strptime(updated, JIRA_TIMESTAMP_FORMAT)
+
+
+class IssueCache:
+    """
+    Raw issues keyed by issue key, kept in a JsonlLog.
+
+    An entry is only served while the source's ``updated`` timestamp is not
+    newer than the cached copy and it is younger than ``max_age`` seconds.
+    Evicted entries are dropped from the file at the next compaction.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_entries: Union[int, None] = None,
+        max_age: Union[float, None] = None,
+    ):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.log = JsonlLog(self.path)
+        self.entries: Dict[str, Dict[str, Any]] = self.log.entries
+        self._lock = threading.Lock()
+        self.evict()
+
+    @classmethod
+    def from_config(cls, config: Any) -> Union["IssueCache", None]:
+        path = config.get("issue_cache_path")
+        if not path:
+            return None
+        return cls(
+            path,
+            max_entries=config.get("issue_cache_max_entries"),
+            max_age=config.get("issue_cache_max_age"),
+        )
+
+    def _expired(self, record: Dict[str, Any], now: float) -> bool:
+        return self.max_age is not None and now - record["cached_at"] > self.max_age
+
+    def get(self, key: str, updated: Union[str, None]) -> Union[Dict[str, Any], None]:
+        """Return the cached raw issue, or None when missing, expired or stale."""
+        with self._lock:
+            record = self.entries.get(key)
+            fresh = (
+                record is not None
+                and updated is not None
+                and not self._expired(record, time.time())
+                and parse_updated(updated) <= parse_updated(record["updated"])
+            )
+            if not fresh:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return record["raw"]
+
+    def put(self, key: str, raw: Dict[str, Any], updated: str) -> None:
+        record = {"key": key, "updated": updated, "cached_at": time.time(), "raw": raw}
+        with self._lock:
+            self.log.append(record)
+
+    def evict(self) -> None:
+        """Drop expired entries, then the oldest ones beyond ``max_entries``."""
+        now = time.time()
+        with self._lock:
+            for key in [k for k, v in self.entries.items() if self._expired(v, now)]:
+                del self.entries[key]
+            if self.max_entries is not None and len(self.entries) > self.max_entries:
+                by_age = sorted(self.entries.values(), key=lambda r: r["cached_at"])
+                for record in by_age[: len(self.entries) - self.max_entries]:
+                    del self.entries[record["key"]]
+
+    def flush(self) -> None:
+        self.evict()
+        with self._lock:
+            self.log.flush()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
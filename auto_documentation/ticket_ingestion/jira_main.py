@@ -1,28 +1,160 @@
-from typing import Dict, Any, Union, List, Set, cast
+from typing import Dict, Any, Union, List, Set, Tuple, cast
+from datetime import datetime, timedelta, tzinfo
+from pathlib import Path
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import requests
 from jira import JIRA
-from auto_documentation.custom_types import ActionType, TicketTree, TicketDict
+from jira.exceptions import JIRAError
+from jira.resources import Issue
+from auto_documentation.custom_types import (
+    ActionType,
+    AnyTicketTree,
+    TicketDict,
+    TicketNode,
+)
 from collections import deque
+from auto_documentation.custom_exceptions import InvalidTicketStructureError
 from auto_documentation.ticket_ingestion.ticket_ingestor_base import GenericIngester
+from auto_documentation.ticket_ingestion.issue_cache import IssueCache
+from auto_documentation.transport import TransportSettings, mount_transport
 from dynaconf import Dynaconf
 
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_BATCH_SIZE = 100
+JQL_DATE_FORMAT = "%Y-%m-%d %H:%M"
+JIRA_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+# Issues updated this long before the last run are searched again, covering
+# clock skew and JQL dates only having minute precision
+CHANGE_SEARCH_MARGIN = timedelta(minutes=2)
+# The only fields the tree builders and the issue cache read, keeps payloads small
+PREFETCH_FIELDS = ["summary", "description", "issuetype", "issuelinks", "updated"]
+
+
+def client_session(client: JIRA) -> requests.Session:
+    """
+    The requests session behind ``client``.
+
+    The jira library has no public accessor for it, so this is the one place
+    that reaches in and it fails loudly if the library stops keeping one.
+    """
+    session = getattr(client, "_session", None)
+    if not isinstance(session, requests.Session):
+        raise TypeError(
+            f"{type(client).__name__} does not expose a requests.Session, "
+            "the throttled transport cannot be mounted"
+        )
+    return session
+
 
 class IngestJira(GenericIngester):
     def __init__(
         self,
         jira_config: Dynaconf,
-        ticket_tree: Union[TicketTree, None],
+        ticket_tree: Union[AnyTicketTree, None],
         parent_ticket_id: str,
+        max_workers: Union[int, None] = None,
+        prefetch: Union[bool, None] = None,
+        batch_size: Union[int, None] = None,
+        issue_cache: Union[IssueCache, None] = None,
     ):
+        if max_workers is None:
+            max_workers = jira_config.get("jira_max_workers", DEFAULT_MAX_WORKERS)
+        # Retries are left to the transport, only the client's own server
+        # version lookup goes out before it is mounted
         self.jira = JIRA(
             server=jira_config.get("jira_project_url"),
             basic_auth=(jira_config.get("jira_email"), jira_config.get("jira_auth")),
+            max_retries=0,
         )
+        # What the client builds its resources from, for issues read back from
+        # the issue cache
+        self.issue_options: Dict[str, Any] = {
+            **JIRA.DEFAULT_OPTIONS,
+            "server": jira_config.get("jira_project_url").rstrip("/"),
+        }
+        self.session = client_session(self.jira)
+        transport_settings = TransportSettings.from_config(jira_config)
+        transport_settings.pool_size = max(transport_settings.pool_size, max_workers)
+        self.transport = mount_transport(self.session, transport_settings)
         self.project = self.jira.project(jira_config.get("jira_project_name"))
-        super().__init__(jira_config, ticket_tree, parent_ticket_id)
+        if prefetch is None:
+            prefetch = jira_config.get("jira_prefetch", False)
+        if batch_size is None:
+            batch_size = jira_config.get("jira_batch_size", DEFAULT_BATCH_SIZE)
+        self.prefetch = prefetch
+        self.batch_size = max(1, batch_size)
+        self._issue_batch: Dict[str, Any] = {}
+        # Looked up once, False until then
+        self._user_timezone: Union[tzinfo, None, bool] = False
+        if issue_cache is None:
+            issue_cache = IssueCache.from_config(jira_config)
+        super().__init__(
+            jira_config, ticket_tree, parent_ticket_id, max_workers, issue_cache
+        )
 
     def get_issue_data(self, issue_key: str):
+        if issue_key in self._issue_batch:
+            return self._issue_batch[issue_key]
         return self.jira.issue(issue_key)
 
+    def fetch_issues(self, issue_keys: List[str]) -> Dict[str, Any]:
+        if not self.prefetch:
+            return super().fetch_issues(issue_keys)
+        self.prefetch_issues(issue_keys)
+        return {key: self.get_issue_data(key) for key in issue_keys}
+
+    def get_updated_timestamps(self, issue_keys: List[str]) -> Dict[str, str]:
+        updated: Dict[str, str] = {}
+        for issues in self._map_concurrently(
+            lambda chunk: self._search_keys(chunk, fields=["updated"]),
+            self._chunk_keys(issue_keys),
+        ):
+            for issue in issues:
+                updated[issue.key] = issue.fields.updated
+        return updated
+
+    def issue_to_raw(self, issue: Issue) -> Dict[str, Any]:
+        return issue.raw
+
+    def issue_from_raw(self, raw: Dict[str, Any]) -> Issue:
+        return Issue(self.issue_options, self.session, raw=raw)
+
+    def prefetch_issues(self, issue_keys: List[str]) -> None:
+        """Resolve every key not already batched with paged ``key in (...)`` searches."""
+        missing = [
+            key for key in dict.fromkeys(issue_keys) if key not in self._issue_batch
+        ]
+        for issues in self._map_concurrently(
+            self._search_keys, self._chunk_keys(missing)
+        ):
+            for issue in issues:
+                self._issue_batch[issue.key] = issue
+
+    def _chunk_keys(self, issue_keys: List[str]) -> List[List[str]]:
+        return [
+            issue_keys[start : start + self.batch_size]
+            for start in range(0, len(issue_keys), self.batch_size)
+        ]
+
+    def _search_keys(
+        self, issue_keys: List[str], fields: List[str] = PREFETCH_FIELDS
+    ) -> List[Any]:
+        return self._search(f"key in ({', '.join(issue_keys)})", fields)
+
+    def _search(self, jql: str, fields: List[str]) -> List[Any]:
+        found: List[Any] = []
+        while True:
+            page = self.jira.search_issues(
+                jql,
+                startAt=len(found),
+                maxResults=self.batch_size,
+                validate_query=False,
+                fields=list(fields),
+            )
+            found.extend(page)
+            if not len(page) or len(found) >= page.total:
+                return found
+
     def _is_valid_issue_link(self, issue_link: Any) -> Union[Dict, None]:
         if not hasattr(issue_link, "raw"):
             return None
@@ -46,34 +178,47 @@ class IngestJira(GenericIngester):
                 linked_keys.append(key)
         return linked_keys
 
-    def append_next(
-        self, current_node: TicketTree, queue: deque, next_issue, found_key: str
-    ) -> None:
+    def _classify_links(
+        self, current_node: TicketNode, next_issue: Any
+    ) -> Tuple[List[str], List[str]]:
+        """Split an issue's links into child keys to walk and known parent keys."""
         next_children = self.get_next_children_set(current_node)
         parent_type = current_node.parent
 
-        if not next_children:
-            return
-
-        next_associated_issues = []
+        child_keys: List[str] = []
+        parent_keys: List[str] = []
         for issue_link in next_issue.issuelinks:
             target_key = self._is_valid_issue_link(issue_link)
             if target_key is None:
                 continue
             ticket_type = target_key["fields"]["issuetype"]["name"]
             key = target_key.get("key")
-            if key:
+            if not key:
                 continue
             elif ticket_type in next_children:
-                next_associated_issues.append(key)
-            elif ticket_type == parent_type:
-                cast(list, self.formatted_tree[key]["children"]).append(found_key)
-                self.formatted_tree[found_key]["parent_key"] = key
-                self.formatted_tree[found_key]["parent_type"] = parent_type.ticket_type
+                child_keys.append(key)
+            elif (
+                parent_type is not None
+                and ticket_type == parent_type.ticket_type
+                and key in self.formatted_tree
+            ):
+                parent_keys.append(key)
+        return child_keys, parent_keys
+
+    def append_next(
+        self, current_node: TicketNode, queue: deque, next_issue, found_key: str
+    ) -> None:
+        child_keys, parent_keys = self._classify_links(current_node, next_issue)
+        for key in parent_keys:
+            cast(list, self.formatted_tree[key]["children"]).append(found_key)
+            self.formatted_tree[found_key]["parent_key"] = key
+            self.formatted_tree[found_key]["parent_type"] = (
+                current_node.parent.ticket_type
+            )
 
-        queue.extend(next_associated_issues)
+        queue.extend(child_keys)
 
-    def build_entry(self, next_issue: Any, current_node: TicketTree) -> TicketDict:
+    def build_entry(self, next_issue: Any, current_node: TicketNode) -> TicketDict:
         ticket_dict: TicketDict = {
             "title": next_issue.summary,
             "description": next_issue.description,
@@ -88,30 +233,225 @@ class IngestJira(GenericIngester):
         if self.ticket_tree is None:
             raise ValueError("Ticket tree is None")
 
-        queue: deque = deque((self.parent_ticket_id,))
+        self._walk_from([self.parent_ticket_id])
 
-        while queue:
-            key_to_query = queue.pop()
-            next_issue = self.get_issue_data(key_to_query).fields
-            string_issue_type = str(next_issue.issuetype)
-            self.types_to_keys[string_issue_type].append(key_to_query)
-            # This is where we need to handle the case where the ticket tree is None
-            # This would mean we have to build the ticket tree from the ticket id
-            current_node = self.find_node_in_ticket_tree(string_issue_type)
-            self.formatted_tree[key_to_query] = self.build_entry(
-                next_issue, current_node
+    def _walk_from(self, keys: List[str]) -> List[str]:
+        """Ingest every issue reachable from ``keys`` that is not in the tree yet."""
+        # Walk the hierarchy one BFS level at a time so every frontier can be
+        # fetched concurrently while still being processed in a fixed order
+        ingested: List[str] = []
+        frontier = [
+            key for key in dict.fromkeys(keys) if key not in self.formatted_tree
+        ]
+
+        while frontier:
+            fetched = self.get_issues_data(frontier)
+            queue: deque = deque()
+            for key_to_query in frontier:
+                next_issue = fetched[key_to_query].fields
+                string_issue_type = str(next_issue.issuetype)
+                self.types_to_keys[string_issue_type].append(key_to_query)
+                # This is where we need to handle the case where the ticket tree is None
+                # This would mean we have to build the ticket tree from the ticket id
+                current_node = self.find_node_in_ticket_tree(string_issue_type)
+                self.formatted_tree[key_to_query] = self.build_entry(
+                    next_issue, current_node
+                )
+                self.append_next(current_node, queue, next_issue, key_to_query)
+
+            ingested.extend(frontier)
+            frontier = [
+                key for key in dict.fromkeys(queue) if key not in self.formatted_tree
+            ]
+        return ingested
+
+    def build_formatted_tree_incremental(
+        self, state_path: Union[Path, str]
+    ) -> Set[str]:
+        """
+        Bring the formatted tree up to date using the previous run's state.
+
+        Only issues updated since the last run are downloaded, with JQL queries
+        over chunks of the keys already in the tree. Returns the keys whose
+        entries or children changed, a full build touches every key. Save the
+        state again after rendering to keep the rendered fragments for next run.
+        """
+        if self.ticket_tree is None:
+            raise ValueError("Ticket tree is None")
+
+        run_started = self.server_now()
+        self.cache_fragments = True
+        if self.load_state(state_path):
+            touched = self.apply_changes(self.search_changed_issues(self.last_run))
+        else:
+            self.build_formatted_tree()
+            touched = set(self.formatted_tree)
+        self.last_run = run_started
+        self.save_state(state_path)
+        return touched
+
+    def server_now(self) -> datetime:
+        """The Jira server's clock, or the local one when it does not say."""
+        server_time = self.jira.server_info().get("serverTime")
+        if server_time:
+            try:
+                return datetime.strptime(server_time, JIRA_TIME_FORMAT)
+            except ValueError:
+                pass
+        return datetime.now().astimezone()
+
+    def user_timezone(self) -> Union[tzinfo, None]:
+        """The timezone JQL dates are read in, None when it is the local one."""
+        if self._user_timezone is False:
+            try:
+                name = self.jira.myself().get("timeZone")
+                self._user_timezone = ZoneInfo(name) if name else None
+            except (JIRAError, ZoneInfoNotFoundError, ValueError):
+                self._user_timezone = None
+        return self._user_timezone
+
+    def search_changed_issues(self, since: datetime) -> List[Issue]:
+        # JQL reads dates in the Jira user's timezone at minute precision, so
+        # the cutoff is converted to it and moved back by a safety margin
+        if since.tzinfo is None:
+            since = since.astimezone()
+        cutoff = (since - CHANGE_SEARCH_MARGIN).astimezone(self.user_timezone())
+        updated_clause = f'updated >= "{cutoff.strftime(JQL_DATE_FORMAT)}"'
+        changed = [
+            issue
+            for issues in self._map_concurrently(
+                lambda chunk: self._search(
+                    f"key in ({', '.join(chunk)}) AND {updated_clause}",
+                    PREFETCH_FIELDS,
+                ),
+                self._chunk_keys(list(self.formatted_tree)),
             )
-            self.append_next(current_node, queue, next_issue, key_to_query)
+            for issue in issues
+        ]
+        if self.issue_cache is not None:
+            for issue in changed:
+                self.issue_cache.put(issue.key, issue.raw, issue.fields.updated)
+            self.issue_cache.flush()
+        return changed
 
-    def build_tree_from_ticket_id(self) -> TicketTree:
+    def apply_changes(self, changed: List[Issue]) -> Set[str]:
+        """Patch the entries and parent/child links of changed issues in place."""
+        touched: Set[str] = set()
+        detached: List[str] = []
+        # Changed issues left without a parent, their parent may be new
+        orphaned: Dict[str, Tuple[TicketNode, Any]] = {}
+        queue: deque = deque()
+
+        for issue in changed:
+            key, fields = issue.key, issue.fields
+            entry = self.formatted_tree[key]
+            string_issue_type = str(fields.issuetype)
+            current_node = self.find_node_in_ticket_tree(string_issue_type)
+            if current_node is None:
+                # Like a full build, which never follows links to untracked
+                # types, the issue and its subtree leave the tree
+                if key == self.parent_ticket_id:
+                    raise InvalidTicketStructureError(
+                        f"Ticket type {string_issue_type} is not in the ticket tree",
+                        key,
+                    )
+                old_parent = entry["parent_key"]
+                if old_parent in self.formatted_tree:
+                    self.formatted_tree[old_parent]["children"].remove(key)
+                    touched.add(old_parent)
+                entry["parent_key"] = None
+                entry["parent_type"] = None
+                detached.append(key)
+                continue
+            if entry["ticket_type"] != current_node.ticket_type:
+                self.types_to_keys[entry["ticket_type"]].remove(key)
+                self.types_to_keys[string_issue_type].append(key)
+                entry["ticket_type"] = current_node.ticket_type
+            entry["title"] = fields.summary
+            entry["description"] = fields.description
+            touched.add(key)
+
+            child_keys, parent_keys = self._classify_links(current_node, fields)
+            # Children whose link was removed, or that were deleted, fall out of the tree
+            for child_key in list(entry["children"]):
+                if child_key not in child_keys:
+                    entry["children"].remove(child_key)
+                    self.formatted_tree[child_key]["parent_key"] = None
+                    self.formatted_tree[child_key]["parent_type"] = None
+                    detached.append(child_key)
+            queue.extend(child_keys)
+
+            old_parent = entry["parent_key"]
+            if old_parent is not None and old_parent not in parent_keys:
+                self.formatted_tree[old_parent]["children"].remove(key)
+                touched.add(old_parent)
+            for parent_key in parent_keys:
+                siblings = self.formatted_tree[parent_key]["children"]
+                if key not in siblings:
+                    siblings.append(key)
+                    touched.add(parent_key)
+            if parent_keys:
+                entry["parent_key"] = parent_keys[-1]
+                entry["parent_type"] = current_node.parent.ticket_type
+            elif key != self.parent_ticket_id:
+                entry["parent_key"] = None
+                entry["parent_type"] = None
+                detached.append(key)
+                orphaned[key] = (current_node, fields)
+
+        touched.update(self._walk_from(list(queue)))
+        touched.update(self._relink_orphans(orphaned))
+        self._prune_detached(detached)
+        touched.intersection_update(self.formatted_tree)
+        self.invalidate_entries(touched)
+        return touched
+
+    def _relink_orphans(self, orphaned: Dict[str, Tuple[TicketNode, Any]]) -> Set[str]:
+        """Attach issues that moved under a parent ingested by this update."""
+        touched: Set[str] = set()
+        for key, (current_node, fields) in orphaned.items():
+            entry = self.formatted_tree[key]
+            if entry["parent_key"] is not None:
+                continue
+            _, parent_keys = self._classify_links(current_node, fields)
+            for parent_key in parent_keys:
+                siblings = self.formatted_tree[parent_key]["children"]
+                if key not in siblings:
+                    siblings.append(key)
+                touched.add(parent_key)
+            if parent_keys:
+                entry["parent_key"] = parent_keys[-1]
+                entry["parent_type"] = current_node.parent.ticket_type
+                touched.add(key)
+        return touched
+
+    def _prune_detached(self, keys: List[str]) -> None:
+        """Drop subtrees that lost their parent and were not re-attached."""
+        for key in keys:
+            entry = self.formatted_tree.get(key)
+            if entry is None or entry["parent_key"] is not None:
+                continue
+            stack = [key]
+            while stack:
+                next_key = stack.pop()
+                removed = self.formatted_tree.pop(next_key)
+                self.types_to_keys[removed["ticket_type"]].remove(next_key)
+                stack.extend(removed["children"])
+
+    def build_tree_from_ticket_id(self) -> TicketNode:
+        # The template is about to be replaced, lookups must not use the old index
+        self.invalidate_node_index()
         # Get parent issue and create root node
         parent_issue = self.get_issue_data(self.parent_ticket_id)
         parent_ticket_type = str(parent_issue.fields.issuetype)
         parent_node = self._create_ticket_tree_node(parent_ticket_type)
+        nodes_by_type = {parent_ticket_type: parent_node}
         seen_types = set([parent_ticket_type])
         seen_parents_ids = set([self.parent_ticket_id])
         children = self._process_issue_links(parent_issue.fields)
         seen_parents_ids.update(children)
+        if self.prefetch:
+            self.prefetch_issues(children)
         queue = deque(children)
         last_seen_type = parent_node
 
@@ -119,29 +459,32 @@ class IngestJira(GenericIngester):
             next_key = queue.popleft()
             next_issue = self.get_issue_data(next_key)
             issue_type = str(next_issue.fields.issuetype)
-            # Last seen type could be itself -> need to fix this
-            current_node = self._create_ticket_tree_node(issue_type, last_seen_type)
-            last_seen_type.child.append(current_node)
-            if (
-                last_seen_type.ticket_type != current_node.ticket_type
-                and last_seen_type.ticket_type != current_node.ticket_type
-            ):
+            # Issues of a type that already has a node share it, the template
+            # holds one node per ticket type
+            is_new_type = issue_type not in nodes_by_type
+            if is_new_type:
+                current_node = self._create_ticket_tree_node(issue_type, last_seen_type)
+                last_seen_type.child.append(current_node)
+                nodes_by_type[issue_type] = current_node
                 # This may be to basic and will only work if the relationship
                 # is one to one
                 last_seen_type = current_node
+            current_node = nodes_by_type[issue_type]
             seen_types.add(issue_type)
             seen_parents_ids.add(next_key)
 
             has_children = False
-            for linked_key in self._process_issue_links(next_issue.fields):
-                linked_issue = self.get_issue_data(linked_key)
+            linked_keys = self._process_issue_links(next_issue.fields)
+            linked_issues = self.get_issues_data(linked_keys)
+            for linked_key in linked_keys:
+                linked_issue = linked_issues[linked_key]
                 linked_type = linked_issue.fields.issuetype.name
                 if linked_key in seen_parents_ids or linked_type in seen_types:
                     continue
                 has_children = True
                 queue.append(linked_key)
 
-            if not has_children:
+            if is_new_type and not has_children:
                 current_node.action = ActionType.TEST
 
         self.ticket_tree = parent_node
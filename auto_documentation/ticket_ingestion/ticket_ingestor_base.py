@@ -1,8 +1,21 @@
-from typing import Dict, Any, Union, Set
-from auto_documentation.custom_types import TicketTree, TicketDict
+from typing import Dict, Any, Union, Set, List, Callable, Generator, TextIO, Tuple
+from auto_documentation.custom_types import (
+    AnyTicketTree,
+    TicketDict,
+    TicketNode,
+    ticket_tree_to_node,
+    TicketTree,
+)
+from auto_documentation.custom_exceptions import InvalidTicketStructureError
+from auto_documentation.ticket_ingestion.issue_cache import IssueCache
+from auto_documentation.utils import YAML_DUMPER, ticket_tree_to_yaml_dict
 from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from dynaconf import Dynaconf
+from hashlib import sha256
 from pathlib import Path
+import json
 import yaml
 
 
@@ -11,48 +24,148 @@ ERROR_MESSAGE = "Subclasses must implement this method"
 
 class GenericIngester:
     def __init__(
-        self, jira_config: Dynaconf, ticket_tree: TicketTree, parent_ticket_id: str
+        self,
+        jira_config: Dynaconf,
+        ticket_tree: Union[AnyTicketTree, None],
+        parent_ticket_id: str,
+        max_workers: int = 1,
+        issue_cache: Union[IssueCache, None] = None,
     ):
         self.jira_config = jira_config
+        self._node_index: Union[Dict[str, TicketNode], None] = None
         self.ticket_tree = ticket_tree
         self.parent_ticket_id = parent_ticket_id
+        self.max_workers = max(1, max_workers)
+        self.issue_cache = issue_cache
         self.formatted_tree: Dict[str, Any] = {}
-        self._node_cache = {}
         self.types_to_keys = defaultdict(list)
+        self.last_run: Union[datetime, None] = None
+        # Rendered markdown per ticket and heading level, reused until invalidated
+        self.cache_fragments = False
+        self._markdown_fragments: Dict[str, Dict[int, str]] = {}
+
+    def save_state(self, state_path: Union[Path, str]) -> None:
+        state = {
+            "parent_ticket_id": self.parent_ticket_id,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "formatted_tree": self.formatted_tree,
+            "types_to_keys": self.types_to_keys,
+            "markdown_fragments": self._markdown_fragments,
+        }
+        with open(state_path, "w") as ff:
+            json.dump(state, ff)
+
+    def load_state(self, state_path: Union[Path, str]) -> bool:
+        """Restore a previous run, returning False when there is none to resume."""
+        state_path = Path(state_path)
+        if not state_path.exists():
+            return False
+        with open(state_path) as ff:
+            state = json.load(ff)
+        if state["parent_ticket_id"] != self.parent_ticket_id or not state["last_run"]:
+            return False
+
+        self.last_run = datetime.fromisoformat(state["last_run"])
+        self.formatted_tree = state["formatted_tree"]
+        self.types_to_keys = defaultdict(list, state["types_to_keys"])
+        self.cache_fragments = True
+        self._markdown_fragments = {
+            key: {int(level): fragment for level, fragment in levels.items()}
+            for key, levels in state["markdown_fragments"].items()
+        }
+        return True
+
+    def invalidate_entries(self, keys: Set[str]) -> None:
+        """Forget rendered output for tickets whose entry or children changed."""
+        for key in keys:
+            self._markdown_fragments.pop(key, None)
+
+    def get_issues_data(self, issue_keys: List[str]) -> Dict[str, Any]:
+        """Resolve a whole BFS frontier, serving unchanged issues from the cache.
+
+        The returned dict preserves the order of ``issue_keys`` so callers can
+        process results exactly as the serial path would.
+        """
+        if self.issue_cache is None:
+            return self.fetch_issues(issue_keys)
+
+        updated = self.get_updated_timestamps(issue_keys)
+        cached: Dict[str, Any] = {}
+        for key in issue_keys:
+            raw = self.issue_cache.get(key, updated.get(key))
+            if raw is not None:
+                cached[key] = self.issue_from_raw(raw)
+
+        fetched = self.fetch_issues([key for key in issue_keys if key not in cached])
+        for key, issue in fetched.items():
+            raw = self.issue_to_raw(issue)
+            self.issue_cache.put(key, raw, updated.get(key) or raw["fields"]["updated"])
+        self.issue_cache.flush()
+        return {
+            key: cached[key] if key in cached else fetched[key] for key in issue_keys
+        }
+
+    def fetch_issues(self, issue_keys: List[str]) -> Dict[str, Any]:
+        """Fetch issues from the source, fanning out over a bounded thread pool."""
+        return dict(
+            zip(issue_keys, self._map_concurrently(self.get_issue_data, issue_keys))
+        )
+
+    def _map_concurrently(self, func: Callable, items: List[Any]) -> List[Any]:
+        if self.max_workers == 1 or len(items) < 2:
+            return [func(item) for item in items]
+
+        workers = min(self.max_workers, len(items))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(func, items))
 
     def _create_ticket_tree_node(
         self,
         ticket_type: str,
-        parent: Union[TicketTree, None] = None,
-    ) -> TicketTree:
-        return TicketTree(parent=parent, ticket_type=ticket_type)
-
-    def find_node_in_ticket_tree(self, ticket_type: str) -> Union[TicketTree, None]:
-        if ticket_type in self._node_cache:
-            return self._node_cache[ticket_type]
-
-        if self.ticket_tree.ticket_type == ticket_type:
-            self._node_cache[ticket_type] = self.ticket_tree
-            return self.ticket_tree
-
-        search = deque(self.ticket_tree.child)
-        while search:
-            next_search = search.pop()
-            if next_search.ticket_type == ticket_type:
-                return next_search
-            for child in next_search.child:
-                if child.ticket_type == ticket_type:
-                    self._node_cache[ticket_type] = child
-                    return child
-                else:
-                    search.append(child)
-
-        return None
-
-    def get_next_children_set(self, current_node: TicketTree) -> Set[str]:
+        parent: Union[TicketNode, None] = None,
+    ) -> TicketNode:
+        return TicketNode(ticket_type, parent=parent)
+
+    @property
+    def ticket_tree(self) -> Union[TicketNode, None]:
+        return self._ticket_tree
+
+    @ticket_tree.setter
+    def ticket_tree(self, ticket_tree: Union[AnyTicketTree, None]) -> None:
+        # Pydantic models stop at the boundary, ingestion works on TicketNode
+        if isinstance(ticket_tree, TicketTree):
+            ticket_tree = ticket_tree_to_node(ticket_tree)
+        self._ticket_tree = ticket_tree
+        self.invalidate_node_index()
+        if ticket_tree is not None:
+            self._node_index = self.build_node_index(ticket_tree)
+
+    def invalidate_node_index(self) -> None:
+        """Call after mutating the ticket tree in place, the index is rebuilt lazily."""
+        self._node_index = None
+
+    def build_node_index(self, ticket_tree: TicketNode) -> Dict[str, TicketNode]:
+        index: Dict[str, TicketNode] = {}
+        stack = [ticket_tree]
+        while stack:
+            node = stack.pop()
+            if node.ticket_type in index:
+                raise InvalidTicketStructureError(
+                    f"Ticket type {node.ticket_type} appears more than once in the ticket tree"
+                )
+            index[node.ticket_type] = node
+            stack.extend(node.child)
+        return index
+
+    def find_node_in_ticket_tree(self, ticket_type: str) -> Union[TicketNode, None]:
+        if self._node_index is None:
+            self._node_index = self.build_node_index(self.ticket_tree)
+        return self._node_index.get(ticket_type)
+
+    def get_next_children_set(self, current_node: TicketNode) -> Set[str]:
         return {child.ticket_type for child in current_node.child}
 
-    def link_to_parent(self, current_node: TicketTree, key_to_query: str):
+    def link_to_parent(self, current_node: TicketNode, key_to_query: str):
         if current_node.parent is None:
             return
 
@@ -69,9 +182,39 @@ class GenericIngester:
         summary = f"{summary}\n\n"
         return title + summary
 
-    def get_ticket_tree_as_markdown(self) -> str:
-        """Generate markdown representation of the ticket tree using DFS traversal."""
-        # Find the parent ticket
+    def render_entry(self, key: str, heading_level: int) -> str:
+        if not self.cache_fragments:
+            return self.parse_markdown(self.formatted_tree[key], heading_level)
+        levels = self._markdown_fragments.setdefault(key, {})
+        if heading_level not in levels:
+            levels[heading_level] = self.parse_markdown(
+                self.formatted_tree[key], heading_level
+            )
+        return levels[heading_level]
+
+    def ticket_fingerprint(self, key: str) -> str:
+        """
+        Hash of a ticket and its ancestor chain.
+
+        Walks upward through parent keys like PromptBuilder.get_ticket_description,
+        so it changes whenever the context a ticket's test was generated from does.
+        """
+        digest = sha256()
+        visited: Set[str] = set()
+        lookup: Union[str, None] = key
+        while lookup is not None and lookup not in visited:
+            visited.add(lookup)
+            entry = self.formatted_tree.get(lookup)
+            if entry is None:
+                raise InvalidTicketStructureError(
+                    f"Missing key in ticket metadata: {lookup}"
+                )
+            for field in ("ticket_type", "title", "description"):
+                digest.update(f"{entry[field] or ''}\0".encode())
+            lookup = entry.get("parent_key")
+        return digest.hexdigest()
+
+    def find_root_key(self) -> str:
         parent_keys = self.types_to_keys.get(self.ticket_tree.ticket_type, [])
 
         if not parent_keys:
@@ -86,58 +229,54 @@ class GenericIngester:
             raise ValueError(
                 f"Parent ticket {parent_keys[0]} not found in formatted tree"
             )
+        return parent_keys[0]
+
+    def iter_ticket_order(
+        self, parent_key: Union[str, None] = None, heading_level: int = 1
+    ) -> Generator[Tuple[str, int], None, None]:
+        """Yield (key, heading level) pairs in DFS pre-order using an explicit stack."""
+        if parent_key is None:
+            parent_key = self.find_root_key()
 
-        markdown = self.parse_markdown(parent_ticket, heading_level=1)
-        for keys in parent_keys:
-            markdown += self.process_children(keys, heading_level=2)
+        stack: List[Tuple[str, int]] = [(parent_key, heading_level)]
+        while stack:
+            key, level = stack.pop()
+            entry = self.formatted_tree.get(key)
+            if not entry:
+                continue
+            yield key, level
+            children = entry.get("children", [])
+            stack.extend((child_key, level + 1) for child_key in reversed(children))
+
+    def iter_ticket_tree_markdown(self) -> Generator[str, None, None]:
+        """Yield the markdown of each ticket in document order."""
+        for key, heading_level in self.iter_ticket_order():
+            yield self.render_entry(key, heading_level)
+
+    def get_ticket_tree_as_markdown(self) -> str:
+        """Generate markdown representation of the ticket tree using DFS traversal."""
+        return "".join(self.iter_ticket_tree_markdown())
 
-        return markdown
+    def write_ticket_tree_markdown(self, sink: TextIO) -> int:
+        """Stream the markdown into a text sink (a file, or ``socket.makefile("w")``)."""
+        written = 0
+        for chunk in self.iter_ticket_tree_markdown():
+            written += sink.write(chunk)
+        return written
 
     def process_children(self, parent_key: str, heading_level: int) -> str:
-        result = ""
-        parent_entry = self.formatted_tree.get(parent_key)
-        if not parent_entry:
-            return result
-        children = parent_entry.get("children", [])
-        for child_key in children:
-            child_entry = self.formatted_tree.get(child_key)
-            if not child_entry:
-                continue
-            result += self.parse_markdown(child_entry, heading_level)
-            result += self.process_children(child_key, heading_level + 1)
-        return result
+        children = self.iter_ticket_order(parent_key, heading_level - 1)
+        next(children, None)
+        return "".join(self.render_entry(key, level) for key, level in children)
 
     def write_tree_to_yaml(self, outfile: Union[Path, str]):
         if self.ticket_tree is None:
             raise ValueError("Initialize A ticket tree")
 
-        parent_as_dict = {
-            "ticket_type": self.ticket_tree.ticket_type,
-            "action": self.ticket_tree.action.value,
-            "child": [],
-        }
-        last_added = parent_as_dict
-
-        member: TicketTree
-        queue = deque([*self.ticket_tree.child])
-        while queue:
-            member = queue.popleft()
-            as_dict = {
-                "ticket_type": member.ticket_type,
-                "action": member.action.value,
-                "child": [],
-            }
-            last_added["child"].append(as_dict)
-            last_added = as_dict
-            queue.extend(member.child)
-
-        root = {"root": parent_as_dict}
+        root = ticket_tree_to_yaml_dict(self.ticket_tree)
 
         with open(outfile, "w") as ff:
-            yaml.dump(
-                root,
-                ff,
-            )
+            yaml.dump(root, ff, Dumper=YAML_DUMPER, sort_keys=False)
 
     def build_tree_from_ticket_id(self, ticket_id: str) -> None:
         # This can read a ticket id and build a tree of tests
@@ -146,12 +285,17 @@ class GenericIngester:
     def build_formatted_tree(self) -> None:
         raise NotImplementedError(ERROR_MESSAGE)
 
+    def build_formatted_tree_incremental(
+        self, state_path: Union[Path, str]
+    ) -> Set[str]:
+        raise NotImplementedError(ERROR_MESSAGE)
+
     def append_next(
-        self, current_node: TicketTree, queue: deque, next_issue: Any, found_key: str
+        self, current_node: TicketNode, queue: deque, next_issue: Any, found_key: str
     ):
         raise NotImplementedError(ERROR_MESSAGE)
 
-    def build_entry(self, next_issue: Any, current_node: TicketTree) -> TicketDict:
+    def build_entry(self, next_issue: Any, current_node: TicketNode) -> TicketDict:
         raise NotImplementedError(ERROR_MESSAGE)
 
     def _is_valid_issue_link(self, issue_link: Any) -> Union[Dict, None]:
@@ -159,3 +303,12 @@ class GenericIngester:
 
     def get_issue_data(self, issue_key: str):
         raise NotImplementedError(ERROR_MESSAGE)
+
+    def get_updated_timestamps(self, issue_keys: List[str]) -> Dict[str, str]:
+        raise NotImplementedError(ERROR_MESSAGE)
+
+    def issue_to_raw(self, issue: Any) -> Dict[str, Any]:
+        raise NotImplementedError(ERROR_MESSAGE)
+
+    def issue_from_raw(self, raw: Dict[str, Any]) -> Any:
+        raise NotImplementedError(ERROR_MESSAGE)
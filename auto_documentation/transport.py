@@ -0,0 +1,231 @@
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Union
+from urllib.parse import urlparse
+import logging
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 502, 503, 504}
+# Methods that can be sent twice without writing twice
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"})
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every worker that talks to one server."""
+
+    def __init__(self, rate: float, capacity: Union[int, None] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Block until ``tokens`` are available, returning the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = max(
+                    self._paused_until - now, (tokens - self._tokens) / self.rate
+                )
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens, e.g. while the server asks us to back off."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 5
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    # POST and PATCH may write twice when retried, callers opt in when they do not
+    retry_non_idempotent: bool = False
+
+    def allows(self, method: Union[str, None]) -> bool:
+        return self.retry_non_idempotent or (method or "GET").upper() in (
+            IDEMPOTENT_METHODS
+        )
+
+    def delay(self, attempt: int, retry_after: Union[str, None] = None) -> float:
+        """Seconds to wait before retry ``attempt``, honouring Retry-After."""
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+            try:
+                retry_at = parsedate_to_datetime(retry_after).timestamp()
+                return max(0.0, retry_at - time.time())
+            except (TypeError, ValueError, IndexError, OverflowError):
+                logger.debug("Ignoring malformed Retry-After: %r", retry_after)
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+@dataclass
+class RequestMetrics:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Dict[int, int] = field(default_factory=dict)
+    retries: int = 0
+    throttled_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, method: str, url: str, status: int, latency: float) -> None:
+        with self._lock:
+            self.latencies.append(latency)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+        logger.debug(
+            "%s %s -> %s in %.1fms", method, urlparse(url).path, status, latency * 1000
+        )
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record_throttle(self, seconds: float) -> None:
+        with self._lock:
+            self.throttled_seconds += seconds
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            ordered = sorted(self.latencies)
+            statuses = dict(self.statuses)
+        if not ordered:
+            return {"requests": 0, "retries": self.retries, "statuses": statuses}
+        return {
+            "requests": len(ordered),
+            "retries": self.retries,
+            "statuses": statuses,
+            "throttled_seconds": self.throttled_seconds,
+            "mean": sum(ordered) / len(ordered),
+            "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max": ordered[-1],
+        }
+
+
+@dataclass
+class TransportSettings:
+    pool_size: int = 10
+    rate_limit: Union[float, None] = None
+    burst: Union[int, None] = None
+    max_retries: int = 5
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    retry_non_idempotent: bool = False
+
+    @classmethod
+    def from_config(cls, config: Any, prefix: str = "jira_") -> "TransportSettings":
+        defaults = cls()
+        return cls(
+            **{
+                name: config.get(f"{prefix}{name}", getattr(defaults, name))
+                for name in cls.__dataclass_fields__
+            }
+        )
+
+
+class ThrottledAdapter(HTTPAdapter):
+    """
+    Pooled keep-alive adapter that rate limits, retries and times every request.
+
+    Throttled or unavailable responses are retried with exponential backoff,
+    for idempotent methods only unless the retry policy opts in to all.
+    A 429 also pauses the shared bucket for its Retry-After so that every
+    worker backs off together instead of hammering the server.
+    """
+
+    def __init__(
+        self,
+        bucket: Union[TokenBucket, None] = None,
+        retry_policy: Union[RetryPolicy, None] = None,
+        metrics: Union[RequestMetrics, None] = None,
+        pool_size: int = 10,
+    ):
+        self.bucket = bucket
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.metrics = metrics or RequestMetrics()
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        attempt = 0
+        max_retries = (
+            self.retry_policy.max_retries
+            if self.retry_policy.allows(request.method)
+            else 0
+        )
+        while True:
+            if self.bucket is not None:
+                self.metrics.record_throttle(self.bucket.acquire())
+            started = time.perf_counter()
+            try:
+                response = super().send(request, **kwargs)
+            except requests.ConnectionError:
+                if attempt >= max_retries:
+                    raise
+                self.metrics.record_retry()
+                time.sleep(self.retry_policy.delay(attempt))
+                attempt += 1
+                continue
+
+            self.metrics.record(
+                request.method,
+                request.url,
+                response.status_code,
+                time.perf_counter() - started,
+            )
+            if response.status_code not in RETRY_STATUSES or attempt >= max_retries:
+                return response
+
+            delay = self.retry_policy.delay(
+                attempt, response.headers.get("Retry-After")
+            )
+            if response.status_code == 429 and self.bucket is not None:
+                self.bucket.pause(delay)
+            response.close()
+            self.metrics.record_retry()
+            time.sleep(delay)
+            attempt += 1
+
+
+def mount_transport(
+    session: requests.Session, settings: TransportSettings
+) -> ThrottledAdapter:
+    bucket = None
+    if settings.rate_limit:
+        bucket = TokenBucket(settings.rate_limit, settings.burst)
+    adapter = ThrottledAdapter(
+        bucket=bucket,
+        retry_policy=RetryPolicy(
+            settings.max_retries,
+            settings.backoff_base,
+            settings.backoff_max,
+            settings.retry_non_idempotent,
+        ),
+        pool_size=settings.pool_size,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return adapter
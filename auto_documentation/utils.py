@@ -1,15 +1,29 @@
-from auto_documentation.custom_types import TicketTree, FileType
-from typing import Generator, Dict, Any, Union, List
+from auto_documentation.custom_types import (
+    ActionType,
+    AnyTicketTree,
+    TicketTree,
+    FileType,
+)
+from auto_documentation.custom_exceptions import InvalidTicketStructureError
+from typing import Generator, Dict, Any, Union, List, Tuple
 import yaml
 from pathlib import Path
 import jsonlines
 
+# Prefer the libyaml bindings when PyYAML was built with them
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+TICKET_TREE_YAML_KEYS = {"ticket_type", "action", "initial_index", "child"}
+ACTION_VALUES = {action.value for action in ActionType}
 
-def ticket_tree_is_testable(ticket_tree: TicketTree) -> bool:
+
+def ticket_tree_is_testable(ticket_tree: AnyTicketTree) -> bool:
     return ticket_tree.action is not None and ticket_tree.action == "Test"
 
 
-def find_testable_ticket(ticket_tree: TicketTree) -> Generator[TicketTree, None, None]:
+def find_testable_ticket(
+    ticket_tree: AnyTicketTree,
+) -> Generator[AnyTicketTree, None, None]:
     if ticket_tree_is_testable(ticket_tree):
         yield ticket_tree
     for child in ticket_tree.child:
@@ -19,13 +33,13 @@ def find_testable_ticket(ticket_tree: TicketTree) -> Generator[TicketTree, None,
             yield from find_testable_ticket(child)
 
 
-def is_leaf(ticket_tree: TicketTree) -> bool:
+def is_leaf(ticket_tree: AnyTicketTree) -> bool:
     return len(ticket_tree.child) == 0 and ticket_tree_is_testable(ticket_tree)
 
 
 # TODO: This would only work if each child has a depth of one -> would miss with multiple children
 # Should adopt a bfs -> i.e search through all the children of the current node
-def check_leaf_is_testable(ticket_tree: TicketTree) -> bool:
+def check_leaf_is_testable(ticket_tree: AnyTicketTree) -> bool:
     if is_leaf(ticket_tree):
         return True
 
@@ -44,34 +58,115 @@ def get_ticket_tree_structure(ticket_tree_src: FileType) -> TicketTree:
 
     try:
         with open(ticket_tree_src, mode="r") as src:
-            yaml_data = yaml.safe_load(src)
+            yaml_data = yaml.load(src, Loader=YAML_LOADER)
     except yaml.YAMLError as exc:
-        raise yaml.YAMLError("Could not open src file")
+        raise yaml.YAMLError("Could not open src file") from exc
 
     # Parse yaml file to ticket tree
     as_ticket_tree = yaml_file_to_ticket_tree(yaml_dict=yaml_data)
     return as_ticket_tree
 
 
+def _node_children(node: Dict[str, Any]) -> List[Dict[str, Any]]:
+    children = node.get("child")
+    if children is None:
+        return []
+    if isinstance(children, dict):
+        return [children]
+    return children
+
+
+def validate_ticket_tree_yaml(yaml_dict: Any) -> None:
+    """
+    Check the whole template once before anything is built.
+
+    Issues are matched to template nodes by their type alone, so a ticket
+    type may only appear once in the whole tree.
+    """
+    if not isinstance(yaml_dict, dict) or not isinstance(yaml_dict.get("root"), dict):
+        raise InvalidTicketStructureError("Ticket tree must have a 'root' mapping")
+
+    stack: List[Tuple[str, Any]] = [("root", yaml_dict["root"])]
+    seen_types: Dict[str, str] = {}
+    while stack:
+        path, node = stack.pop()
+        if not isinstance(node, dict):
+            raise InvalidTicketStructureError(f"{path} must be a mapping")
+        unknown = set(node) - TICKET_TREE_YAML_KEYS
+        if unknown:
+            raise InvalidTicketStructureError(
+                f"{path} has unknown keys: {sorted(unknown)}"
+            )
+        if not isinstance(node.get("ticket_type"), str) or not node["ticket_type"]:
+            raise InvalidTicketStructureError(f"{path}.ticket_type must be a string")
+        ticket_type = node["ticket_type"]
+        if ticket_type in seen_types:
+            raise InvalidTicketStructureError(
+                f"Ticket type {ticket_type} appears at both {seen_types[ticket_type]} "
+                f"and {path}, each ticket type may only appear once"
+            )
+        seen_types[ticket_type] = path
+        if "action" in node and node["action"] not in ACTION_VALUES:
+            raise InvalidTicketStructureError(
+                f"{path}.action must be one of {sorted(ACTION_VALUES)}"
+            )
+        if "initial_index" in node and not isinstance(node["initial_index"], int):
+            raise InvalidTicketStructureError(
+                f"{path}.initial_index must be an integer"
+            )
+        children = node.get("child")
+        if children is not None and not isinstance(children, (dict, list)):
+            raise InvalidTicketStructureError(
+                f"{path}.child must be a mapping or a list of mappings"
+            )
+        if isinstance(children, dict):
+            stack.append((f"{path}.child", children))
+        elif children is not None:
+            stack.extend(
+                (f"{path}.child[{index}]", child)
+                for index, child in enumerate(children)
+            )
+
+
+def _ticket_tree_kwargs(node: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in node.items() if key != "child"}
+
+
 def yaml_file_to_ticket_tree(yaml_dict: Dict[str, Any]) -> TicketTree:
+    """Build a ticket tree whose nodes may have any number of children."""
+    validate_ticket_tree_yaml(yaml_dict)
+
     root: Dict[str, Any] = yaml_dict["root"]
-    children = root.pop("child")
-    as_ticket_tree = TicketTree(**root)
-    parent = as_ticket_tree
-
-    while children:
-        if "child" in children:
-            next_children = children.pop("child")
-            # TODO: Here is where we need to handle the case where the children is a list
-            # For now we assume only one child is allowed
-            # Here is where we need to handle the case where the children is a list
-            assert isinstance(next_children, dict)
-        else:
-            next_children = None
-        children["parent"] = parent
-        as_ticket = TicketTree(**children)
-        parent.child.append(as_ticket)
-        parent = as_ticket
-        children = next_children
+    as_ticket_tree = TicketTree(**_ticket_tree_kwargs(root))
+    stack = [(root, as_ticket_tree)]
+    while stack:
+        node, parent = stack.pop()
+        for child in _node_children(node):
+            as_ticket = TicketTree(parent=parent, **_ticket_tree_kwargs(child))
+            parent.child.append(as_ticket)
+            stack.append((child, as_ticket))
 
     return as_ticket_tree
+
+
+def ticket_tree_to_yaml_dict(ticket_tree: AnyTicketTree) -> Dict[str, Any]:
+    """Inverse of yaml_file_to_ticket_tree, children are always written as lists."""
+
+    def as_dict(node: AnyTicketTree) -> Dict[str, Any]:
+        node_dict: Dict[str, Any] = {
+            "ticket_type": node.ticket_type,
+            "action": ActionType(node.action).value,
+        }
+        if node.initial_index:
+            node_dict["initial_index"] = node.initial_index
+        return node_dict
+
+    root = as_dict(ticket_tree)
+    stack = [(ticket_tree, root)]
+    while stack:
+        node, node_dict = stack.pop()
+        if node.child:
+            node_dict["child"] = [as_dict(child) for child in node.child]
+            stack.extend(zip(node.child, node_dict["child"]))
+
+    return {"root": root}
@@ -0,0 +1,55 @@
+"""One DOCX per epic: a single conversion repeated against the batch API.
+
+Run with ``python -m benchmarks.bench_batch_docx [documents] [pages] [workers ...]``.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from auto_documentation.convert_to_file.to_word import (
+    HtmlToWordConverter,
+    convert_documents,
+)
+from auto_documentation.markdown_converter.html_validator import HTMLProcessor
+from auto_documentation.markdown_converter.markdown import parse_events
+from benchmarks.bench_docx_writer import generate_pages
+
+
+def generate_epics(count: int, pages: int):
+    markdown = "".join(generate_pages(pages)).split("\n")
+    return [
+        HTMLProcessor.from_events(parse_events(markdown)).root for _ in range(count)
+    ]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    workers = [int(arg) for arg in sys.argv[3:]] or sorted({1, 2, os.cpu_count()})
+    epics = generate_epics(count, pages)
+    print(f"{count} documents of {pages} pages, {os.cpu_count()} CPU(s)")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        started = time.perf_counter()
+        for index, epic in enumerate(epics):
+            converter = HtmlToWordConverter(epic, None)
+            converter.save_to_file(Path(tmp_dir) / f"single-{index}.docx")
+        baseline = time.perf_counter() - started
+        print(f"{count} x single conversion {baseline * 1000:.0f}ms")
+
+        for worker_count in workers:
+            started = time.perf_counter()
+            convert_documents(
+                [
+                    (Path(tmp_dir) / f"batch-{index}.docx", epic)
+                    for index, epic in enumerate(epics)
+                ],
+                max_workers=worker_count,
+            )
+            elapsed = time.perf_counter() - started
+            print(
+                f"batch, {worker_count} worker(s)   {elapsed * 1000:.0f}ms "
+                f"(x{baseline / elapsed:.2f})"
+            )
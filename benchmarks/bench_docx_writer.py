@@ -0,0 +1,69 @@
+"""Event stream to DOCX conversion time for a generated document.
+
+Run with ``python -m benchmarks.bench_docx_writer [pages]``.
+"""
+
+import sys
+import tempfile
+import time
+from docx.enum.style import WD_STYLE_TYPE
+from pathlib import Path
+from auto_documentation.convert_to_file.to_word import DocxWriter
+from auto_documentation.markdown_converter.markdown import parse_events
+
+PARAGRAPH = (
+    "Paragraph {index} describes the behaviour under test with _emphasis_ and "
+    "__strong__ words, enough of them to fill a few lines of the page and make "
+    "the run layout look like a real ticket description written by a person.\n"
+)
+# Roughly one printed page: a heading, three paragraphs, a list and a table
+PAGE = (
+    "## Page {index}\n"
+    + PARAGRAPH * 3
+    + "* Acceptance criterion one\n" * 5
+    + "| Field | Value |\n| ----- | ----- |\n"
+    + "| Owner | team {index} |\n" * 6
+    + "Closing paragraph of page {index}\n\n"
+)
+
+
+class UncachedStyleWriter(DocxWriter):
+    """Resolves every style by name, as passing style names to python-docx does."""
+
+    def style_id(self, name, style_type=WD_STYLE_TYPE.PARAGRAPH):
+        return self.doc.part.get_style_id(name, style_type)
+
+
+def generate_pages(count: int):
+    return [PAGE.format(index=index) for index in range(count)]
+
+
+def run(writer_cls, events):
+    started = time.perf_counter()
+    writer = writer_cls()
+    writer.write_events(events)
+    converted = time.perf_counter() - started
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        started = time.perf_counter()
+        writer.doc.save(Path(tmp_dir) / "bench.docx")
+        saved = time.perf_counter() - started
+    return writer.doc, converted, saved
+
+
+if __name__ == "__main__":
+    pages = generate_pages(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
+    started = time.perf_counter()
+    events = list(parse_events("".join(pages).split("\n")))
+    print(
+        f"parsed {len(events)} events in {(time.perf_counter() - started) * 1000:.0f}ms"
+    )
+    for label, writer_cls in (
+        ("cached styles", DocxWriter),
+        ("style names", UncachedStyleWriter),
+    ):
+        doc, converted, saved = run(writer_cls, events)
+        print(
+            f"{len(pages)} pages, {label:13}: {len(doc.paragraphs)} paragraphs and "
+            f"{len(doc.tables)} tables in {converted * 1000:.0f}ms, "
+            f"saved in {saved * 1000:.0f}ms"
+        )
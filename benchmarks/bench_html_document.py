@@ -0,0 +1,125 @@
+"""Memory and traversal cost of HtmlNode trees against an HtmlDocument.
+
+Run with ``python -m benchmarks.bench_html_document [elements]``.
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from collections import deque
+from auto_documentation.markdown_converter.events import CLOSE, OPEN, TEXT
+from auto_documentation.markdown_converter.html_document import HtmlDocument
+from auto_documentation.markdown_converter.html_validator import (
+    HTMLProcessor,
+    SupportedTags,
+)
+
+# 15 elements per section
+SECTION = (
+    [(OPEN, "h2"), (TEXT, "Section {index}"), (CLOSE, "h2")]
+    + [(OPEN, "p"), (TEXT, "Text for section {index}"), (CLOSE, "p")]
+    + [(OPEN, "table")]
+    + [(OPEN, "tr")]
+    + [(OPEN, "th"), (TEXT, "Field"), (CLOSE, "th")] * 2
+    + [(CLOSE, "tr"), (OPEN, "tr")]
+    + [(OPEN, "td"), (TEXT, "Value {index}"), (CLOSE, "td")] * 2
+    + [(CLOSE, "tr"), (CLOSE, "table")]
+    + [(OPEN, "ul")]
+    + [(OPEN, "li"), (TEXT, "Item {index}"), (CLOSE, "li")] * 4
+    + [(CLOSE, "ul"), (OPEN, "em"), (CLOSE, "em")]
+)
+
+
+def generate_events(elements: int):
+    for index in range(elements // 15):
+        for kind, value in SECTION:
+            yield kind, value.format(index=index) if kind == TEXT else value
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    built = build()
+    elapsed = time.perf_counter() - started
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built, size, elapsed
+
+
+def count_nodes_tree(root, tag: SupportedTags) -> int:
+    found = 0
+    queue = deque([root])
+    while queue:
+        node = queue.popleft()
+        found += node.enum_value is tag
+        queue.extend(node.children)
+    return found
+
+
+def iter_tree(root):
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.children)
+
+
+if __name__ == "__main__":
+    elements = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    processor, tree_bytes, tree_time = measure(
+        lambda: HTMLProcessor.from_events(generate_events(elements))
+    )
+    document, document_bytes, document_time = measure(
+        lambda: HtmlDocument.from_events(generate_events(elements))
+    )
+    print(f"{len(document) - 1} elements")
+    print(
+        f"HtmlNode tree  {tree_bytes / 1024 / 1024:7.1f} MiB  "
+        f"built in {tree_time * 1000:.0f}ms"
+    )
+    print(
+        f"HtmlDocument   {document_bytes / 1024 / 1024:7.1f} MiB  "
+        f"built in {document_time * 1000:.0f}ms  ({tree_bytes / document_bytes:.1f}x smaller)"
+    )
+
+    started = time.perf_counter()
+    tree_count = count_nodes_tree(processor.root, SupportedTags.TD)
+    tree_walk = time.perf_counter() - started
+    started = time.perf_counter()
+    document_count = len(document.find_all(SupportedTags.TD))
+    document_walk = time.perf_counter() - started
+    assert tree_count == document_count
+    print(
+        f"find {tree_count} <td>: tree walk {tree_walk * 1000:.0f}ms, "
+        f"document scan {document_walk * 1000:.1f}ms"
+    )
+
+    started = time.perf_counter()
+    content = sum(len(node.content or "") for node in iter_tree(processor.root))
+    tree_walk = time.perf_counter() - started
+    started = time.perf_counter()
+    view_content = sum(len(node.content or "") for node in iter_tree(document.root))
+    view_walk = time.perf_counter() - started
+    started = time.perf_counter()
+    document_content = sum(len(text) for _, text in document.iter_contents())
+    document_walk = time.perf_counter() - started
+    assert content == view_content == document_content
+    print(
+        f"sum content: tree walk {tree_walk * 1000:.0f}ms, "
+        f"view walk {view_walk * 1000:.0f}ms, "
+        f"iter_contents {document_walk * 1000:.0f}ms"
+    )
+
+    started = time.perf_counter()
+    tree_hash = processor.root.structural_hash()
+    tree_walk = time.perf_counter() - started
+    started = time.perf_counter()
+    document_hash = document.structural_hash()
+    document_walk = time.perf_counter() - started
+    assert tree_hash == document_hash
+    print(
+        f"structural hash: tree {tree_walk * 1000:.0f}ms, "
+        f"document {document_walk * 1000:.0f}ms"
+    )
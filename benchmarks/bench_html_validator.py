@@ -0,0 +1,65 @@
+"""Validation throughput of HTMLProcessor on a generated handbook.
+
+Run with ``python -m benchmarks.bench_html_validator [size_in_mb]``.
+"""
+
+import sys
+import time
+from auto_documentation.markdown_converter.html_validator import (
+    HTMLProcessor,
+    diff_nodes,
+)
+
+SECTION = (
+    "<h2>Section {index}</h2><p>Paragraph text for section {index} of the handbook "
+    "with <strong>bold</strong> and <em>italic</em> words.</p>"
+    "<table><tr><th>Header 1</th><th>Header 2</th></tr>"
+    "<tr><td>Cell 1</td><td>Cell 2</td></tr></table>"
+    "<ul><li>Item 1</li><li>Item 2</li></ul>"
+)
+
+
+def generate_handbook(size_mb: float) -> str:
+    target = int(size_mb * 1024 * 1024)
+    sections = []
+    written = 0
+    index = 0
+    while written < target:
+        section = SECTION.format(index=index)
+        sections.append(section)
+        written += len(section)
+        index += 1
+    return "<h1>Handbook</h1>" + "".join(sections)
+
+
+if __name__ == "__main__":
+    size = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    html = generate_handbook(size)
+    started = time.perf_counter()
+    processor = HTMLProcessor(html)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{len(html) / 1024 / 1024:.1f} MiB validated={processor.valid} "
+        f"in {elapsed * 1000:.0f}ms"
+    )
+    for pretty in (False, True):
+        started = time.perf_counter()
+        serialized = processor.root.serialize(pretty=pretty)
+        elapsed = time.perf_counter() - started
+        print(
+            f"serialize pretty={pretty}: {len(serialized) / 1024 / 1024:.1f} MiB "
+            f"in {elapsed * 1000:.0f}ms"
+        )
+
+    edited = HTMLProcessor(html.replace("Section 7<", "Section seven<", 1))
+    started = time.perf_counter()
+    processor.root.structural_hash()
+    edited.root.structural_hash()
+    hashed = time.perf_counter() - started
+    started = time.perf_counter()
+    changes = diff_nodes(processor.root, edited.root)
+    elapsed = time.perf_counter() - started
+    print(
+        f"hash both trees in {hashed * 1000:.0f}ms, "
+        f"diff {len(changes)} change(s) in {elapsed * 1000:.0f}ms"
+    )
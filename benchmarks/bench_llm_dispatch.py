@@ -0,0 +1,40 @@
+"""Prompt dispatch against a mock provider with a request quota.
+
+Run with ``python -m benchmarks.bench_llm_dispatch [prompts] [latency] [rate_limit]``.
+"""
+
+import sys
+import time
+from auto_documentation.prompt_builder.llm_dispatch import (
+    PromptDispatcher,
+    dispatch_prompts,
+)
+from tests.fake_llm_server import FakeLLMServer
+from tests.llm_dispatch_test import make_prompts
+
+
+def timed_dispatch(server: FakeLLMServer, count: int, **config) -> float:
+    dispatcher = PromptDispatcher.from_config(server.config(**config))
+    started = time.perf_counter()
+    outputs = dispatch_prompts(make_prompts(count), dispatcher)
+    elapsed = time.perf_counter() - started
+    assert len(outputs) == count and not dispatcher.failed
+    return elapsed
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    rate_limit = float(sys.argv[3]) if len(sys.argv) > 3 else 20
+    with FakeLLMServer(latency=latency) as server:
+        print(
+            f"{count} prompts, {latency * 1000:.0f}ms per request, {rate_limit:g} req/s"
+        )
+        for name, config in [
+            ("one at a time        ", {"llm_max_in_flight": 1}),
+            ("16 in flight         ", {"llm_max_in_flight": 16}),
+            ("16 in flight, batch 8", {"llm_max_in_flight": 16, "llm_batch_size": 8}),
+        ]:
+            config["llm_rate_limit"] = rate_limit
+            elapsed = timed_dispatch(server, count, **config)
+            print(f"{name} {elapsed * 1000:.0f}ms")
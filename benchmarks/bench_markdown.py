@@ -0,0 +1,29 @@
+"""Throughput of MarkDownParser on copies of tests/test_data/large_markdown_file.md.
+
+Run with ``python -m benchmarks.bench_markdown [copies]``.
+"""
+
+import sys
+import time
+from pathlib import Path
+from auto_documentation.markdown_converter.markdown import parse
+
+SAMPLE = Path(__file__).parent.parent / "tests" / "test_data" / "large_markdown_file.md"
+
+
+def generate_document(copies: int) -> str:
+    return "\n".join([SAMPLE.read_text()] * copies)
+
+
+if __name__ == "__main__":
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    text = generate_document(copies)
+    elapsed = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        html = parse(text)
+        elapsed = min(elapsed, time.perf_counter() - started)
+    print(
+        f"{len(text) / 1024:.0f} KiB -> {len(html) / 1024:.0f} KiB "
+        f"in {elapsed * 1000:.0f}ms ({len(text) / 1024 / 1024 / elapsed:.2f} MiB/s)"
+    )
@@ -0,0 +1,39 @@
+"""Per-ticket markdown conversion on a process pool against a single worker.
+
+Run with ``python -m benchmarks.bench_parallel_markdown [tickets] [workers ...]``.
+"""
+
+import os
+import sys
+import time
+from auto_documentation.markdown_converter.markdown import parse_fragments
+
+TICKET = (
+    "## Ticket {index}\n"
+    "Description for ticket {index} with _some_ __formatting__ applied\n"
+    "| Field | Value |\n"
+    "| ----- | ----- |\n"
+    "| Owner | team {index} |\n"
+    "* Acceptance criterion one\n"
+    "* Acceptance criterion two\n"
+    "Closing paragraph of ticket {index}\n\n"
+)
+
+
+def generate_tickets(count: int):
+    return [TICKET.format(index=index) for index in range(count)]
+
+
+if __name__ == "__main__":
+    tickets = generate_tickets(int(sys.argv[1]) if len(sys.argv) > 1 else 4000)
+    workers = [int(arg) for arg in sys.argv[2:]] or sorted({1, 2, os.cpu_count()})
+    baseline = None
+    for worker_count in workers:
+        started = time.perf_counter()
+        events = sum(1 for _ in parse_fragments(tickets, worker_count))
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        print(
+            f"workers={worker_count} {len(tickets)} tickets {events} events "
+            f"in {elapsed * 1000:.0f}ms (x{baseline / elapsed:.2f})"
+        )
@@ -0,0 +1,35 @@
+"""Cold against warm rendering of an epic through the on-disk render cache.
+
+Run with ``python -m benchmarks.bench_render_cache [tickets]``.
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+from auto_documentation.markdown_converter.markdown import parse_fragments
+from auto_documentation.markdown_converter.render_cache import RenderCache
+from benchmarks.bench_parallel_markdown import generate_tickets
+
+
+def timed_render(tickets, cache):
+    started = time.perf_counter()
+    for _ in parse_fragments(tickets, cache=cache):
+        pass
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    tickets = generate_tickets(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_path = Path(tmp_dir) / "render.log"
+        uncached = timed_render(tickets, None)
+        cold = timed_render(tickets, RenderCache(cache_path))
+        disk_cache = RenderCache(cache_path)
+        from_disk = timed_render(tickets, disk_cache)
+        in_memory = timed_render(tickets, disk_cache)
+    print(f"{len(tickets)} tickets")
+    print(f"no cache        {uncached * 1000:.0f}ms")
+    print(f"cold cache      {cold * 1000:.0f}ms")
+    print(f"warm from disk  {from_disk * 1000:.0f}ms")
+    print(f"warm in memory  {in_memory * 1000:.0f}ms  {disk_cache.stats}")
@@ -0,0 +1,39 @@
+"""Wall time of generated ticket tests with one pytest session against many.
+
+Run with ``python -m benchmarks.bench_test_runner [tests] [workers ...]``.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from auto_documentation.test_runner.test_runner import TestRunnerFromFolder
+
+# Generated ticket tests mostly wait on the system under test
+TICKET_TEST = "import time\n\n\ndef test_{name}():\n    time.sleep(0.2)\n"
+
+
+def generate_tests(folder: Path, count: int):
+    keys = [f"BENCH-{index}" for index in range(count)]
+    for key in keys:
+        name = key.replace("-", "_")
+        (folder / f"test_{key}.py").write_text(TICKET_TEST.format(name=name))
+    return keys
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    workers = [int(arg) for arg in sys.argv[2:]] or sorted({1, 4, os.cpu_count()})
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        keys = generate_tests(Path(tmp_dir), count)
+        for max_workers in workers:
+            runner = TestRunnerFromFolder(tmp_dir, keys, max_workers=max_workers)
+            started = time.perf_counter()
+            results = runner.run_tests()
+            elapsed = time.perf_counter() - started
+            passed = sum(result.status == "PASS" for result in results)
+            print(
+                f"{count} tests, {max_workers} worker(s): {passed} passed "
+                f"in {elapsed * 1000:.0f}ms"
+            )
@@ -0,0 +1,54 @@
+"""Chunked shards against duration-aware shards for skewed ticket tests.
+
+Run with ``python -m benchmarks.bench_test_scheduling [tests] [workers]``.
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+from auto_documentation.test_runner.test_runner import TestRunnerFromFolder
+from auto_documentation.test_runner.timing_store import TestTimingStore
+
+TICKET_TEST = "import time\n\n\ndef test_{name}():\n    time.sleep({seconds})\n"
+# Every tenth ticket is a slow integration style test, placed side by side
+# the way keys for one story are generated together
+SLOW_SECONDS = 2.0
+FAST_SECONDS = 0.05
+
+
+def generate_tests(folder: Path, count: int):
+    keys = [f"SCHED-{index}" for index in range(count)]
+    slow = count // 10
+    for index, key in enumerate(keys):
+        seconds = SLOW_SECONDS if index < slow else FAST_SECONDS
+        name = key.replace("-", "_")
+        (folder / f"test_{key}.py").write_text(
+            TICKET_TEST.format(name=name, seconds=seconds)
+        )
+    return keys
+
+
+def timed_run(runner: TestRunnerFromFolder) -> float:
+    started = time.perf_counter()
+    runner.run_tests()
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        folder = Path(tmp_dir) / "tests"
+        folder.mkdir()
+        keys = generate_tests(folder, count)
+
+        chunked = TestRunnerFromFolder(folder, keys, max_workers=workers)
+        print(f"chunked shards          {timed_run(chunked) * 1000:.0f}ms")
+
+        store = TestTimingStore(Path(tmp_dir) / "timings.jsonl")
+        scheduled = TestRunnerFromFolder(
+            folder, keys, max_workers=workers, timing_store=store
+        )
+        print(f"first run, no history   {timed_run(scheduled) * 1000:.0f}ms")
+        print(f"scheduled from history  {timed_run(scheduled) * 1000:.0f}ms")
@@ -0,0 +1,47 @@
+"""Test stage time on a stable epic with and without change-based selection.
+
+Run with ``python -m benchmarks.bench_test_selection [tests] [changed] [workers]``.
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+from auto_documentation.test_runner.test_runner import TestRunnerFromFolder
+from auto_documentation.test_runner.timing_store import TestTimingStore
+from benchmarks.bench_test_runner import generate_tests
+
+
+def timed_run(runner: TestRunnerFromFolder, fingerprints) -> float:
+    started = time.perf_counter()
+    runner.run_tests(fingerprints=fingerprints)
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    changed = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        folder = Path(tmp_dir) / "tests"
+        folder.mkdir()
+        keys = generate_tests(folder, count)
+        runner = TestRunnerFromFolder(
+            folder,
+            keys,
+            max_workers=workers,
+            timing_store=TestTimingStore(Path(tmp_dir) / "timings.jsonl"),
+        )
+        fingerprints = {key: f"{key}-v1" for key in keys}
+        print(f"every test                 {timed_run(runner, None) * 1000:.0f}ms")
+        print(
+            f"first selected run         {timed_run(runner, fingerprints) * 1000:.0f}ms"
+        )
+        print(
+            f"stable epic                {timed_run(runner, fingerprints) * 1000:.0f}ms"
+        )
+        fingerprints.update({key: f"{key}-v2" for key in keys[:changed]})
+        print(
+            f"{changed} changed tickets          "
+            f"{timed_run(runner, fingerprints) * 1000:.0f}ms"
+        )
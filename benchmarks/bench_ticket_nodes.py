@@ -0,0 +1,57 @@
+"""Construction time and memory of TicketTree vs TicketNode trees.
+
+Run with ``python -m benchmarks.bench_ticket_nodes [node_count]``.
+"""
+
+import sys
+import time
+import tracemalloc
+from collections import deque
+from auto_documentation.custom_types import TicketNode, TicketTree
+
+FAN_OUT = 10
+
+
+def build(factory, node_count: int):
+    root = factory("Root", None)
+    frontier = deque([root])
+    built = 1
+    while built < node_count:
+        parent = frontier.popleft()
+        for _ in range(min(FAN_OUT, node_count - built)):
+            child = factory(f"Type-{built}", parent)
+            parent.child.append(child)
+            frontier.append(child)
+            built += 1
+    return root
+
+
+def pydantic_factory(ticket_type, parent):
+    return TicketTree(ticket_type=ticket_type, parent=parent)
+
+
+def slots_factory(ticket_type, parent):
+    return TicketNode(ticket_type, parent=parent)
+
+
+def measure(name: str, factory, node_count: int) -> None:
+    # Time and memory are measured in separate passes, tracing skews timings
+    started = time.perf_counter()
+    build(factory, node_count)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    tree = build(factory, node_count)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+    print(
+        f"{name:<10} {node_count} nodes: {elapsed:.3f}s, "
+        f"peak {peak / 1024 / 1024:.1f} MiB ({peak / node_count:.0f} B/node)"
+    )
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    measure("TicketTree", pydantic_factory, count)
+    measure("TicketNode", slots_factory, count)
@@ -0,0 +1,220 @@
+import json
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+from zoneinfo import ZoneInfo
+
+API_PREFIX = "/rest/api/2/"
+# The jira client only turns nested JSON into resources when it carries a "self" URL
+SELF_URL = "http://jira.invalid/rest/api/2/"
+UPDATED = "2024-01-01T00:00:00.000+0000"
+
+
+def make_issue(
+    key: str, issue_type: str, summary: str, links: List[Tuple[str, str, str]]
+) -> Dict[str, Any]:
+    """Build a raw Jira issue; ``links`` holds (direction, key, issue type) tuples."""
+    issue_links = []
+    for index, (direction, linked_key, linked_type) in enumerate(links):
+        issue_links.append(
+            {
+                "id": f"{key}-{index}",
+                "self": f"{SELF_URL}issueLink/{key}-{index}",
+                "type": {"name": "Contains"},
+                direction: {
+                    "key": linked_key,
+                    "fields": {"issuetype": {"name": linked_type}},
+                },
+            }
+        )
+    return {
+        "id": key,
+        "key": key,
+        "self": f"{SELF_URL}issue/{key}",
+        "fields": {
+            "summary": summary,
+            "description": f"Description of {key}",
+            "issuetype": {"self": f"{SELF_URL}issuetype/1", "name": issue_type},
+            "issuelinks": issue_links,
+            "updated": UPDATED,
+        },
+    }
+
+
+def build_program(stories: int, subtasks: int) -> Dict[str, Dict[str, Any]]:
+    """An Epic -> Story -> Sub-task program linked in both directions."""
+    issues: Dict[str, Dict[str, Any]] = {}
+    epic_links = []
+    for story_no in range(stories):
+        story_key = f"STORY-{story_no}"
+        epic_links.append(("outwardIssue", story_key, "Story"))
+        story_links = [("inwardIssue", "EPIC-1", "Epic")]
+        for task_no in range(subtasks):
+            task_key = f"TASK-{story_no}-{task_no}"
+            story_links.append(("outwardIssue", task_key, "Sub-task"))
+            issues[task_key] = make_issue(
+                task_key,
+                "Sub-task",
+                f"Task {story_no}.{task_no}",
+                [("inwardIssue", story_key, "Story")],
+            )
+        issues[story_key] = make_issue(
+            story_key, "Story", f"Story {story_no}", story_links
+        )
+    issues["EPIC-1"] = make_issue("EPIC-1", "Epic", "Program epic", epic_links)
+    return issues
+
+
+class FakeJiraServer:
+    """A tiny in-process Jira REST server used to exercise the ingesters."""
+
+    def __init__(self, issues: Dict[str, Dict[str, Any]]):
+        self.issues = issues
+        self.requests: Counter = Counter()
+        # Number of upcoming requests to answer with 429 Too Many Requests
+        self.throttle_next = 0
+        self.retry_after = "0"
+        # The Jira user's timezone, JQL dates are read in it, None for local time
+        self.time_zone: Union[str, None] = None
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def config(self, **extra: Any) -> Dict[str, Any]:
+        return {
+            "jira_project_url": self.url,
+            "jira_email": "tester@example.com",
+            "jira_auth": "token",
+            "jira_project_name": "TEST",
+            **extra,
+        }
+
+    def touch(self, key: str, **fields: Any) -> None:
+        """Edit an issue's fields and bump its updated timestamp to now."""
+        now = datetime.now().astimezone()
+        self.issues[key]["fields"].update(
+            fields, updated=now.strftime("%Y-%m-%dT%H:%M:%S.000%z")
+        )
+
+    def count(self, endpoint: str) -> int:
+        return self.requests[endpoint]
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.requests.clear()
+
+    def __enter__(self) -> "FakeJiraServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _record(self, endpoint: str) -> None:
+        with self._lock:
+            self.requests[endpoint] += 1
+
+    def _take_throttle(self) -> bool:
+        with self._lock:
+            if self.throttle_next <= 0:
+                return False
+            self.throttle_next -= 1
+            return True
+
+    def _route(self, path: str, query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        resource = path[len(API_PREFIX) :]
+        if resource == "serverInfo":
+            return 200, {
+                "versionNumbers": [9, 0, 0],
+                "deploymentType": "Server",
+                "serverTime": datetime.now()
+                .astimezone()
+                .strftime("%Y-%m-%dT%H:%M:%S.000%z"),
+            }
+        if resource == "myself":
+            user = {"name": "tester", "self": f"{SELF_URL}myself"}
+            if self.time_zone is not None:
+                user["timeZone"] = self.time_zone
+            return 200, user
+        if resource == "field":
+            return 200, [{"id": "summary", "clauseNames": ["summary"]}]
+        if resource.startswith("project/"):
+            name = resource.split("/", 1)[1]
+            return 200, {"id": "1", "key": name, "name": name}
+        if resource.startswith("issue/"):
+            key = resource.split("/", 1)[1]
+            if key not in self.issues:
+                return 404, {"errorMessages": [f"Issue {key} does not exist"]}
+            return 200, self.issues[key]
+        if resource == "search":
+            return 200, self._search(query)
+        return 404, {"errorMessages": [f"Unknown resource {resource}"]}
+
+    def _search(self, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        jql = query.get("jql", [""])[0]
+        start_at = int(query.get("startAt", ["0"])[0])
+        max_results = int(query.get("maxResults", ["50"])[0])
+        matched = list(self.issues.values())
+        key_clause = re.search(r"key in \(([^)]*)\)", jql)
+        if key_clause:
+            wanted = {key.strip() for key in key_clause.group(1).split(",")}
+            matched = [issue for issue in matched if issue["key"] in wanted]
+        updated_clause = re.search(r'updated >= "([^"]*)"', jql)
+        if updated_clause:
+            # JQL dates are in the user's timezone, local time unless set
+            since = datetime.strptime(updated_clause.group(1), "%Y-%m-%d %H:%M")
+            if self.time_zone is not None:
+                since = since.replace(tzinfo=ZoneInfo(self.time_zone))
+            else:
+                since = since.astimezone()
+            matched = [
+                issue
+                for issue in matched
+                if datetime.strptime(
+                    issue["fields"]["updated"], "%Y-%m-%dT%H:%M:%S.%f%z"
+                )
+                >= since
+            ]
+        page = matched[start_at : start_at + max_results]
+        return {
+            "startAt": start_at,
+            "maxResults": max_results,
+            "total": len(matched),
+            "issues": page,
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                server._record(parsed.path[len(API_PREFIX) :].split("/", 1)[0])
+                if server._take_throttle():
+                    self.send_response(429)
+                    self.send_header("Retry-After", server.retry_after)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                status, body = server._route(parsed.path, parse_qs(parsed.query))
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                return
+
+        return Handler
@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+
+def generated_test(prompt: Dict[str, Any]) -> Dict[str, str]:
+    name = prompt["test_name"].replace("-", "_")
+    return {
+        "python_code": f"def test_{name}():\n    assert True\n",
+        "Cucumber_file": f"Feature: {prompt['test_name']}\n",
+    }
+
+
+class FakeLLMServer:
+    """
+    A tiny in-process model provider answering batched completion requests.
+
+    Every request takes ``latency`` seconds whatever its batch size, like a
+    provider whose time goes on queueing and generation rather than on the
+    prompt count, and more than ``max_batch_size`` prompts are refused.
+    """
+
+    def __init__(self, latency: float = 0.0, max_batch_size: int = 16):
+        self.latency = latency
+        self.max_batch_size = max_batch_size
+        self.batch_sizes: List[int] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # Number of upcoming requests to answer with 429 Too Many Requests
+        self.throttle_next = 0
+        self.retry_after = "0"
+        # Test names whose prompts are answered with a server error
+        self.fail_names: set = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 128
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1/generate"
+
+    def config(self, **extra: Any) -> Dict[str, Any]:
+        return {"llm_url": self.url, "llm_api_key": "token", **extra}
+
+    def __enter__(self) -> "FakeLLMServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _take_throttle(self) -> bool:
+        with self._lock:
+            if self.throttle_next <= 0:
+                return False
+            self.throttle_next -= 1
+            return True
+
+    def _generate(self, prompts: List[Dict[str, Any]]) -> Any:
+        with self._lock:
+            self.batch_sizes.append(len(prompts))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        if len(prompts) > self.max_batch_size:
+            return 400, {"error": f"At most {self.max_batch_size} prompts per request"}
+        if any(prompt["test_name"] in self.fail_names for prompt in prompts):
+            return 500, {"error": "Generation failed"}
+        return 200, {"outputs": [generated_test(prompt) for prompt in prompts]}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if server._take_throttle():
+                    self.send_response(429)
+                    self.send_header("Retry-After", server.retry_after)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                status, reply = server._generate(json.loads(body)["prompts"])
+                payload = json.dumps(reply).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                return
+
+        return Handler
@@ -0,0 +1,80 @@
+import unittest
+from auto_documentation.markdown_converter.html_document import HtmlDocument
+from auto_documentation.markdown_converter.html_validator import (
+    HTMLProcessor,
+    SupportedTags,
+    compare_nodes_equal,
+    diff_nodes,
+)
+from auto_documentation.markdown_converter.markdown import parse_events
+
+MARKDOWN = [
+    "# Title",
+    "Some _styled_ text",
+    "| Field | Value |",
+    "| ----- | ----- |",
+    "| Owner | team |",
+    "Closing paragraph",
+]
+
+
+class HtmlDocumentTest(unittest.TestCase):
+    def test_document_matches_node_tree(self):
+        processor = HTMLProcessor.from_events(parse_events(MARKDOWN))
+        document = HtmlDocument.from_events(parse_events(MARKDOWN))
+        assert document.root.display_string() == processor.root.display_string()
+        assert document.root.serialize() == processor.root.serialize()
+        packed = HtmlDocument.from_node(processor.root)
+        assert packed.root.serialize() == processor.root.serialize()
+
+        mixed = HTMLProcessor("<p>Intro <strong>bold</strong> tail</p>").root
+        document = HtmlDocument.from_node(mixed)
+        assert document.root.serialize() == (
+            "<body><p>Intro <strong>bold</strong> tail</p></body>"
+        )
+        assert document.node(2).leading_text == "Intro "
+
+    def test_navigation_and_subtree_ranges(self):
+        document = HtmlDocument.from_events(
+            [
+                ("open", "ul"),
+                ("open", "li"),
+                ("text", "one"),
+                ("close", "li"),
+                ("open", "li"),
+                ("close", "li"),
+                ("close", "ul"),
+                ("open", "p"),
+                ("text", "after"),
+                ("close", "p"),
+            ]
+        )
+        ul = document.root.children[0]
+        assert [child.content for child in ul.children] == ["one", ""]
+        assert ul.children[1].parent == ul
+        assert document.root.content is None
+        assert list(document.iter_subtree(ul.index)) == [1, 2, 3]
+        assert document.find_all(SupportedTags.LI) == [2, 3]
+        assert list(document.iter_contents(ul.index)) == [(1, ""), (2, "one"), (3, "")]
+
+    def test_views_hash_and_diff_like_the_node_tree(self):
+        edited = MARKDOWN[:-1] + ["Another closing paragraph"]
+        old_tree = HTMLProcessor.from_events(parse_events(MARKDOWN)).root
+        new_tree = HTMLProcessor.from_events(parse_events(edited)).root
+        old_view = HtmlDocument.from_events(parse_events(MARKDOWN)).root
+        new_view = HtmlDocument.from_events(parse_events(edited)).root
+        assert old_view.structural_hash() == old_tree.structural_hash()
+        assert compare_nodes_equal(old_view, old_tree)
+        assert not compare_nodes_equal(old_view, new_view)
+        view_changes = diff_nodes(old_view, new_view)
+        tree_changes = diff_nodes(old_tree, new_tree)
+        assert [(c.kind, c.path) for c in view_changes] == [
+            (c.kind, c.path) for c in tree_changes
+        ]
+        assert view_changes[0].new.content == "Another closing paragraph"
+
+    def test_unbalanced_events_raise(self):
+        with self.assertRaises(ValueError):
+            HtmlDocument.from_events([("open", "p"), ("close", "li")])
+        with self.assertRaises(ValueError):
+            HtmlDocument.from_events([("open", "p")])
@@ -1,11 +1,13 @@
 import unittest
+import io
 from pathlib import Path
 from auto_documentation.markdown_converter.html_validator import (
     HTMLProcessor,
     HtmlNode,
     compare_nodes_equal,
+    diff_nodes,
 )
-from auto_documentation.markdown_converter.markdown import parse
+from auto_documentation.markdown_converter.markdown import parse, parse_events
 
 
 class HtmlValidatorTest(unittest.TestCase):
@@ -29,3 +31,121 @@ class HtmlValidatorTest(unittest.TestCase):
         assert HTMLProcessor(as_html).valid
 
     def test_malformed_html(self): ...
+
+    def test_content_is_the_text_before_the_closing_tag(self):
+        processor = HTMLProcessor(
+            "<h1>Title</h1><p>Some <strong>bold</strong> text</p>"
+        )
+        assert processor.valid
+        heading, paragraph = processor.root.children
+        assert heading.content == "Title"
+        assert paragraph.content == " text"
+        assert paragraph.children[0].content == "bold"
+        assert paragraph.children[0].leading_text == "Some "
+
+    def test_compact_output_round_trips_mixed_content(self):
+        html = "<p>Intro <strong>bold <em>and</em> more</strong> tail</p>text<p>x</p>"
+        root = HTMLProcessor(html).root
+        assert root.serialize() == f"<body>{html}</body>"
+        reparsed = HTMLProcessor(
+            root.serialize().removeprefix("<body>")[: -len("</body>")]
+        )
+        assert compare_nodes_equal(reparsed.root, root)
+        moved = HTMLProcessor("<p>Intro bold<strong></strong> tail</p>text<p>x</p>")
+        assert not compare_nodes_equal(moved.root, root)
+
+    def test_mismatched_and_unopened_tags_are_invalid(self):
+        assert not HTMLProcessor("<p><strong>text</p></strong>").valid
+        assert not HTMLProcessor("<p>text</p></p>").valid
+        assert not HTMLProcessor("<p>text").valid
+
+    def test_unsupported_tags_and_stray_brackets_raise(self):
+        with self.assertRaises(ValueError):
+            HTMLProcessor("<p>text</p><blink>x</blink>")
+        with self.assertRaises(ValueError):
+            HTMLProcessor("<p>a > b</p>")
+
+    def test_tag_spelling_is_normalised(self):
+        processor = HTMLProcessor("<p >text</ p>")
+        assert processor.valid
+        assert processor.root.children[0].enum_value is HtmlNode("<p>").enum_value
+
+    def test_tree_from_events_matches_tree_from_html(self):
+        text = "# Title\nSome _styled_ text\n* Item 1\n* Item 2\nAfter"
+        from_html = HTMLProcessor(parse(text))
+        from_events = HTMLProcessor.from_events(parse_events(text.split("\n")))
+        assert from_events.valid and from_html.valid
+        assert from_events.html is None
+        assert compare_nodes_equal(from_html.root, from_events.root)
+        assert [child.content for child in from_events.root.children] == [
+            child.content for child in from_html.root.children
+        ]
+
+    def test_events_keep_angle_brackets_as_text(self):
+        processor = HTMLProcessor.from_events(parse_events(["if a > b then"]))
+        assert processor.valid
+        assert processor.root.children[0].content == "if a > b then"
+
+    def test_unbalanced_events_are_invalid(self):
+        events = [("open", "p"), ("text", "x"), ("close", "li")]
+        assert not HTMLProcessor.from_events(events).valid
+
+    def test_compact_serialization_round_trips(self):
+        html = "<ul><li>one</li><li><strong>two</strong></li></ul>"
+        node = HTMLProcessor(html).root.children[0]
+        assert node.serialize() == html
+        sink = io.StringIO()
+        node.write(sink)
+        assert sink.getvalue() == html
+
+    def test_pretty_serialization_keeps_display_layout(self):
+        root = HTMLProcessor("<ul><li><p>deep</p></li></ul>").root
+        assert root.display_string() == (
+            "    <body>\n"
+            "    <ul>\n"
+            "        <li>\n"
+            "        <p>\n"
+            "        deep\n"
+            "        </p>\n"
+            "        </li>\n"
+            "    </ul>\n"
+            "    </body>\n"
+        )
+
+    def test_serialization_handles_deep_nesting(self):
+        depth = 5000
+        html = "<div>" * depth + "x" + "</div>" * depth
+        processor = HTMLProcessor(html)
+        assert processor.root.children[0].serialize() == html
+        assert processor.root.display_string().count("<div>") == depth
+
+    def test_structural_hash_covers_content_and_follows_edits(self):
+        left = HTMLProcessor("<ul><li>one</li><li>two</li></ul>").root
+        right = HTMLProcessor("<ul><li>one</li><li>two</li></ul>").root
+        assert compare_nodes_equal(left, right)
+        leaf = right.children[0].children[1]
+        leaf.content = "three"
+        leaf.invalidate_hash()
+        assert not compare_nodes_equal(left, right)
+        assert compare_nodes_equal(
+            left.children[0].children[0], right.children[0].children[0]
+        )
+
+    def test_diff_reports_only_changed_subtrees(self):
+        sections = [
+            f"<h2>Section {index}</h2><p>Body {index}</p>" for index in range(6)
+        ]
+        old = HTMLProcessor("".join(sections)).root
+        edited = sections[:1] + sections[2:]
+        edited[3] = "<h2>Section 4</h2><p>Rewritten</p>"
+        edited.append("<ul><li>New</li></ul>")
+        new = HTMLProcessor("".join(edited)).root
+
+        changes = [(change.kind, change.path) for change in diff_nodes(old, new)]
+        assert sorted(changes) == [
+            ("added", (10,)),
+            ("changed", (7,)),
+            ("removed", (2,)),
+            ("removed", (3,)),
+        ]
+        assert diff_nodes(old, HTMLProcessor("".join(sections)).root) == []
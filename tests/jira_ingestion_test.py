@@ -0,0 +1,280 @@
+import tempfile
+import unittest
+from pathlib import Path
+from auto_documentation.custom_types import ActionType, TicketTree
+from auto_documentation.ticket_ingestion.jira_main import IngestJira
+from auto_documentation.ticket_ingestion.issue_cache import IssueCache
+from tests.fake_jira_server import FakeJiraServer, build_program, make_issue
+
+
+def program_template() -> TicketTree:
+    epic = TicketTree(ticket_type="Epic")
+    story = TicketTree(ticket_type="Story", parent=epic)
+    task = TicketTree(ticket_type="Sub-task", parent=story, action=ActionType.TEST)
+    story.child.append(task)
+    epic.child.append(story)
+    return epic
+
+
+class JiraIngestionTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeJiraServer(build_program(stories=6, subtasks=3))
+        self.server.__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def ingest(self, **kwargs) -> IngestJira:
+        ingester = IngestJira(
+            jira_config=self.server.config(),
+            ticket_tree=program_template(),
+            parent_ticket_id="EPIC-1",
+            **kwargs,
+        )
+        ingester.build_formatted_tree()
+        return ingester
+
+    def test_walks_the_whole_hierarchy(self):
+        ingester = self.ingest(max_workers=1)
+        self.assertEqual(len(ingester.formatted_tree), 1 + 6 + 6 * 3)
+        self.assertEqual(
+            ingester.formatted_tree["EPIC-1"]["children"],
+            [f"STORY-{story_no}" for story_no in range(6)],
+        )
+        self.assertEqual(
+            ingester.formatted_tree["STORY-2"]["children"],
+            ["TASK-2-0", "TASK-2-1", "TASK-2-2"],
+        )
+        self.assertEqual(ingester.formatted_tree["TASK-2-1"]["parent_key"], "STORY-2")
+
+    def test_concurrent_fetch_matches_serial_fetch(self):
+        serial = self.ingest(max_workers=1)
+        concurrent = self.ingest(max_workers=8)
+        self.assertEqual(serial.formatted_tree, concurrent.formatted_tree)
+        self.assertEqual(dict(serial.types_to_keys), dict(concurrent.types_to_keys))
+
+    def test_worker_count_is_read_from_config(self):
+        ingester = IngestJira(
+            jira_config=self.server.config(jira_max_workers=3),
+            ticket_tree=program_template(),
+            parent_ticket_id="EPIC-1",
+        )
+        self.assertEqual(ingester.max_workers, 3)
+
+    def test_prefetch_resolves_each_frontier_with_one_search(self):
+        serial = self.ingest(max_workers=1)
+        self.server.reset_counts()
+        prefetched = self.ingest(prefetch=True)
+        self.assertEqual(self.server.count("issue"), 0)
+        # One search per BFS level: Epic, Stories, Sub-tasks
+        self.assertEqual(self.server.count("search"), 3)
+        self.assertEqual(serial.formatted_tree, prefetched.formatted_tree)
+
+    def test_prefetch_pages_through_large_frontiers(self):
+        self.server.reset_counts()
+        prefetched = self.ingest(prefetch=True, batch_size=4, max_workers=1)
+        self.assertEqual(self.server.count("issue"), 0)
+        self.assertEqual(len(prefetched.formatted_tree), 1 + 6 + 6 * 3)
+
+    def test_warm_cache_run_skips_issue_downloads(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = Path(tmp_dir) / "issues.jsonl"
+            cold = self.ingest(issue_cache=IssueCache(cache_path))
+            self.server.reset_counts()
+
+            cache = IssueCache(cache_path)
+            warm = self.ingest(issue_cache=cache)
+            self.assertEqual(self.server.count("issue"), 0)
+            self.assertEqual(cache.stats, {"hits": 25, "misses": 0, "entries": 25})
+            self.assertEqual(cold.formatted_tree, warm.formatted_tree)
+
+    def test_cache_refetches_issues_updated_since_they_were_cached(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = Path(tmp_dir) / "issues.jsonl"
+            self.ingest(issue_cache=IssueCache(cache_path))
+            changed = self.server.issues["STORY-3"]["fields"]
+            changed["updated"] = "2024-02-01T00:00:00.000+0000"
+            changed["summary"] = "Renamed story"
+            self.server.reset_counts()
+
+            cache = IssueCache(cache_path)
+            warm = self.ingest(issue_cache=cache)
+            self.assertEqual(self.server.count("issue"), 1)
+            self.assertEqual(cache.misses, 1)
+            self.assertEqual(warm.formatted_tree["STORY-3"]["title"], "Renamed story")
+            self.assertEqual(
+                IssueCache(cache_path).get("STORY-3", changed["updated"]),
+                self.server.issues["STORY-3"],
+            )
+
+    def test_cache_evicts_oldest_entries_beyond_the_size_limit(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = Path(tmp_dir) / "issues.jsonl"
+            self.ingest(issue_cache=IssueCache(cache_path, max_entries=10))
+            reloaded = IssueCache(cache_path)
+            self.assertEqual(len(reloaded.entries), 10)
+            self.assertEqual(
+                len(cache_path.read_text().splitlines()), len(reloaded.entries)
+            )
+
+    def test_incremental_rebuild_only_patches_changed_tickets(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            state_path = Path(tmp_dir) / "state.json"
+            first = IngestJira(
+                jira_config=self.server.config(),
+                ticket_tree=program_template(),
+                parent_ticket_id="EPIC-1",
+            )
+            self.assertEqual(
+                len(first.build_formatted_tree_incremental(state_path)), 25
+            )
+            first.get_ticket_tree_as_markdown()
+            first.save_state(state_path)
+
+            # Move TASK-0-0 from STORY-0 to STORY-1 and retitle STORY-4
+            self.server.issues["TASK-0-0"]["fields"]["issuelinks"][0]["inwardIssue"][
+                "key"
+            ] = "STORY-1"
+            self.server.touch("TASK-0-0")
+            story_links = self.server.issues["STORY-0"]["fields"]["issuelinks"]
+            self.server.touch("STORY-0", issuelinks=story_links[:1] + story_links[2:])
+            self.server.issues["STORY-1"]["fields"]["issuelinks"].append(
+                {**story_links[1], "id": "moved"}
+            )
+            self.server.touch("STORY-1")
+            self.server.touch("STORY-4", summary="Retitled story")
+            self.server.reset_counts()
+
+            second = IngestJira(
+                jira_config=self.server.config(),
+                ticket_tree=program_template(),
+                parent_ticket_id="EPIC-1",
+            )
+            touched = second.build_formatted_tree_incremental(state_path)
+            self.assertEqual(touched, {"TASK-0-0", "STORY-0", "STORY-1", "STORY-4"})
+            self.assertEqual(self.server.count("issue"), 0)
+            self.assertEqual(self.server.count("search"), 1)
+            tree = second.formatted_tree
+            self.assertEqual(tree["STORY-0"]["children"], ["TASK-0-1", "TASK-0-2"])
+            self.assertEqual(tree["STORY-1"]["children"][-1], "TASK-0-0")
+            self.assertEqual(tree["TASK-0-0"]["parent_key"], "STORY-1")
+            self.assertEqual(tree["STORY-4"]["title"], "Retitled story")
+            # Untouched tickets keep the fragments rendered by the previous run
+            self.assertIn("TASK-3-1", second._markdown_fragments)
+            self.assertNotIn("STORY-4", second._markdown_fragments)
+            self.assertIn("## Retitled story", second.get_ticket_tree_as_markdown())
+
+    def test_incremental_rebuild_drops_unlinked_subtrees(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            state_path = Path(tmp_dir) / "state.json"
+            first = self.ingest_incremental(state_path)
+            self.assertIn("STORY-5", first.formatted_tree)
+
+            epic_links = self.server.issues["EPIC-1"]["fields"]["issuelinks"]
+            self.server.touch("EPIC-1", issuelinks=epic_links[:-1])
+            second = self.ingest_incremental(state_path)
+            self.assertNotIn("STORY-5", second.formatted_tree)
+            self.assertNotIn("TASK-5-0", second.formatted_tree)
+            self.assertNotIn("STORY-5", second.types_to_keys["Story"])
+            self.assertEqual(len(second.formatted_tree), 1 + 5 + 5 * 3)
+
+    def test_template_built_from_ticket_id_has_one_node_per_type(self):
+        ingester = IngestJira(
+            jira_config=self.server.config(),
+            ticket_tree=None,
+            parent_ticket_id="EPIC-1",
+            prefetch=True,
+        )
+        root = ingester.build_tree_from_ticket_id()
+        self.assertEqual([child.ticket_type for child in root.child], ["Story"])
+        self.assertEqual(
+            [child.ticket_type for child in root.child[0].child], ["Sub-task"]
+        )
+        self.assertIs(
+            ingester.find_node_in_ticket_tree("Sub-task"), root.child[0].child[0]
+        )
+        ingester.build_formatted_tree()
+        self.assertEqual(len(ingester.formatted_tree), 1 + 6 + 6 * 3)
+
+    def test_incremental_search_is_chunked_and_in_the_users_timezone(self):
+        # A user behind the local clock reads a local cutoff as hours ahead
+        self.server.time_zone = "America/Los_Angeles"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            state_path = Path(tmp_dir) / "state.json"
+            self.ingest_incremental(state_path)
+            self.server.touch("TASK-5-2", summary="Changed late")
+            self.server.reset_counts()
+            second = self.ingest_incremental(state_path, batch_size=10)
+        self.assertEqual(second.formatted_tree["TASK-5-2"]["title"], "Changed late")
+        self.assertEqual(self.server.count("search"), 3)
+
+    def test_issue_changed_to_an_untracked_type_leaves_the_tree(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            state_path = Path(tmp_dir) / "state.json"
+            self.ingest_incremental(state_path)
+            self.server.touch("STORY-2", issuetype={"name": "Bug"})
+            second = self.ingest_incremental(state_path)
+        tree = second.formatted_tree
+        self.assertNotIn("STORY-2", tree)
+        self.assertNotIn("TASK-2-0", tree)
+        self.assertNotIn("STORY-2", tree["EPIC-1"]["children"])
+        self.assertNotIn("STORY-2", second.types_to_keys["Story"])
+        self.assertEqual(len(tree), 1 + 5 + 5 * 3)
+
+    def test_child_moved_under_a_new_parent_matches_a_full_build(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            state_path = Path(tmp_dir) / "state.json"
+            self.ingest_incremental(state_path)
+
+            # STORY-9 is created under the epic and TASK-0-0 moves to it
+            self.server.issues["STORY-9"] = make_issue(
+                "STORY-9",
+                "Story",
+                "Story 9",
+                [
+                    ("inwardIssue", "EPIC-1", "Epic"),
+                    ("outwardIssue", "TASK-0-0", "Sub-task"),
+                ],
+            )
+            self.server.touch("STORY-9")
+            epic_links = self.server.issues["EPIC-1"]["fields"]["issuelinks"]
+            self.server.touch(
+                "EPIC-1",
+                issuelinks=epic_links
+                + [
+                    {
+                        **epic_links[0],
+                        "id": "new-story",
+                        "outwardIssue": {
+                            "key": "STORY-9",
+                            "fields": {"issuetype": {"name": "Story"}},
+                        },
+                    }
+                ],
+            )
+            story_links = self.server.issues["STORY-0"]["fields"]["issuelinks"]
+            self.server.touch("STORY-0", issuelinks=story_links[:1] + story_links[2:])
+            self.server.issues["TASK-0-0"]["fields"]["issuelinks"][0]["inwardIssue"][
+                "key"
+            ] = "STORY-9"
+            self.server.touch("TASK-0-0")
+
+            incremental = self.ingest_incremental(state_path)
+        full = self.ingest()
+        self.assertEqual(
+            incremental.formatted_tree["STORY-9"]["children"], ["TASK-0-0"]
+        )
+        self.assertEqual(
+            incremental.formatted_tree["TASK-0-0"]["parent_key"], "STORY-9"
+        )
+        self.assertEqual(incremental.formatted_tree, full.formatted_tree)
+
+    def ingest_incremental(self, state_path: Path, **kwargs) -> IngestJira:
+        ingester = IngestJira(
+            jira_config=self.server.config(),
+            ticket_tree=program_template(),
+            parent_ticket_id="EPIC-1",
+            **kwargs,
+        )
+        ingester.build_formatted_tree_incremental(state_path)
+        return ingester
@@ -0,0 +1,35 @@
+import tempfile
+import unittest
+from pathlib import Path
+from auto_documentation.jsonl_log import JsonlLog
+
+
+class JsonlLogTest(unittest.TestCase):
+    def test_last_record_for_a_key_wins_on_load(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "log.jsonl"
+            log = JsonlLog(path)
+            log.append({"key": "a", "value": 1})
+            log.append({"key": "b", "value": 1})
+            log.flush()
+            log.append({"key": "a", "value": 2})
+            log.flush()
+            self.assertEqual(len(path.read_text().splitlines()), 3)
+            self.assertEqual(JsonlLog(path).entries["a"]["value"], 2)
+
+    def test_stale_records_are_compacted_away(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "log.jsonl"
+            log = JsonlLog(path)
+            for value in range(3):
+                log.append({"key": "a", "value": value})
+                log.flush()
+            log.append({"key": "b", "value": 0})
+            del log.entries["b"]
+            log.flush()
+            self.assertEqual(JsonlLog(path).entries, {"a": {"key": "a", "value": 2}})
+            self.assertEqual(len(path.read_text().splitlines()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
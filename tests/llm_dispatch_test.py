@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+from typing import Dict, List
+from auto_documentation.prompt_builder.llm_dispatch import (
+    HttpLLMClient,
+    LLMClient,
+    PromptDispatcher,
+    dispatch_prompts,
+)
+from tests.fake_llm_server import FakeLLMServer, generated_test
+
+
+def make_prompts(count: int, description: str = "Do the thing") -> List[Dict]:
+    return [
+        {
+            f"TASK-{index}": {
+                "prompt_meta": {
+                    "tree_structure": ">Epic\n-->Story\n",
+                    "ticket_descriptions": description,
+                    "test_name": f"TASK-{index}",
+                    "src_folder": "generated",
+                }
+            }
+        }
+        for index in range(count)
+    ]
+
+
+class SlowFirstClient(LLMClient):
+    """Answers the first batch last, to see outputs arrive as they finish."""
+
+    max_batch_size = 2
+
+    async def complete(self, prompts):
+        await asyncio.sleep(0.2 if prompts[0]["test_name"] == "TASK-0" else 0)
+        return [generated_test(prompt) for prompt in prompts]
+
+
+class LLMDispatchTest(unittest.TestCase):
+    def test_small_prompts_are_coalesced_up_to_the_limits(self):
+        dispatcher = PromptDispatcher(SlowFirstClient(), max_batch_chars=100)
+        prompts = make_prompts(3) + [None] + make_prompts(1, "x" * 200)
+        batches = [[key for key, _ in batch] for batch in dispatcher.batches(prompts)]
+        # TASK-0 of the second group is too long to share a request
+        assert batches == [["TASK-0", "TASK-1"], ["TASK-2"], ["TASK-0"]]
+
+    def test_outputs_stream_back_in_the_order_they_finish(self):
+        dispatcher = PromptDispatcher(SlowFirstClient(), max_in_flight=4)
+        outputs = asyncio.run(dispatcher.dispatch(make_prompts(6)))
+        assert [output["key"] for output in outputs] == [
+            "TASK-2",
+            "TASK-3",
+            "TASK-4",
+            "TASK-5",
+            "TASK-0",
+            "TASK-1",
+        ]
+        assert outputs[0]["output_path"] == "generated"
+        assert outputs[0]["python_code"].startswith("def test_TASK_2")
+
+    def test_dispatch_against_a_mock_provider(self):
+        with FakeLLMServer(latency=0.05, max_batch_size=4) as server:
+            server.throttle_next = 2
+            server.fail_names = {"TASK-17"}
+            dispatcher = PromptDispatcher.from_config(
+                server.config(llm_batch_size=4, llm_max_in_flight=3, llm_backoff_base=0)
+            )
+            outputs = dispatch_prompts(make_prompts(20), dispatcher)
+
+        assert isinstance(dispatcher.client, HttpLLMClient)
+        assert sorted(output["key"] for output in outputs) == sorted(
+            f"TASK-{index}" for index in range(16)
+        )
+        # The batch holding TASK-17 failed as a whole, the others were kept
+        assert set(dispatcher.failed) == {f"TASK-{index}" for index in range(16, 20)}
+        assert server.batch_sizes == [4] * 5
+        assert server.max_in_flight <= 3
+        assert dispatcher.client.transport.metrics.summary()["retries"] == 2
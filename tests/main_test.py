@@ -0,0 +1,46 @@
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from auto_documentation.main import generate_html_for_docs
+from auto_documentation.markdown_converter.html_validator import write_html
+from auto_documentation.ticket_ingestion.jira_main import IngestJira
+from tests.fake_jira_server import FakeJiraServer, build_program
+from tests.jira_ingestion_test import program_template
+
+DESCRIPTIONS = [
+    "Plain text that runs on\nover two lines",
+    "* first item\n* second item",
+    "| Field | Value |\n| ----- | ----- |\n| Owner | team |",
+    "Some _emphasis_ and __strong__ text",
+    "",
+]
+
+
+class GenerateHtmlTest(unittest.TestCase):
+    def test_workers_and_cache_do_not_change_the_document(self):
+        issues = build_program(stories=3, subtasks=3)
+        for index, key in enumerate(sorted(issues)):
+            issues[key]["fields"]["description"] = DESCRIPTIONS[
+                index % len(DESCRIPTIONS)
+            ]
+        with FakeJiraServer(issues) as server, tempfile.TemporaryDirectory() as tmp:
+            documents = []
+            for config in [
+                {},
+                {"markdown_workers": 2},
+                {"render_cache_path": str(Path(tmp) / "render.log")},
+                {"render_cache_path": str(Path(tmp) / "render.log")},
+            ]:
+                ingester = IngestJira(
+                    jira_config=server.config(**config),
+                    ticket_tree=program_template(),
+                    parent_ticket_id="EPIC-1",
+                )
+                sink = io.StringIO()
+                write_html(generate_html_for_docs(ingester, None).root, sink)
+                documents.append(sink.getvalue())
+
+        self.assertIn("<table>", documents[0])
+        for document in documents[1:]:
+            self.assertEqual(document, documents[0])
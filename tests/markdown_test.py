@@ -1,7 +1,12 @@
 import unittest
 from pathlib import Path
 from auto_documentation.markdown_converter.markdown import (
+    MarkDownParser,
+    iter_lines,
+    fragment_events,
     parse,
+    parse_fragments,
+    parse_stream,
 )
 
 
@@ -114,3 +119,63 @@ class MarkdownTest(unittest.TestCase):
             parse(text),
             """<h1>An example of a large markdown file</h1><p>This is the main section of the document.</p><h2>Table Section</h2><table><tr><th>Header 1</th><th>Header 2</th></tr><tr><td>Cell 1</td><td>Cell 2</td></tr><tr><td>Cell 3</td><td>Cell 4</td></tr></table><h3>It can have Nested headers</h3><p>This content belongs specifically to the nested header section.</p><p>But can't quite group stuff together yet</p><h2>Special Characters Section</h2><p>This is a paragraph with # and * in the text</p><h2>List Section</h2><ul><li>Item 1 with a # in the text</li><li>Item 2 with * in the text</li></ul>""",
         )
+
+    def test_pending_tags_do_not_leak_into_the_next_parse(self):
+        parse("#")
+        self.assertEqual(parse("hello"), "<p>hello</p>")
+
+    def test_long_paragraphs_with_periods_stay_plain_text(self):
+        text = "First sentence. Second one. " * 50
+        self.assertEqual(parse(text), f"<p>{text}</p>")
+
+    def test_feed_returns_blocks_once_they_close(self):
+        md = MarkDownParser()
+        self.assertEqual(md.feed("# Title"), ["<h1>Title</h1>"])
+        self.assertEqual(md.feed("* Item 1"), [])
+        self.assertEqual(md.feed("* Item 2"), [])
+        self.assertEqual(
+            md.feed("After the list"),
+            [
+                "<ul><li>Item 1</li>",
+                "<li>Item 2</li>",
+                "</ul>",
+                "<p>After the list</p>",
+            ],
+        )
+        self.assertEqual(md.feed("| Header |"), [])
+        self.assertEqual(md.close(), ["<table><tr><th>Header</th></tr>", "</table>"])
+
+    def test_streaming_a_file_matches_parsing_the_whole_text(self):
+        path = Path("tests/test_data/large_markdown_file.md")
+        with open(path) as ff:
+            streamed = "".join(parse_stream(ff))
+        self.assertEqual(streamed, parse(path.read_text()))
+
+    def test_parse_builds_the_same_html_as_the_event_path(self):
+        text = "Some __bold__ and _em_ text\n* Item _one_ here\n| A | B |\n| 1 | 2 |"
+        md = MarkDownParser()
+        self.assertEqual(parse(text, md), "".join(parse_stream(text.split("\n"))))
+        # The parser goes back to events once parse is done
+        self.assertEqual(
+            md.feed_blocks("plain"),
+            [[("open", "p"), ("text", "plain"), ("close", "p")]],
+        )
+
+    def test_iter_lines_reassembles_lines_split_across_chunks(self):
+        chunks = ["# Tit", "le\nfirst par", "agraph\n\n", "last"]
+        self.assertEqual(
+            list(iter_lines(chunks)), ["# Title", "first paragraph", "", "last"]
+        )
+
+    def test_fragments_on_a_process_pool_match_serial_conversion(self):
+        tickets = [
+            f"## Ticket {index}\nDescription _{index}_\n* Item 1\n* Item 2\n\n"
+            for index in range(6)
+        ]
+        serial = list(parse_fragments(tickets, max_workers=1))
+        self.assertEqual(list(parse_fragments(tickets, max_workers=2)), serial)
+        self.assertEqual(
+            serial, [event for ticket in tickets for event in fragment_events(ticket)]
+        )
+        # Each ticket starts from a fresh parser, so every list opens cleanly
+        self.assertEqual(serial.count(("open", "ul")), len(tickets))
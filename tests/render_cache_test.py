@@ -0,0 +1,64 @@
+import tempfile
+import unittest
+from pathlib import Path
+from auto_documentation.markdown_converter.markdown import (
+    fragment_events,
+    parse_fragments,
+)
+from auto_documentation.markdown_converter.render_cache import RenderCache
+
+TICKETS = [f"## Ticket {index}\nDescription _{index}_\n\n" for index in range(5)]
+
+
+class RenderCacheTest(unittest.TestCase):
+    def test_cached_render_matches_a_fresh_render(self):
+        cache = RenderCache()
+        cold = list(parse_fragments(TICKETS, cache=cache))
+        warm = list(parse_fragments(TICKETS, cache=cache))
+        self.assertEqual(cold, list(parse_fragments(TICKETS)))
+        self.assertEqual(warm, cold)
+        self.assertEqual(cache.stats["misses"], 5)
+        self.assertEqual(cache.stats["hits"], 5)
+        self.assertEqual(cache.stats["hit_rate"], 0.5)
+
+    def test_entries_survive_on_disk_between_runs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = Path(tmp_dir) / "render.log"
+            list(parse_fragments(TICKETS, cache=RenderCache(cache_path)))
+
+            changed = TICKETS[:-1] + ["## Ticket 4\nRewritten description\n\n"]
+            cache = RenderCache(cache_path)
+            events = list(parse_fragments(changed, cache=cache))
+            self.assertEqual(cache.disk_hits, 4)
+            self.assertEqual(cache.misses, 1)
+            self.assertEqual(events, list(parse_fragments(changed)))
+
+            fragment = cache.get(changed[0])
+            self.assertEqual(
+                fragment.html, "<h2>Ticket 0</h2><p>Description <em>0</em></p>"
+            )
+            self.assertEqual(
+                [node.tag for node in fragment.to_nodes()], ["<h2>", "<p>"]
+            )
+
+    def test_heading_level_is_part_of_the_key(self):
+        cache = RenderCache()
+        cache.put("# Title\n", fragment_events("# Title\n"))
+        self.assertIsNone(cache.get("## Title\n"))
+
+    def test_memory_is_bounded_by_max_entries(self):
+        cache = RenderCache(max_entries=2)
+        list(parse_fragments(TICKETS, cache=cache))
+        self.assertEqual(len(cache.memory), 2)
+        self.assertIsNotNone(cache.get(TICKETS[-1]))
+        self.assertIsNone(cache.get(TICKETS[0]))
+
+    def test_log_is_compacted_to_the_entries_still_in_use(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = Path(tmp_dir) / "render.log"
+            list(parse_fragments(TICKETS, cache=RenderCache(cache_path)))
+            list(parse_fragments(TICKETS[:2], cache=RenderCache(cache_path)))
+            self.assertEqual(len(cache_path.read_text().splitlines()), 2)
+            cache = RenderCache(cache_path)
+            self.assertIsNotNone(cache.get(TICKETS[1]))
+            self.assertIsNone(cache.get(TICKETS[2]))
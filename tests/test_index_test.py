@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from auto_documentation.test_runner.test_index import TestFileIndex
+from auto_documentation.test_runner.test_runner import TestRunnerFromFolder
+from auto_documentation.test_runner.timing_store import TestTimingStore
+
+
+class TestFileIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.folder = Path(self.tmp_dir.name).resolve()
+        (self.folder / "billing" / "api").mkdir(parents=True)
+        (self.folder / "__pycache__").mkdir()
+        (self.folder / "test_MBA-14.py").write_text("def test_a():\n    pass\n")
+        (self.folder / "billing" / "api" / "test_invoices.py").write_text(
+            "# tickets: MBA-15, MBA-16\n\ndef test_b():\n    pass\n"
+        )
+        (self.folder / "billing" / "helpers.py").write_text("# ticket: MBA-17\n")
+        (self.folder / "__pycache__" / "test_MBA-18.py").write_text("")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_keys_resolve_by_name_and_by_marker(self):
+        index = TestFileIndex(self.folder)
+        assert index.files_for("MBA-14") == [self.folder / "test_MBA-14.py"]
+        invoices = self.folder / "billing" / "api" / "test_invoices.py"
+        assert index.files_for("MBA-15") == [invoices]
+        assert index.files_for("MBA-16") == [invoices]
+        assert index.files_for("billing/api/test_invoices.py") == [invoices]
+        assert index.files_for("test_invoices.py") == []
+        # Markers only count in test files, cache folders are never walked
+        assert index.missing(["MBA-14", "MBA-17", "MBA-18"]) == ["MBA-17", "MBA-18"]
+
+    def test_refresh_only_lists_directories_that_changed(self):
+        index = TestFileIndex(self.folder)
+        assert index.scanned_dirs == 3
+        index.refresh()
+        assert index.scanned_dirs == 0
+
+        api = self.folder / "billing" / "api"
+        (api / "test_MBA-19.py").write_text("def test_c():\n    pass\n")
+        # Coarse mtime clocks can leave a fresh write at the old timestamp
+        mtime = os.stat(api).st_mtime_ns + 1_000_000_000
+        os.utime(api, ns=(mtime, mtime))
+        index.refresh()
+        assert index.scanned_dirs == 1
+        assert index.files_for("MBA-19") == [api / "test_MBA-19.py"]
+        assert index.files_for("MBA-15") == [api / "test_invoices.py"]
+
+    def test_runner_finds_tests_in_nested_folders(self):
+        runner = TestRunnerFromFolder(self.folder, ["MBA-14", "MBA-16"])
+        assert [path.name for path in runner.testable_paths] == [
+            "test_MBA-14.py",
+            "test_invoices.py",
+        ]
+        results = runner.run_tests()
+        assert [result.status for result in results] == ["PASS", "PASS"]
+        with self.assertRaises(ValueError):
+            runner.run_tests(["MBA-17"])
+
+    def test_files_sharing_a_name_in_different_folders_stay_apart(self):
+        for folder, key, body in [("a", "A-1", "pass"), ("b", "B-1", "assert 0")]:
+            (self.folder / folder).mkdir()
+            (self.folder / folder / "test_x.py").write_text(
+                f"# ticket: {key}\n\ndef test_x():\n    {body}\n"
+            )
+        store = TestTimingStore(self.folder.parent / f"{self.folder.name}.jsonl")
+        self.addCleanup(store.path.unlink, missing_ok=True)
+        runner = TestRunnerFromFolder(self.folder, ["A-1", "B-1"], timing_store=store)
+        results = runner.run_tests(fingerprints={"A-1": "a-v1", "B-1": "b-v1"})
+        assert [(result.test_name, result.status) for result in results] == [
+            ("a/test_x.py::test_x", "PASS"),
+            ("b/test_x.py::test_x", "FAIL"),
+        ]
+        assert not store.failed("a/test_x.py")
+        assert store.failed("b/test_x.py")
+
+        runner.run_tests(fingerprints={"A-1": "a-v1", "B-1": "b-v1"})
+        assert runner.reused_files == ["a/test_x.py"]
+        assert runner.index.files_for("a/test_x.py") == [
+            self.folder / "a" / "test_x.py"
+        ]
@@ -0,0 +1,147 @@
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from auto_documentation.test_runner.test_runner import (
+    TestRunnerFactory,
+    TestRunnerFromFolder,
+)
+from auto_documentation.test_runner.timing_store import TestTimingStore
+
+GENERATED_TESTS = {
+    "PASS-1": "def test_pass():\n    assert True\n",
+    "FAIL-1": "def test_fail():\n    assert 1 == 2\n",
+    "SKIP-1": (
+        "import pytest\n\n\n"
+        "@pytest.mark.skip(reason='not ready')\n"
+        "def test_skip():\n    pass\n"
+    ),
+    "SLOW-1": "import time\n\n\ndef test_slow():\n    time.sleep(30)\n",
+}
+
+
+class TestRunnerFromFolderTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.folder = Path(self.tmp_dir.name)
+        for key, source in GENERATED_TESTS.items():
+            (self.folder / f"test_{key}.py").write_text(source)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_parallel_sessions_report_every_outcome(self):
+        runner = TestRunnerFromFolder(
+            self.folder, list(GENERATED_TESTS), max_workers=2, timeout=2
+        )
+        results = {result.test_name: result for result in runner.run_tests()}
+        assert {name: result.status for name, result in results.items()} == {
+            "test_PASS-1.py::test_pass": "PASS",
+            "test_FAIL-1.py::test_fail": "FAIL",
+            "test_SKIP-1.py::test_skip": "SKIP",
+            "test_SLOW-1.py::test_slow": "FAIL",
+        }
+        assert "Timed out after 2" in results["test_SLOW-1.py::test_slow"].error_message
+        assert results["test_SLOW-1.py::test_slow"].duration < 10
+
+    def test_run_tests_accepts_a_subset_of_keys(self):
+        runner = TestRunnerFromFolder(self.folder, [])
+        results = runner.run_tests(["PASS-1"])
+        assert [result.status for result in results] == ["PASS"]
+        with self.assertRaises(ValueError):
+            runner.run_tests(["MISSING-1"])
+
+    def test_schedule_balances_by_past_duration_and_runs_failures_first(self):
+        store = TestTimingStore(
+            self.folder.parent / f"{self.folder.name}.timings.jsonl"
+        )
+        for name, duration, failed in [
+            ("test_A-1.py", 8.0, False),
+            ("test_B-1.py", 5.0, False),
+            ("test_C-1.py", 4.0, False),
+            ("test_D-1.py", 3.0, False),
+            ("test_E-1.py", 1.0, True),
+        ]:
+            (self.folder / name).write_text("def test_ok():\n    pass\n")
+            store.record(name, duration, failed)
+        runner = TestRunnerFromFolder(
+            self.folder, ["A-1", "B-1", "C-1", "D-1", "E-1"], timing_store=store
+        )
+        runner.max_workers = 2
+        shards = [
+            [path.name for path in shard]
+            for shard in runner.shard(runner.testable_paths)
+        ]
+        assert shards == [
+            ["test_E-1.py", "test_B-1.py", "test_C-1.py"],
+            ["test_A-1.py", "test_D-1.py"],
+        ]
+
+    def test_run_records_timings_for_the_next_schedule(self):
+        store_path = self.folder.parent / f"{self.folder.name}.timings.jsonl"
+        self.addCleanup(store_path.unlink, missing_ok=True)
+        runner = TestRunnerFactory(self.folder)
+        assert TestRunnerFactory(self.folder) is runner
+        runner.run_tests(["PASS-1", "FAIL-1"])
+
+        reloaded = TestTimingStore(store_path)
+        assert reloaded.failed("test_FAIL-1.py")
+        assert not reloaded.failed("test_PASS-1.py")
+        assert reloaded.duration("test_PASS-1.py") is not None
+
+    def test_factory_rebuilds_the_runner_when_its_config_changes(self):
+        config = {"test_workers": 1, "test_timings_path": str(self.folder / "t.jsonl")}
+        runner = TestRunnerFactory(self.folder, config)
+        assert TestRunnerFactory(self.folder, dict(config)) is runner
+        faster = TestRunnerFactory(self.folder, {**config, "test_workers": 4})
+        assert faster is not runner
+        assert faster.max_workers == 4
+        timed = TestRunnerFactory(self.folder, {**config, "test_timeout": 5})
+        assert timed.timeout == 5
+
+    def test_timed_out_or_crashed_sessions_leave_no_timings(self):
+        store = TestTimingStore(self.folder.parent / f"{self.folder.name}.jsonl")
+        self.addCleanup(store.path.unlink, missing_ok=True)
+        runner = TestRunnerFromFolder(
+            self.folder, ["PASS-1"], timeout=2, timing_store=store
+        )
+        for outcome in [
+            subprocess.TimeoutExpired("pytest", 32),
+            subprocess.CompletedProcess("pytest", 3, "", "crashed"),
+        ]:
+            with patch(
+                "auto_documentation.test_runner.test_runner.subprocess.run",
+                side_effect=[outcome],
+            ):
+                results = runner.run_tests(fingerprints={"PASS-1": "v1"})
+            assert [result.status for result in results] == ["FAIL"]
+            assert store.duration("test_PASS-1.py") is None
+
+        runner.run_tests(fingerprints={"PASS-1": "v1"})
+        assert store.duration("test_PASS-1.py") < 32
+
+    def test_unchanged_tickets_reuse_their_last_green_results(self):
+        store = TestTimingStore(
+            self.folder.parent / f"{self.folder.name}.timings.jsonl"
+        )
+        self.addCleanup(store.path.unlink, missing_ok=True)
+        runner = TestRunnerFromFolder(
+            self.folder, ["PASS-1", "FAIL-1"], timing_store=store
+        )
+        fingerprints = {"PASS-1": "pass-v1", "FAIL-1": "fail-v1"}
+        first = runner.run_tests(fingerprints=fingerprints)
+        assert runner.reused_files == []
+
+        second = runner.run_tests(fingerprints=fingerprints)
+        # The failing ticket runs again, the green one is served from the store
+        assert runner.reused_files == ["test_PASS-1.py"]
+        assert second == first
+
+        runner.run_tests(fingerprints={**fingerprints, "PASS-1": "pass-v2"})
+        assert runner.reused_files == []
+        (self.folder / "test_PASS-1.py").write_text(
+            "def test_pass():\n    assert 'edited'\n"
+        )
+        runner.run_tests(fingerprints={**fingerprints, "PASS-1": "pass-v2"})
+        assert runner.reused_files == []
@@ -0,0 +1,111 @@
+import io
+import sys
+import unittest
+from auto_documentation.custom_exceptions import InvalidTicketStructureError
+from auto_documentation.custom_types import TicketNode, TicketTree
+from auto_documentation.ticket_ingestion.ticket_ingestor_base import GenericIngester
+
+
+def entry(title: str, parent_key=None, children=None) -> dict:
+    return {
+        "title": title,
+        "description": f"About {title}",
+        "parent_type": None,
+        "parent_key": parent_key,
+        "ticket_type": "Epic" if parent_key is None else "Story",
+        "children": children or [],
+    }
+
+
+class TicketIngestorTest(unittest.TestCase):
+    def ingester(self) -> GenericIngester:
+        return GenericIngester({}, TicketTree(ticket_type="Epic"), "EPIC-1")
+
+    def test_markdown_is_rendered_depth_first(self):
+        ingester = self.ingester()
+        ingester.formatted_tree = {
+            "EPIC-1": entry("Epic", children=["S-1", "S-2"]),
+            "S-1": entry("Story one", "EPIC-1", children=["T-1"]),
+            "T-1": entry("Task", "S-1"),
+            "S-2": entry("Story two", "EPIC-1"),
+        }
+        ingester.types_to_keys["Epic"].append("EPIC-1")
+        self.assertEqual(
+            ingester.get_ticket_tree_as_markdown(),
+            "# Epic\nAbout Epic\n\n"
+            "## Story one\nAbout Story one\n\n"
+            "### Task\nAbout Task\n\n"
+            "## Story two\nAbout Story two\n\n",
+        )
+        self.assertEqual(
+            ingester.process_children("S-1", heading_level=3),
+            "### Task\nAbout Task\n\n",
+        )
+
+    def test_deep_hierarchies_stream_without_recursion(self):
+        ingester = self.ingester()
+        depth = sys.getrecursionlimit() * 2
+        keys = [f"T-{level}" for level in range(depth)]
+        ingester.formatted_tree = {
+            key: entry(
+                key, keys[level - 1] if level else None, keys[level + 1 : level + 2]
+            )
+            for level, key in enumerate(keys)
+        }
+        ingester.parent_ticket_id = keys[0]
+        ingester.types_to_keys["Epic"].append(keys[0])
+
+        sink = io.StringIO()
+        written = ingester.write_ticket_tree_markdown(sink)
+        self.assertEqual(written, len(sink.getvalue()))
+        self.assertEqual(sink.getvalue().count("\n\n"), depth)
+        self.assertFalse(ingester._markdown_fragments)
+
+    def test_node_index_finds_every_ticket_type(self):
+        root = TicketTree(ticket_type="Epic")
+        for branch in range(50):
+            story = TicketTree(ticket_type=f"Story-{branch}", parent=root)
+            story.child.append(TicketTree(ticket_type=f"Task-{branch}", parent=story))
+            root.child.append(story)
+        ingester = GenericIngester({}, root, "EPIC-1")
+        attached = ingester.ticket_tree
+        self.assertIs(ingester.find_node_in_ticket_tree("Epic"), attached)
+        self.assertIs(
+            ingester.find_node_in_ticket_tree("Task-31"), attached.child[31].child[0]
+        )
+        self.assertIsNone(ingester.find_node_in_ticket_tree("Bug"))
+
+    def test_duplicate_ticket_types_are_rejected(self):
+        root = TicketTree(ticket_type="Epic")
+        root.child.extend(
+            [
+                TicketTree(ticket_type="Story", parent=root),
+                TicketTree(ticket_type="Story", parent=root),
+            ]
+        )
+        with self.assertRaises(InvalidTicketStructureError):
+            GenericIngester({}, root, "EPIC-1")
+
+    def test_node_index_follows_tree_mutations(self):
+        ingester = self.ingester()
+        self.assertIsNone(ingester.find_node_in_ticket_tree("Story"))
+        story = TicketNode("Story", parent=ingester.ticket_tree)
+        ingester.ticket_tree.child.append(story)
+        ingester.invalidate_node_index()
+        self.assertIs(ingester.find_node_in_ticket_tree("Story"), story)
+
+    def test_fingerprint_covers_the_ancestor_chain(self):
+        ingester = self.ingester()
+        ingester.formatted_tree = {
+            "EPIC-1": entry("Epic", children=["S-1", "S-2"]),
+            "S-1": entry("Story one", "EPIC-1", children=["T-1"]),
+            "T-1": entry("Task", "S-1"),
+            "S-2": entry("Story two", "EPIC-1"),
+        }
+        before = {key: ingester.ticket_fingerprint(key) for key in ("T-1", "S-2")}
+        ingester.formatted_tree["S-1"]["description"] = "Rewritten story"
+        self.assertNotEqual(ingester.ticket_fingerprint("T-1"), before["T-1"])
+        self.assertEqual(ingester.ticket_fingerprint("S-2"), before["S-2"])
+        ingester.formatted_tree["T-1"]["parent_key"] = "GONE-1"
+        with self.assertRaises(InvalidTicketStructureError):
+            ingester.ticket_fingerprint("T-1")
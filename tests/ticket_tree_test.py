@@ -0,0 +1,121 @@
+import tempfile
+import unittest
+from pathlib import Path
+from auto_documentation.custom_exceptions import InvalidTicketStructureError
+from auto_documentation.ticket_ingestion.ticket_ingestor_base import GenericIngester
+from auto_documentation.utils import (
+    get_ticket_tree_structure,
+    ticket_tree_to_yaml_dict,
+    yaml_file_to_ticket_tree,
+)
+from auto_documentation.custom_types import (
+    ActionType,
+    TicketNode,
+    TicketTree,
+    node_to_ticket_tree,
+    ticket_tree_to_node,
+)
+
+
+def example_tree() -> TicketTree:
+    epic = TicketTree(ticket_type="Epic")
+    for name in ("Story", "Bug"):
+        branch = TicketTree(ticket_type=name, parent=epic)
+        branch.child.append(
+            TicketTree(
+                ticket_type=f"{name} task", parent=branch, action=ActionType.TEST
+            )
+        )
+        epic.child.append(branch)
+    return epic
+
+
+class TicketTreeTest(unittest.TestCase):
+    def test_conversion_round_trips(self):
+        model = example_tree()
+        node = ticket_tree_to_node(model)
+        self.assertIsInstance(node, TicketNode)
+        self.assertIs(node.child[1].child[0].parent, node.child[1])
+        self.assertEqual(node.child[1].child[0].action, ActionType.TEST)
+        self.assertEqual(node.display_relationship(), model.display_relationship())
+        self.assertEqual(
+            node_to_ticket_tree(node).display_relationship(),
+            model.display_relationship(),
+        )
+
+    def test_display_relationship_leaves_the_tree_intact(self):
+        model = example_tree()
+        first = model.display_relationship()
+        self.assertEqual(model.display_relationship(), first)
+        self.assertEqual(len(model.child[0].child), 1)
+
+    def test_single_child_chains_still_load(self):
+        tree = get_ticket_tree_structure("tests/test_data/example_config.yaml")
+        self.assertEqual(
+            tree.display_relationship(),
+            ">Epic\n-->Requirement\n---->NonFunctionalReq\n------>FunctionalReq\n",
+        )
+        self.assertEqual(tree.child[0].child[0].child[0].action, ActionType.TEST)
+
+    def test_children_can_be_lists_at_any_depth(self):
+        tree = yaml_file_to_ticket_tree(
+            {
+                "root": {
+                    "ticket_type": "Epic",
+                    "child": [
+                        {
+                            "ticket_type": "Story",
+                            "child": [
+                                {"ticket_type": "Sub-task", "action": "Test"},
+                                {"ticket_type": "Spike", "action": "Test"},
+                            ],
+                        },
+                        {"ticket_type": "Bug", "action": "Test"},
+                    ],
+                }
+            }
+        )
+        self.assertEqual([child.ticket_type for child in tree.child], ["Story", "Bug"])
+        self.assertEqual(
+            [child.ticket_type for child in tree.child[0].child], ["Sub-task", "Spike"]
+        )
+        self.assertIs(tree.child[0].child[1].parent, tree.child[0])
+
+    def test_invalid_templates_are_rejected_up_front(self):
+        invalid = [
+            {},
+            {"root": {"action": "Test"}},
+            {"root": {"ticket_type": "Epic", "action": "Deploy"}},
+            {"root": {"ticket_type": "Epic", "children": []}},
+            {"root": {"ticket_type": "Epic", "child": ["Story"]}},
+            {"root": {"ticket_type": "Epic", "child": [{"ticket_type": "S"}, {}]}},
+        ]
+        for yaml_dict in invalid:
+            with self.subTest(yaml_dict=yaml_dict):
+                with self.assertRaises(InvalidTicketStructureError):
+                    yaml_file_to_ticket_tree(yaml_dict)
+
+    def test_repeated_ticket_types_are_named_in_the_error(self):
+        yaml_dict = {
+            "root": {
+                "ticket_type": "Epic",
+                "child": [
+                    {"ticket_type": "Story", "child": {"ticket_type": "Sub-task"}},
+                    {"ticket_type": "Bug", "child": [{"ticket_type": "Sub-task"}]},
+                ],
+            }
+        }
+        with self.assertRaisesRegex(InvalidTicketStructureError, "Sub-task"):
+            yaml_file_to_ticket_tree(yaml_dict)
+
+    def test_written_yaml_round_trips(self):
+        model = example_tree()
+        ingester = GenericIngester({}, model, "EPIC-1")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            outfile = Path(tmp_dir) / "tree.yaml"
+            ingester.write_tree_to_yaml(outfile)
+            reloaded = get_ticket_tree_structure(outfile)
+        self.assertEqual(
+            ticket_tree_to_yaml_dict(reloaded), ticket_tree_to_yaml_dict(model)
+        )
+        self.assertEqual(reloaded.child[1].child[0].action, ActionType.TEST)
@@ -0,0 +1,134 @@
+import tempfile
+import unittest
+from io import BytesIO
+from pathlib import Path
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from auto_documentation.convert_to_file.to_word import (
+    DocxTemplate,
+    DocxWriter,
+    HtmlToWordConverter,
+    apply_style_id,
+    convert_documents,
+)
+from auto_documentation.markdown_converter.html_validator import HTMLProcessor
+from auto_documentation.markdown_converter.markdown import parse_events
+
+MARKDOWN = [
+    "# Title",
+    "Some _styled_ text and __bold__ end",
+    "* Item 1",
+    "* Item 2",
+    "| Field | Value |",
+    "| ----- | ----- |",
+    "| Owner | team |",
+    "After",
+]
+
+
+class ToWordTest(unittest.TestCase):
+    def test_events_become_headings_runs_lists_and_tables(self):
+        doc = DocxWriter().write_events(parse_events(MARKDOWN))
+        paragraphs = [(p.style.name, p.text) for p in doc.paragraphs]
+        assert paragraphs == [
+            ("Heading 1", "Title"),
+            ("Normal", "Some styled text and bold end"),
+            ("List Bullet", "Item 1"),
+            ("List Bullet", "Item 2"),
+            ("Normal", "After"),
+        ]
+        runs = doc.paragraphs[1].runs
+        assert [(run.text, run.bold, run.italic) for run in runs[1:4]] == [
+            ("styled", None, True),
+            (" text and ", None, None),
+            ("bold", True, None),
+        ]
+
+        table = doc.tables[0]
+        assert table.style.name == "Table Grid"
+        assert [[cell.text for cell in row.cells] for row in table.rows] == [
+            ["Field", "Value"],
+            ["Owner", "team"],
+        ]
+        assert table.rows[0].cells[0].paragraphs[0].runs[0].bold
+
+    def test_mixed_content_keeps_text_around_inline_tags(self):
+        cases = {
+            "<p>Intro <strong>bold</strong> tail</p>": ["Intro bold tail"],
+            "<p><em>a</em> b <strong>c</strong></p>": ["a b c"],
+            "<ul><li>Item <em>one</em> and <strong>two</strong>!</li></ul>": [
+                "Item one and two!"
+            ],
+            "<p>A <strong>B <em>C</em> D</strong> E</p><h2>F <em>G</em></h2>": [
+                "A B C D E",
+                "F G",
+            ],
+        }
+        for html, expected in cases.items():
+            doc = DocxWriter().write_node(HTMLProcessor(html).root)
+            assert [p.text for p in doc.paragraphs] == expected, html
+
+        doc = DocxWriter().write_node(
+            HTMLProcessor("<p>Intro <strong>bold</strong> tail</p>").root
+        )
+        assert [(run.text, run.bold) for run in doc.paragraphs[0].runs] == [
+            ("Intro ", None),
+            ("bold", True),
+            (" tail", None),
+        ]
+
+    def test_converter_reads_nodes_and_html_files(self):
+        from_file = HtmlToWordConverter(
+            None, None, html_file_path=Path("tests/test_data/simple.html").absolute()
+        )
+        assert from_file.doc.paragraphs[0].style.name == "Heading 1"
+        assert "An example of a large markdown file" in from_file.doc.paragraphs[0].text
+
+        root = HTMLProcessor("<h2>Node</h2><ul><li>one</li></ul>").root
+        from_node = HtmlToWordConverter(root, None)
+        reloaded = Document(BytesIO(from_node.convert_to_bytes()))
+        assert [p.text for p in reloaded.paragraphs] == ["Node", "one"]
+
+    def test_batch_converts_and_saves_every_document(self):
+        epics = [
+            HTMLProcessor(f"<h1>Epic {index}</h1><p>Body {index}</p>").root
+            for index in range(3)
+        ] + ["<h1>Epic 3</h1><p>Body 3</p>"]
+        for max_workers in [1, 2]:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                outputs = [Path(tmp_dir) / f"epic-{index}.docx" for index in range(4)]
+                timings = convert_documents(
+                    zip(outputs, epics), max_workers=max_workers
+                )
+                assert [timing.output_path for timing in timings] == outputs
+                for index, output in enumerate(outputs):
+                    paragraphs = Document(output).paragraphs
+                    assert [p.text for p in paragraphs] == [
+                        f"Epic {index}",
+                        f"Body {index}",
+                    ]
+                    assert paragraphs[0].style.name == "Heading 1"
+
+    def test_template_clones_share_style_ids(self):
+        template = DocxTemplate()
+        first = template.new_writer()
+        first.write_node(HTMLProcessor("<h1>Epic</h1>").root)
+        assert "Heading 1" in template.style_ids
+        assert template.new_writer().doc.paragraphs == []
+        assert template.document.paragraphs == []
+
+    def test_style_ids_are_applied_as_the_public_setters_would(self):
+        # Pins the python-docx oxml attributes apply_style_id writes
+        doc = Document()
+        for name in ["Heading 1", "Normal"]:
+            style_id = doc.part.get_style_id(name, WD_STYLE_TYPE.PARAGRAPH)
+            public, direct = doc.add_paragraph(), doc.add_paragraph()
+            public.style = doc.styles[name]
+            apply_style_id(direct, style_id)
+            assert direct._p.xml == public._p.xml
+            assert direct.style.name == name
+        public, direct = doc.add_table(1, 1), doc.add_table(1, 1)
+        public.style = doc.styles["Table Grid"]
+        apply_style_id(direct, doc.part.get_style_id("Table Grid", WD_STYLE_TYPE.TABLE))
+        assert direct._tbl.xml == public._tbl.xml
+        assert direct.style.name == "Table Grid"
@@ -0,0 +1,96 @@
+import time
+import unittest
+import requests
+from auto_documentation.ticket_ingestion.jira_main import IngestJira, client_session
+from auto_documentation.transport import (
+    RetryPolicy,
+    TokenBucket,
+    TransportSettings,
+    mount_transport,
+)
+from tests.fake_jira_server import FakeJiraServer, build_program
+from tests.fake_llm_server import FakeLLMServer
+from tests.jira_ingestion_test import program_template
+
+
+class TransportTest(unittest.TestCase):
+    def test_token_bucket_holds_the_configured_rate(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        started = time.monotonic()
+        for _ in range(11):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+
+    def test_paused_bucket_blocks_every_caller(self):
+        bucket = TokenBucket(rate=1000, capacity=10)
+        bucket.pause(0.1)
+        self.assertGreaterEqual(bucket.acquire(), 0.09)
+
+    def test_retry_after_overrides_backoff(self):
+        policy = RetryPolicy(backoff_base=100)
+        self.assertEqual(policy.delay(3, retry_after="2"), 2.0)
+        self.assertLessEqual(RetryPolicy(backoff_base=0.1).delay(2), 0.4)
+
+    def test_malformed_retry_after_falls_back_to_backoff(self):
+        policy = RetryPolicy(backoff_base=0.1)
+        for retry_after in ["soon", "Mon, 99 Foo 2024", "  "]:
+            self.assertLessEqual(policy.delay(2, retry_after=retry_after), 0.4)
+
+    def test_only_idempotent_methods_are_retried_by_default(self):
+        with FakeLLMServer() as server:
+            session = requests.Session()
+            transport = mount_transport(session, TransportSettings(backoff_base=0))
+            server.throttle_next = 1
+            response = session.post(server.url, json={"prompts": []})
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(transport.metrics.summary()["retries"], 0)
+
+            opted_in = requests.Session()
+            transport = mount_transport(
+                opted_in, TransportSettings(backoff_base=0, retry_non_idempotent=True)
+            )
+            server.throttle_next = 1
+            response = opted_in.post(server.url, json={"prompts": []})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(transport.metrics.summary()["retries"], 1)
+
+    def test_clients_without_a_session_are_refused(self):
+        with self.assertRaises(TypeError):
+            client_session(object())
+
+    def test_jira_client_leaves_retries_to_the_transport(self):
+        with FakeJiraServer(build_program(stories=1, subtasks=0)) as server:
+            ingester = IngestJira(
+                jira_config=server.config(),
+                ticket_tree=program_template(),
+                parent_ticket_id="EPIC-1",
+            )
+            raw = server.issues["EPIC-1"]
+            issue = ingester.issue_from_raw(raw)
+        self.assertEqual(ingester.session.max_retries, 0)
+        self.assertEqual(issue.key, "EPIC-1")
+        self.assertEqual(issue.fields.summary, raw["fields"]["summary"])
+
+    def test_settings_are_read_from_config(self):
+        settings = TransportSettings.from_config(
+            {"jira_pool_size": 32, "jira_rate_limit": 20}
+        )
+        self.assertEqual(settings.pool_size, 32)
+        self.assertEqual(settings.rate_limit, 20)
+        self.assertEqual(settings.max_retries, TransportSettings().max_retries)
+
+    def test_ingestion_survives_throttling(self):
+        with FakeJiraServer(build_program(stories=4, subtasks=2)) as server:
+            ingester = IngestJira(
+                jira_config=server.config(jira_rate_limit=200, jira_backoff_base=0),
+                ticket_tree=program_template(),
+                parent_ticket_id="EPIC-1",
+            )
+            server.throttle_next = 5
+            ingester.build_formatted_tree()
+
+        self.assertEqual(len(ingester.formatted_tree), 1 + 4 + 4 * 2)
+        summary = ingester.transport.metrics.summary()
+        self.assertEqual(summary["retries"], 5)
+        self.assertEqual(summary["statuses"][429], 5)
+        self.assertGreater(summary["p95"], 0)